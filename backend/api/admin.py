@@ -331,11 +331,9 @@ def get_maintenance_status(session: Session = Depends(get_session)):
     dead_links = []
     fixable_links = []
     
-    notes = session.exec(select(NoteNode)).all()
-    
-    for note in notes:
-        if note.content:
-            matches = ATTACHMENT_URL_PATTERN.findall(note.content)
+    for note_id, note_title, content in _scan_note_contents(session):
+        if content:
+            matches = ATTACHMENT_URL_PATTERN.findall(content)
             for filename in matches:
                 referenced_files.add(filename)
                 
@@ -344,15 +342,15 @@ def get_maintenance_status(session: Session = Depends(get_session)):
                     candidates = disk_files_by_stem.get(stem)
                     if candidates:
                         fixable_links.append(FixableLink(
-                            note_id=str(note.id),
-                            note_title=note.title or "Untitled",
+                            note_id=str(note_id),
+                            note_title=note_title or "Untitled",
                             original_url=build_attachment_url(filename),
                             suggested_url=build_attachment_url(candidates[0])
                         ))
                     else:
                         dead_links.append({
-                            "note_id": note.id,
-                            "note_title": note.title,
+                            "note_id": note_id,
+                            "note_title": note_title,
                             "link": build_attachment_url(filename)
                         })
 
@@ -368,6 +366,18 @@ def get_maintenance_status(session: Session = Depends(get_session)):
         fixable_links=fixable_links
     )
 
+def _scan_note_contents(session: Session):
+    """
+    (id, title, content) of notes that may reference an attachment.
+    Only those three columns are read, streamed in batches instead of loading every note.
+    """
+    statement = (
+        select(NoteNode.id, NoteNode.title, NoteNode.content)
+        .where(NoteNode.content.contains("/static/"))
+        .execution_options(yield_per=200)
+    )
+    return session.exec(statement)
+
 @router.get("/images/orphans", response_model=OrphanImageResponse)
 def get_orphan_images(session: Session = Depends(get_session)):
     """
@@ -387,10 +397,9 @@ def get_orphan_images(session: Session = Depends(get_session)):
                 total_size += st.st_size
 
     referenced = set()
-    notes = session.exec(select(NoteNode)).all()
-    for n in notes:
-        if n.content:
-            for m in ATTACHMENT_URL_PATTERN.findall(n.content):
+    for _, _, content in _scan_note_contents(session):
+        if content:
+            for m in ATTACHMENT_URL_PATTERN.findall(content):
                 referenced.add(m)
     
     orphans = []
@@ -474,16 +483,13 @@ def fix_broken_links(session: Session = Depends(get_session)):
                 disk_files_by_stem[stem] = []
             disk_files_by_stem[stem].append(filename)
 
-    notes = session.exec(select(NoteNode)).all()
-    
     fixed_count = 0
-    fixed_notes_count = 0
+    fixed_contents = {}
     
-    for note in notes:
-        if not note.content:
+    for note_id, _, original_content in _scan_note_contents(session):
+        if not original_content:
             continue
             
-        original_content = note.content
         new_content = original_content
         note_modified = False
         
@@ -511,20 +517,19 @@ def fix_broken_links(session: Session = Depends(get_session)):
                             break
         
         if note_modified:
-            # Manually update content without triggering updated_at change if possible
-            # SQLModel/SQLAlchemy defaults usually update updated_at if configured in model events
-            # But our model definition uses default_factory=time.time, which only sets on create/init if not provided?
-            # Actually, looking at model: updated_at: float = Field(default_factory=time.time)
-            # This is NOT an onupdate server-side trigger usually, unless there's event listener.
-            # Let's check model definition again.
-            # It's just a default factory. It won't auto-update on update unless we set it or there is a database trigger.
-            # So simply setting note.content = new_content and session.add(note) should NOT change updated_at
-            # unless we explicitly set note.updated_at = time.time().
-            # So we are safe.
-            note.content = new_content
-            session.add(note)
-            fixed_notes_count += 1
-            
+            fixed_contents[note_id] = new_content
+
+    # Only the notes that changed are loaded as full rows.
+    # updated_at has no onupdate hook, so rewriting content keeps it as is.
+    fixed_notes_count = 0
+    for note_id, new_content in fixed_contents.items():
+        note = session.get(NoteNode, note_id)
+        if note is None:
+            continue
+        note.content = new_content
+        session.add(note)
+        fixed_notes_count += 1
+
     if fixed_notes_count > 0:
         session.commit()
         
@@ -10,6 +10,7 @@ from ..core.auth import (
     verify_password,
     get_password_hash,
     get_current_active_user,
+    user_cache,
     ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from ..models import User
@@ -96,6 +97,7 @@ def register_user(
     session.add(db_user)
     session.commit()
     session.refresh(db_user)
+    user_cache.invalidate(db_user.username)
     
     return db_user
 
@@ -4,12 +4,12 @@ import subprocess
 import sys
 from typing import Dict, List, Optional
 
-import psutil
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 
 from backend.core.auth import verify_api_token
-from backend.core.device import device_manager, get_device_id, match_cmdline
+from backend.core.device import device_manager, find_matching_processes, get_device_id
+from backend.core.process_snapshot import process_snapshots
 
 router = APIRouter(dependencies=[Depends(verify_api_token)])
 
@@ -27,49 +27,32 @@ class MatchProcessesRequest(BaseModel):
 def match_processes(req: MatchProcessesRequest):
     results = {}
 
-    procs = []
-    try:
-        procs = list(
-            psutil.process_iter(
-                ["pid", "name", "cmdline", "create_time", "cpu_percent", "memory_info"]
-            )
-        )
-    except Exception:
-        pass
-
+    snapshot = process_snapshots.get()
     used_pids = set()
 
     for task in req.tasks:
         found = False
-        for proc in procs:
+        for proc in find_matching_processes(task.command, snapshot):
             if proc.pid in used_pids:
                 continue
 
+            found = True
+            used_pids.add(proc.pid)
+
             try:
-                cmdline = proc.info["cmdline"]
-                if not cmdline:
-                    continue
-
-                if match_cmdline(task.command, cmdline):
-                    found = True
-                    used_pids.add(proc.pid)
-
-                    try:
-                        mem = proc.info["memory_info"].rss if proc.info["memory_info"] else 0
-                    except Exception:
-                        mem = 0
-
-                    results[task.id] = {
-                        "id": task.id,
-                        "running": True,
-                        "pid": proc.pid,
-                        "started_at": proc.info["create_time"],
-                        "cpu_percent": proc.info["cpu_percent"],
-                        "memory_rss": mem,
-                    }
-                    break
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+                mem = proc.info["memory_info"].rss if proc.info["memory_info"] else 0
+            except Exception:
+                mem = 0
+
+            results[task.id] = {
+                "id": task.id,
+                "running": True,
+                "pid": proc.pid,
+                "started_at": proc.info["create_time"],
+                "cpu_percent": proc.info["cpu_percent"],
+                "memory_rss": mem,
+            }
+            break
 
         if not found:
             results[task.id] = {"id": task.id, "running": False}
@@ -1,19 +1,34 @@
+import asyncio
 import shlex
 import subprocess
 import sys
 import time
 import uuid
-from typing import Any, Dict, List, Optional
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-import requests
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse, Response
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from sqlmodel import Session, select
-
-from backend.api.task_manager import CreateTaskRequest, UpdateTaskRequest, task_manager
-from backend.core.auth import get_current_user_from_token
+from starlette.background import BackgroundTask
+
+from backend.api.node_relay import log_relay, node_relay
+from backend.api.task_manager import (
+    CreateTaskRequest,
+    UpdateTaskRequest,
+    compile_log_query,
+    serve_task_list,
+    serve_task_logs,
+    task_manager,
+)
+from backend.core.auth import get_current_user_from_token, get_current_user_from_websocket
 from backend.core.device import BaseDevice, device_manager, get_device_id
-from backend.db import get_session
+from backend.core.log_search import to_ndjson
+from backend.core.remote_clients import remote_clients
+from backend.core.settings import get_settings
+from backend.db import engine, get_session
 from backend.models import Task as TaskModel
 from backend.models import User, UserDevice
 
@@ -46,45 +61,105 @@ def _remote_base_url(entry: UserDevice) -> str:
     return entry.server_url.rstrip("/")
 
 
-def _proxy_headers(entry: UserDevice) -> Dict[str, str]:
-    return {
-        "Authorization": f"Bearer {entry.token}",
-        "X-Device-Token": entry.token,
-    }
-
+PASSTHROUGH_HEADERS = (
+    "content-type",
+    "content-encoding",
+    "content-length",
+    "content-disposition",
+    "cache-control",
+    "etag",
+    "last-modified",
+)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _accepts_gzip(request: Optional[Request]) -> bool:
+    if request is None or not remote_clients.gzip_responses:
+        return False
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+async def _relay_body(resp: httpx.Response, limit: int, compress: bool) -> AsyncIterator[bytes]:
+    # wbits=31: gzip container; each chunk is sync-flushed so streamed logs arrive as they are read
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    sent = 0
+    async for chunk in resp.aiter_raw():
+        sent += len(chunk)
+        if limit and sent > limit:
+            # Headers are already out; abort the transfer so the client sees it incomplete
+            # instead of a short body that looks complete (with a clean gzip trailer)
+            print(f"Proxied response from {resp.request.url} aborted at {limit} bytes")
+            raise RuntimeError(f"Remote response exceeds {limit} bytes")
+        if compressor is None:
+            yield chunk
+        else:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    if compressor is not None:
+        yield compressor.flush()
+
+
+async def _proxy_response(resp: httpx.Response, compress: bool = False) -> Response:
+    """Forward status, headers and body chunks of a remote response without decoding them."""
+    limit = remote_clients.max_body_bytes
+    length = resp.headers.get("content-length", "")
+    if limit and length.isdigit() and int(length) > limit:
+        await resp.aclose()
+        raise HTTPException(status_code=502, detail=f"Remote response exceeds {limit} bytes")
+
+    headers = {name: resp.headers[name] for name in PASSTHROUGH_HEADERS if name in resp.headers}
+    content_type = headers.get("content-type", "").lower()
+    compress = (
+        compress
+        and "content-encoding" not in headers
+        and any(content_type.startswith(prefix) for prefix in COMPRESSIBLE_TYPES)
+    )
+    if compress:
+        headers.pop("content-length", None)
+        headers["content-encoding"] = "gzip"
+        headers["vary"] = "Accept-Encoding"
 
-def _proxy_response(resp: requests.Response) -> Response:
-    content_type = resp.headers.get("content-type", "")
-    if "application/json" in content_type.lower():
-        return JSONResponse(status_code=resp.status_code, content=resp.json())
-    return Response(
-        content=resp.content,
+    return StreamingResponse(
+        _relay_body(resp, limit, compress),
         status_code=resp.status_code,
-        media_type=content_type or None,
+        headers=headers,
+        background=BackgroundTask(resp.aclose),
     )
 
 
-def _proxy_request(
+async def _proxy_request(
     entry: UserDevice,
     method: str,
     path: str,
     *,
     params: Optional[Dict[str, Any]] = None,
     json_body: Optional[Any] = None,
+    request: Optional[Request] = None,
 ) -> Response:
-    target_url = f"{_remote_base_url(entry)}/api{path}"
+    """
+    Forward a call to a remote entry and stream its response back.
+
+    Pass the incoming `request` to let browsers that accept gzip receive a
+    compressed body; the remote node is then also allowed to send gzip, which
+    is passed through as-is.
+    """
+    base_url = _remote_base_url(entry)
+    compress = _accepts_gzip(request)
     try:
-        resp = requests.request(
-            method=method,
-            url=target_url,
-            headers=_proxy_headers(entry),
+        resp = await remote_clients.send(
+            entry.entry_id,
+            base_url,
+            entry.token,
+            method,
+            f"/api{path}",
             params=params,
             json=json_body,
-            timeout=10,
+            headers={"Accept-Encoding": "gzip" if compress else "identity"},
         )
-    except requests.RequestException as exc:
+    except httpx.PoolTimeout as exc:
+        raise HTTPException(status_code=503, detail="Remote device is busy, too many concurrent requests") from exc
+    except httpx.HTTPError as exc:
         raise HTTPException(status_code=502, detail=f"Failed to reach remote device: {exc}") from exc
-    return _proxy_response(resp)
+    return await _proxy_response(resp, compress)
 
 
 def _get_scoped_task(session: Session, task_id: str, device_id: str) -> TaskModel:
@@ -112,9 +187,10 @@ def _list_local_tasks(session: Session, entry: UserDevice) -> List[Dict[str, Any
     tasks = session.exec(stmt).all()
     device.scan_running_tasks(tasks)
 
+    statuses = device.get_task_statuses([task.id for task in tasks])
     results = []
     for task in tasks:
-        status = device.get_task_status(task.id)
+        status = statuses[task.id]
         task_dict = task.model_dump()
         task_dict["status"] = status.model_dump()
         results.append(task_dict)
@@ -139,6 +215,10 @@ def _create_local_task(session: Session, entry: UserDevice, req: CreateTaskReque
         device_id=entry.device_id,
         schedule=req.schedule,
         timeout=req.timeout,
+        misfire_grace_time=req.misfire_grace_time,
+        coalesce=req.coalesce,
+        concurrency_group=req.concurrency_group or None,
+        priority=req.priority,
         created_at=time.time(),
         order=next_order,
     )
@@ -147,35 +227,39 @@ def _create_local_task(session: Session, entry: UserDevice, req: CreateTaskReque
     session.refresh(new_task)
 
     if req.schedule:
-        task_manager.update_schedule(new_task.id, req.schedule)
+        task_manager.update_schedule(new_task.id, req.schedule, new_task.misfire_grace_time, new_task.coalesce)
 
     return new_task.model_dump()
 
 
 def _delete_local_task(session: Session, entry: UserDevice, task_id: str) -> Dict[str, str]:
-    device = _get_local_device(entry)
+    _get_local_device(entry)
     task = _get_scoped_task(session, task_id, entry.device_id)
     task_manager.update_schedule(task_id, None)
-    device.stop_task(task_id)
+    task_manager.stop_task(task_id)
     session.delete(task)
     session.commit()
     return {"status": "deleted"}
 
 
 def _start_local_task(session: Session, entry: UserDevice, task_id: str) -> Dict[str, Any]:
-    device = _get_local_device(entry)
+    _get_local_device(entry)
     task = _get_scoped_task(session, task_id, entry.device_id)
     try:
-        return device.start_task(task.id, task.command, task.cwd, env={}, timeout=task.timeout)
+        # Same path as node-side starts: admission queue, run history and error codes
+        return task_manager.start_task(task.id)
+    except HTTPException:
+        raise
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
 def _stop_local_task(session: Session, entry: UserDevice, task_id: str) -> Dict[str, Any]:
-    device = _get_local_device(entry)
+    _get_local_device(entry)
     _get_scoped_task(session, task_id, entry.device_id)
     try:
-        return device.stop_task(task_id)
+        # Dequeues a waiting start (cancelling its run) or stops the process
+        return task_manager.stop_task(task_id)
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
@@ -193,13 +277,22 @@ def _update_local_task(session: Session, entry: UserDevice, task_id: str, req: U
         task.description = req.description
     if req.schedule is not None:
         task.schedule = req.schedule
-        task_manager.update_schedule(task_id, req.schedule)
     if req.timeout is not None:
         task.timeout = req.timeout
+    if req.misfire_grace_time is not None:
+        task.misfire_grace_time = req.misfire_grace_time
+    if req.coalesce is not None:
+        task.coalesce = req.coalesce
+    if req.concurrency_group is not None:
+        task.concurrency_group = req.concurrency_group or None
+    if req.priority is not None:
+        task.priority = req.priority
 
     session.add(task)
     session.commit()
     session.refresh(task)
+    if req.schedule is not None or req.misfire_grace_time is not None or req.coalesce is not None:
+        task_manager.update_schedule(task_id, task.schedule, task.misfire_grace_time, task.coalesce)
     return task.model_dump()
 
 
@@ -229,10 +322,64 @@ def _get_local_task_details(session: Session, entry: UserDevice, task_id: str) -
     }
 
 
-def _get_local_task_logs(session: Session, entry: UserDevice, task_id: str, lines: int) -> Dict[str, List[str]]:
+def _get_local_task_logs(
+    session: Session,
+    entry: UserDevice,
+    task_id: str,
+    lines: int,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+) -> Dict[str, Any]:
+    device = _get_local_device(entry)
+    _get_scoped_task(session, task_id, entry.device_id)
+    return device.read_logs(task_id, lines, before=before, after=after)
+
+
+def _list_local_task_runs(session: Session, entry: UserDevice, task_id: str) -> Dict[str, Any]:
+    device = _get_local_device(entry)
+    _get_scoped_task(session, task_id, entry.device_id)
+    return {"runs": device.list_log_runs(task_id)}
+
+
+def _search_local_task_logs(
+    session: Session,
+    entry: UserDevice,
+    task_id: str,
+    q: str,
+    regex: bool,
+    ignore_case: bool,
+    context: int,
+    since: Optional[float],
+    until: Optional[float],
+    limit: int,
+) -> StreamingResponse:
+    device = _get_local_device(entry)
+    _get_scoped_task(session, task_id, entry.device_id)
+    pattern = compile_log_query(q, regex, ignore_case)
+    records = device.search_logs(
+        task_id,
+        pattern,
+        context=min(max(context, 0), 20),
+        since=since,
+        until=until,
+        limit=min(max(limit, 1), 10000),
+    )
+    return StreamingResponse(to_ndjson(records), media_type="application/x-ndjson")
+
+
+def _get_local_task_history(session: Session, entry: UserDevice, task_id: str, limit: int) -> Dict[str, Any]:
+    _get_local_device(entry)
+    _get_scoped_task(session, task_id, entry.device_id)
+    return {"runs": [run.model_dump() for run in task_manager.list_runs(task_id, min(max(limit, 1), 500))]}
+
+
+def _get_local_task_run_logs(session: Session, entry: UserDevice, task_id: str, run: int, lines: int) -> Dict[str, Any]:
     device = _get_local_device(entry)
     _get_scoped_task(session, task_id, entry.device_id)
-    return {"logs": device.get_logs(task_id, lines)}
+    result = device.read_run_logs(task_id, run, lines)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return result
 
 
 def _get_local_related_processes(session: Session, entry: UserDevice, task_id: str) -> List[Dict[str, Any]]:
@@ -271,20 +418,216 @@ def _associate_local_process(session: Session, entry: UserDevice, task_id: str,
     return result
 
 
+# Last good task list per entry: {"tasks": [...], "fetched_at": ts}
+_last_good_tasks: Dict[str, Dict[str, Any]] = {}
+# Fetches still running after their deadline keep going and refresh the cache
+_inflight_task_fetches: Dict[str, "asyncio.Task[List[Dict[str, Any]]]"] = {}
+
+
+def _list_local_tasks_in_new_session(session: Session, entry: UserDevice) -> List[Dict[str, Any]]:
+    # A fetch may outlive its request, so it must not share the request's session
+    with Session(session.get_bind()) as own_session:
+        return _list_local_tasks(own_session, entry)
+
+
+async def _fetch_entry_tasks(session: Session, entry: UserDevice) -> List[Dict[str, Any]]:
+    if entry.mode == "local":
+        tasks = await run_in_threadpool(_list_local_tasks_in_new_session, session, entry)
+    else:
+        resp = await remote_clients.request(
+            entry.entry_id,
+            _remote_base_url(entry),
+            entry.token,
+            "GET",
+            "/api/task/",
+        )
+        resp.raise_for_status()
+        tasks = resp.json()
+    _last_good_tasks[entry.entry_id] = {"tasks": tasks, "fetched_at": time.time()}
+    return tasks
+
+
+def _task_fetch_for(session: Session, entry: UserDevice) -> "asyncio.Task[List[Dict[str, Any]]]":
+    fetch = _inflight_task_fetches.get(entry.entry_id)
+    if fetch is not None and not fetch.done() and fetch.get_loop() is asyncio.get_running_loop():
+        return fetch
+
+    fetch = asyncio.ensure_future(_fetch_entry_tasks(session, entry))
+    _inflight_task_fetches[entry.entry_id] = fetch
+
+    def _forget(done: asyncio.Future) -> None:
+        if _inflight_task_fetches.get(entry.entry_id) is done:
+            del _inflight_task_fetches[entry.entry_id]
+        if not done.cancelled():
+            done.exception()  # retrieved here so a late failure is not reported as unhandled
+
+    fetch.add_done_callback(_forget)
+    return fetch
+
+
+def _fetch_error(exc: BaseException) -> str:
+    if isinstance(exc, HTTPException):
+        return str(exc.detail)
+    if isinstance(exc, httpx.HTTPStatusError):
+        return f"Remote device returned {exc.response.status_code}"
+    return str(exc) or exc.__class__.__name__
+
+
+async def _collect_entry_tasks(session: Session, entry: UserDevice, deadline: float) -> Dict[str, Any]:
+    node: Dict[str, Any] = {
+        "entry_id": entry.entry_id,
+        "device_id": entry.device_id,
+        "name": entry.name,
+        "mode": entry.mode,
+        "state": "ok",
+        "error": None,
+    }
+    fetch = _task_fetch_for(session, entry)
+    done, _ = await asyncio.wait({fetch}, timeout=deadline)
+    if done and not fetch.exception():
+        node["tasks"] = fetch.result()
+        node["fetched_at"] = _last_good_tasks[entry.entry_id]["fetched_at"]
+        return node
+
+    node["error"] = _fetch_error(fetch.exception()) if done else f"No response within {deadline:g}s"
+    cached = _last_good_tasks.get(entry.entry_id)
+    if cached is not None:
+        node["state"] = "stale"
+        node["tasks"] = cached["tasks"]
+        node["fetched_at"] = cached["fetched_at"]
+    else:
+        node["state"] = "error"
+        node["tasks"] = []
+        node["fetched_at"] = None
+    return node
+
+
+@router.get("/tasks")
+async def list_all_entry_tasks(
+    timeout: Optional[float] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    """
+    Tasks of every active entry of the user, fetched from all nodes concurrently.
+
+    Each node gets `timeout` seconds (default CODEYUN_REMOTE_FANOUT_DEADLINE).
+    Nodes that fail or miss the deadline are returned with state "stale" and
+    their last good task list, or state "error" if there is none yet; `partial`
+    is set whenever any node is not "ok".
+    """
+    entries = [
+        entry
+        for entry in session.exec(
+            select(UserDevice)
+            .where(UserDevice.user_id == current_user.id)
+            .order_by(UserDevice.order_index, UserDevice.created_at)
+        ).all()
+        if entry.is_active
+    ]
+    deadline = timeout if timeout and timeout > 0 else get_settings().remote_fanout_deadline
+    nodes = await asyncio.gather(*(_collect_entry_tasks(session, entry, deadline) for entry in entries))
+    return {
+        "nodes": list(nodes),
+        "partial": any(node["state"] != "ok" for node in nodes),
+        "generated_at": time.time(),
+    }
+
+
+def _socket_entry(entry_id: str, current_user: User, task_id: Optional[str] = None) -> Optional[UserDevice]:
+    """
+    The user's active entry for a WebSocket route, or None to refuse it.
+    Uses its own short session, closed before the socket starts streaming,
+    so open sockets do not each hold a pooled DB connection.
+    """
+    with Session(engine) as session:
+        entry = session.get(UserDevice, entry_id)
+        if not entry or entry.user_id != current_user.id or not entry.is_active:
+            return None
+        if task_id is not None and entry.mode == "local":
+            task = session.get(TaskModel, task_id)
+            if not task or task.device_id != entry.device_id:
+                return None
+        return entry
+
+
+@router.websocket("/{entry_id}/ws/tasks")
+async def websocket_entry_tasks(
+    websocket: WebSocket,
+    entry_id: str,
+    current_user: User = Depends(get_current_user_from_websocket),
+):
+    """
+    Live task list of one entry. Local entries stream this node's feed; remote
+    entries share one upstream WebSocket to the node, relayed by node_relay.
+    """
+    entry = await run_in_threadpool(_socket_entry, entry_id, current_user)
+    if entry is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if entry.mode == "local":
+        await serve_task_list(websocket)
+        return
+    if not entry.server_url:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await node_relay.subscribe(websocket, entry.entry_id, entry.server_url, entry.token)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        node_relay.unsubscribe(websocket, entry.entry_id)
+
+
+@router.websocket("/{entry_id}/ws/logs/{task_id}")
+async def websocket_entry_task_logs(
+    websocket: WebSocket,
+    entry_id: str,
+    task_id: str,
+    current_user: User = Depends(get_current_user_from_websocket),
+):
+    """
+    Live log batches of one task of an entry. Remote viewers of the same task
+    share one upstream WebSocket to the node, relayed by log_relay.
+    """
+    entry = await run_in_threadpool(_socket_entry, entry_id, current_user, task_id)
+    if entry is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if entry.mode == "local":
+        await serve_task_logs(websocket, task_id)
+        return
+    if not entry.server_url:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await log_relay.subscribe(websocket, entry.entry_id, task_id, entry.server_url, entry.token)
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        log_relay.unsubscribe(websocket, entry.entry_id, task_id)
+
+
 @router.get("/{entry_id}/task/")
-def list_tasks_for_entry(
+async def list_tasks_for_entry(
     entry_id: str,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user_from_token),
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _list_local_tasks(session, entry)
-    return _proxy_request(entry, "GET", "/task/")
+        return await run_in_threadpool(_list_local_tasks, session, entry)
+    return await _proxy_request(entry, "GET", "/task/")
 
 
 @router.post("/{entry_id}/task/create")
-def create_task_for_entry(
+async def create_task_for_entry(
     entry_id: str,
     req: CreateTaskRequest,
     session: Session = Depends(get_session),
@@ -292,12 +635,12 @@ def create_task_for_entry(
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _create_local_task(session, entry, req)
-    return _proxy_request(entry, "POST", "/task/create", json_body=req.model_dump())
+        return await run_in_threadpool(_create_local_task, session, entry, req)
+    return await _proxy_request(entry, "POST", "/task/create", json_body=req.model_dump())
 
 
 @router.delete("/{entry_id}/task/{task_id}")
-def delete_task_for_entry(
+async def delete_task_for_entry(
     entry_id: str,
     task_id: str,
     session: Session = Depends(get_session),
@@ -305,12 +648,12 @@ def delete_task_for_entry(
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _delete_local_task(session, entry, task_id)
-    return _proxy_request(entry, "DELETE", f"/task/{task_id}")
+        return await run_in_threadpool(_delete_local_task, session, entry, task_id)
+    return await _proxy_request(entry, "DELETE", f"/task/{task_id}")
 
 
 @router.post("/{entry_id}/task/{task_id}/start")
-def start_task_for_entry(
+async def start_task_for_entry(
     entry_id: str,
     task_id: str,
     session: Session = Depends(get_session),
@@ -318,12 +661,12 @@ def start_task_for_entry(
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _start_local_task(session, entry, task_id)
-    return _proxy_request(entry, "POST", f"/task/{task_id}/start")
+        return await run_in_threadpool(_start_local_task, session, entry, task_id)
+    return await _proxy_request(entry, "POST", f"/task/{task_id}/start")
 
 
 @router.post("/{entry_id}/task/{task_id}/stop")
-def stop_task_for_entry(
+async def stop_task_for_entry(
     entry_id: str,
     task_id: str,
     session: Session = Depends(get_session),
@@ -331,12 +674,12 @@ def stop_task_for_entry(
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _stop_local_task(session, entry, task_id)
-    return _proxy_request(entry, "POST", f"/task/{task_id}/stop")
+        return await run_in_threadpool(_stop_local_task, session, entry, task_id)
+    return await _proxy_request(entry, "POST", f"/task/{task_id}/stop")
 
 
 @router.post("/{entry_id}/task/{task_id}/update")
-def update_task_for_entry(
+async def update_task_for_entry(
     entry_id: str,
     task_id: str,
     req: UpdateTaskRequest,
@@ -345,12 +688,12 @@ def update_task_for_entry(
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _update_local_task(session, entry, task_id, req)
-    return _proxy_request(entry, "POST", f"/task/{task_id}/update", json_body=req.model_dump(exclude_none=True))
+        return await run_in_threadpool(_update_local_task, session, entry, task_id, req)
+    return await _proxy_request(entry, "POST", f"/task/{task_id}/update", json_body=req.model_dump(exclude_none=True))
 
 
 @router.post("/{entry_id}/task/reorder")
-def reorder_tasks_for_entry(
+async def reorder_tasks_for_entry(
     entry_id: str,
     task_ids: List[str],
     session: Session = Depends(get_session),
@@ -358,12 +701,12 @@ def reorder_tasks_for_entry(
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _reorder_local_tasks(session, entry, task_ids)
-    return _proxy_request(entry, "POST", "/task/reorder", json_body=task_ids)
+        return await run_in_threadpool(_reorder_local_tasks, session, entry, task_ids)
+    return await _proxy_request(entry, "POST", "/task/reorder", json_body=task_ids)
 
 
 @router.get("/{entry_id}/task/{task_id}")
-def get_task_for_entry(
+async def get_task_for_entry(
     entry_id: str,
     task_id: str,
     session: Session = Depends(get_session),
@@ -371,39 +714,119 @@ def get_task_for_entry(
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _get_local_task_details(session, entry, task_id)
-    return _proxy_request(entry, "GET", f"/task/{task_id}")
+        return await run_in_threadpool(_get_local_task_details, session, entry, task_id)
+    return await _proxy_request(entry, "GET", f"/task/{task_id}")
 
 
 @router.get("/{entry_id}/task/{task_id}/logs")
-def get_task_logs_for_entry(
+async def get_task_logs_for_entry(
     entry_id: str,
     task_id: str,
+    request: Request,
     n: int = 500,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    entry = _get_entry_or_404(session, current_user, entry_id)
+    if entry.mode == "local":
+        return await run_in_threadpool(_get_local_task_logs, session, entry, task_id, n, before=before, after=after)
+    params = {"n": n}
+    if before is not None:
+        params["before"] = before
+    if after is not None:
+        params["after"] = after
+    return await _proxy_request(entry, "GET", f"/task/{task_id}/logs", params=params, request=request)
+
+
+@router.get("/{entry_id}/task/{task_id}/logs/search")
+async def search_task_logs_for_entry(
+    entry_id: str,
+    task_id: str,
+    request: Request,
+    q: str,
+    regex: bool = False,
+    ignore_case: bool = False,
+    context: int = 2,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 1000,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    entry = _get_entry_or_404(session, current_user, entry_id)
+    if entry.mode == "local":
+        return await run_in_threadpool(
+            _search_local_task_logs, session, entry, task_id, q, regex, ignore_case, context, since, until, limit
+        )
+    params: Dict[str, Any] = {"q": q, "regex": regex, "ignore_case": ignore_case, "context": context, "limit": limit}
+    if since is not None:
+        params["since"] = since
+    if until is not None:
+        params["until"] = until
+    return await _proxy_request(entry, "GET", f"/task/{task_id}/logs/search", params=params, request=request)
+
+
+@router.get("/{entry_id}/task/{task_id}/runs")
+async def list_task_runs_for_entry(
+    entry_id: str,
+    task_id: str,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    entry = _get_entry_or_404(session, current_user, entry_id)
+    if entry.mode == "local":
+        return await run_in_threadpool(_list_local_task_runs, session, entry, task_id)
+    return await _proxy_request(entry, "GET", f"/task/{task_id}/runs")
+
+
+@router.get("/{entry_id}/task/{task_id}/runs/{run}/logs")
+async def get_task_run_logs_for_entry(
+    entry_id: str,
+    task_id: str,
+    request: Request,
+    run: int,
+    n: int = 500,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user_from_token),
+):
+    entry = _get_entry_or_404(session, current_user, entry_id)
+    if entry.mode == "local":
+        return await run_in_threadpool(_get_local_task_run_logs, session, entry, task_id, run, n)
+    return await _proxy_request(entry, "GET", f"/task/{task_id}/runs/{run}/logs", params={"n": n}, request=request)
+
+
+@router.get("/{entry_id}/task/{task_id}/history")
+async def get_task_history_for_entry(
+    entry_id: str,
+    task_id: str,
+    limit: int = 50,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user_from_token),
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _get_local_task_logs(session, entry, task_id, n)
-    return _proxy_request(entry, "GET", f"/task/{task_id}/logs", params={"n": n})
+        return await run_in_threadpool(_get_local_task_history, session, entry, task_id, limit)
+    return await _proxy_request(entry, "GET", f"/task/{task_id}/history", params={"limit": limit})
 
 
 @router.get("/{entry_id}/task/{task_id}/related_processes")
-def get_related_processes_for_entry(
+async def get_related_processes_for_entry(
     entry_id: str,
     task_id: str,
+    request: Request,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user_from_token),
 ):
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _get_local_related_processes(session, entry, task_id)
-    return _proxy_request(entry, "GET", f"/task/{task_id}/related_processes")
+        return await run_in_threadpool(_get_local_related_processes, session, entry, task_id)
+    return await _proxy_request(entry, "GET", f"/task/{task_id}/related_processes", request=request)
 
 
 @router.post("/{entry_id}/task/process/kill")
-def kill_process_for_entry(
+async def kill_process_for_entry(
     entry_id: str,
     req: Dict[str, int],
     session: Session = Depends(get_session),
@@ -415,12 +838,12 @@ def kill_process_for_entry(
 
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _kill_local_process(entry, pid)
-    return _proxy_request(entry, "POST", "/task/process/kill", json_body=req)
+        return await run_in_threadpool(_kill_local_process, entry, pid)
+    return await _proxy_request(entry, "POST", "/task/process/kill", json_body=req)
 
 
 @router.post("/{entry_id}/task/{task_id}/associate")
-def associate_process_for_entry(
+async def associate_process_for_entry(
     entry_id: str,
     task_id: str,
     req: Dict[str, int],
@@ -433,5 +856,5 @@ def associate_process_for_entry(
 
     entry = _get_entry_or_404(session, current_user, entry_id)
     if entry.mode == "local":
-        return _associate_local_process(session, entry, task_id, pid)
-    return _proxy_request(entry, "POST", f"/task/{task_id}/associate", json_body=req)
+        return await run_in_threadpool(_associate_local_process, session, entry, task_id, pid)
+    return await _proxy_request(entry, "POST", f"/task/{task_id}/associate", json_body=req)
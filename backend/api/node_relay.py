@@ -0,0 +1,334 @@
+import asyncio
+import json
+import random
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from backend.api.task_feed import TaskFeed
+from backend.api.websocket_manager import manager as ws_manager
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover - websockets is a declared dependency
+    websockets = None
+
+
+class _Resync(Exception):
+    """The upstream stream has a gap; reconnect to get a fresh snapshot."""
+
+
+def upstream_url(server_url: str, path: str = "/api/task/ws/tasks") -> str:
+    base = server_url.rstrip("/")
+    if base.startswith("https://"):
+        base = "wss://" + base[len("https://"):]
+    elif base.startswith("http://"):
+        base = "ws://" + base[len("http://"):]
+    return f"{base}{path}"
+
+
+def _open_upstream(connect: Optional[Callable[..., Any]], url: str, token: str):
+    if connect is not None:
+        return connect(url, token)
+    if websockets is None:
+        raise RuntimeError("websockets is required to relay remote nodes")
+    # The token travels as the subprotocol, which the node accepts and echoes
+    return websockets.connect(url, subprotocols=[token], open_timeout=10, ping_interval=20)
+
+
+def _retry_delay(min_backoff: float, max_backoff: float, failures: int) -> float:
+    delay = min(max_backoff, min_backoff * (2 ** min(failures, 16)))
+    return delay * random.uniform(0.5, 1.0)
+
+
+class _Upstream:
+    def __init__(self, entry_id: str, url: str, token: str):
+        self.entry_id = entry_id
+        self.url = url
+        self.token = token
+        self.feed = TaskFeed()
+        self.subscribers: Set[WebSocket] = set()
+        self.task: Optional[asyncio.Task] = None
+        # Last version seen from the remote feed, None until a snapshot arrives
+        self.version: Optional[int] = None
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+        self.connected = False
+        self.failures = 0
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+
+
+class NodeStatusRelay:
+    """
+    One upstream `/api/task/ws/tasks` connection per remote entry, shared by all
+    browsers watching that entry.
+
+    The remote feed is mirrored into a local TaskFeed, so browsers get the same
+    snapshot / patch / heartbeat messages as from a node directly, in room
+    `entry_tasks:{entry_id}`. The upstream opens with the first subscriber and
+    closes with the last one. It reconnects with exponential backoff. A patch
+    that does not follow the last version seen means messages were missed, so
+    the relay reconnects to get a fresh snapshot. The mirrored feed diffs that
+    snapshot against what browsers already have, so they only see a patch.
+    """
+
+    def __init__(
+        self,
+        manager,
+        connect: Optional[Callable[..., Any]] = None,
+        min_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        self.manager = manager
+        self.connect = connect
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.upstreams: Dict[str, _Upstream] = {}
+
+    @staticmethod
+    def room(entry_id: str) -> str:
+        return f"entry_tasks:{entry_id}"
+
+    async def subscribe(self, websocket: WebSocket, entry_id: str, server_url: str, token: str) -> None:
+        room = self.room(entry_id)
+        await self.manager.connect(websocket, room)
+
+        url = upstream_url(server_url)
+        upstream = self.upstreams.get(entry_id)
+        if upstream is not None and (upstream.url, upstream.token) != (url, token):
+            self._stop(upstream)
+            upstream = None
+        if upstream is None:
+            upstream = self.upstreams[entry_id] = _Upstream(entry_id, url, token)
+
+        upstream.subscribers.add(websocket)
+        upstream.feed.subscribe(websocket)
+        if upstream.task is None or upstream.task.done():
+            upstream.task = asyncio.create_task(self._run(upstream))
+        elif upstream.feed.version:
+            await upstream.feed.send_snapshot(self.manager, room, websocket)
+
+    def unsubscribe(self, websocket: WebSocket, entry_id: str) -> None:
+        self.manager.disconnect(websocket, self.room(entry_id))
+        upstream = self.upstreams.get(entry_id)
+        if upstream is None:
+            return
+        upstream.subscribers.discard(websocket)
+        upstream.feed.forget(websocket)
+        if not upstream.subscribers:
+            self._stop(upstream)
+
+    def _stop(self, upstream: _Upstream) -> None:
+        if self.upstreams.get(upstream.entry_id) is upstream:
+            del self.upstreams[upstream.entry_id]
+        if upstream.task is not None:
+            upstream.task.cancel()
+            upstream.task = None
+
+    async def close(self) -> None:
+        tasks = [u.task for u in self.upstreams.values() if u.task is not None]
+        for upstream in list(self.upstreams.values()):
+            self._stop(upstream)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, upstream: _Upstream) -> None:
+        while True:
+            try:
+                async with _open_upstream(self.connect, upstream.url, upstream.token) as ws:
+                    upstream.connected = True
+                    upstream.version = None
+                    async for raw in ws:
+                        await self._handle(upstream, raw)
+                upstream.last_error = "Upstream closed"
+            except asyncio.CancelledError:
+                upstream.connected = False
+                raise
+            except _Resync:
+                upstream.last_error = "Missed updates, resyncing"
+            except Exception as e:
+                upstream.last_error = str(e) or e.__class__.__name__
+                upstream.failures += 1
+
+            upstream.connected = False
+            upstream.reconnects += 1
+            delay = _retry_delay(self.min_backoff, self.max_backoff, upstream.failures)
+            print(f"Task relay for entry {upstream.entry_id}: {upstream.last_error}; reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _handle(self, upstream: _Upstream, raw: Any) -> None:
+        message = json.loads(raw)
+        kind = message.get("type")
+        version = message.get("version")
+
+        if kind == "snapshot":
+            tasks = message.get("tasks") or []
+            upstream.tasks = {str(t["id"]): t for t in tasks}
+            upstream.order = list(upstream.tasks)
+            upstream.failures = 0
+        elif kind == "patch":
+            if upstream.version is None or message.get("base_version") != upstream.version:
+                raise _Resync()
+            for task in (message.get("added") or []) + (message.get("changed") or []):
+                upstream.tasks[str(task["id"])] = task
+            for task_id in message.get("removed") or []:
+                upstream.tasks.pop(str(task_id), None)
+            order = message.get("order")
+            if order is not None:
+                upstream.order = [str(task_id) for task_id in order]
+            else:
+                upstream.order = [task_id for task_id in upstream.order if task_id in upstream.tasks]
+                upstream.order += [task_id for task_id in upstream.tasks if task_id not in upstream.order]
+        elif kind == "heartbeat":
+            if upstream.version is None:
+                return
+            if version != upstream.version:
+                raise _Resync()
+        else:
+            return
+
+        upstream.version = version
+        room = self.room(upstream.entry_id)
+        upstream.feed.update([upstream.tasks[task_id] for task_id in upstream.order if task_id in upstream.tasks])
+        await upstream.feed.publish(self.manager, room)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            entry_id: {
+                "connected": upstream.connected,
+                "subscribers": len(upstream.subscribers),
+                "version": upstream.feed.version,
+                "upstream_version": upstream.version,
+                "reconnects": upstream.reconnects,
+                "last_error": upstream.last_error,
+            }
+            for entry_id, upstream in self.upstreams.items()
+        }
+
+
+class _LogUpstream:
+    def __init__(self, entry_id: str, task_id: str, url: str, token: str):
+        self.entry_id = entry_id
+        self.task_id = task_id
+        self.url = url
+        self.token = token
+        self.viewers: Set[WebSocket] = set()
+        self.task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.failures = 0
+        self.reconnects = 0
+        self.frames = 0
+        self.last_error: Optional[str] = None
+
+
+class LogStreamRelay:
+    """
+    One upstream `/api/task/ws/logs/{task_id}` connection per (remote entry, task),
+    however many browsers view that log.
+
+    Upstream frames are forwarded as-is to room `entry_logs:{entry_id}:{task_id}`.
+    The upstream opens with the first viewer, closes with the last one and
+    reconnects with backoff in between. Lines written while it was down are not
+    replayed: viewers get {"type": "gap", "reason": ...} when the upstream is
+    lost and can backfill through `/logs?after=`.
+    """
+
+    def __init__(
+        self,
+        manager,
+        connect: Optional[Callable[..., Any]] = None,
+        min_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        self.manager = manager
+        self.connect = connect
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.upstreams: Dict[Tuple[str, str], _LogUpstream] = {}
+
+    @staticmethod
+    def room(entry_id: str, task_id: str) -> str:
+        return f"entry_logs:{entry_id}:{task_id}"
+
+    async def subscribe(self, websocket: WebSocket, entry_id: str, task_id: str, server_url: str, token: str) -> None:
+        await self.manager.connect(websocket, self.room(entry_id, task_id))
+
+        key = (entry_id, task_id)
+        url = upstream_url(server_url, f"/api/task/ws/logs/{task_id}")
+        upstream = self.upstreams.get(key)
+        if upstream is not None and (upstream.url, upstream.token) != (url, token):
+            self._stop(upstream)
+            upstream = None
+        if upstream is None:
+            upstream = self.upstreams[key] = _LogUpstream(entry_id, task_id, url, token)
+
+        upstream.viewers.add(websocket)
+        if upstream.task is None or upstream.task.done():
+            upstream.task = asyncio.create_task(self._run(upstream))
+
+    def unsubscribe(self, websocket: WebSocket, entry_id: str, task_id: str) -> None:
+        self.manager.disconnect(websocket, self.room(entry_id, task_id))
+        upstream = self.upstreams.get((entry_id, task_id))
+        if upstream is None:
+            return
+        upstream.viewers.discard(websocket)
+        if not upstream.viewers:
+            self._stop(upstream)
+
+    def _stop(self, upstream: _LogUpstream) -> None:
+        key = (upstream.entry_id, upstream.task_id)
+        if self.upstreams.get(key) is upstream:
+            del self.upstreams[key]
+        if upstream.task is not None:
+            upstream.task.cancel()
+            upstream.task = None
+
+    async def close(self) -> None:
+        tasks = [u.task for u in self.upstreams.values() if u.task is not None]
+        for upstream in list(self.upstreams.values()):
+            self._stop(upstream)
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, upstream: _LogUpstream) -> None:
+        room = self.room(upstream.entry_id, upstream.task_id)
+        while True:
+            try:
+                async with _open_upstream(self.connect, upstream.url, upstream.token) as ws:
+                    upstream.connected = True
+                    upstream.failures = 0
+                    async for raw in ws:
+                        upstream.frames += 1
+                        self.manager.broadcast_text(room, raw if isinstance(raw, str) else raw.decode("utf-8", "replace"))
+                upstream.last_error = "Upstream closed"
+            except asyncio.CancelledError:
+                upstream.connected = False
+                raise
+            except Exception as e:
+                upstream.last_error = str(e) or e.__class__.__name__
+                upstream.failures += 1
+
+            if upstream.connected:
+                self.manager.broadcast_text(room, json.dumps({"type": "gap", "reason": upstream.last_error}))
+            upstream.connected = False
+            upstream.reconnects += 1
+            delay = _retry_delay(self.min_backoff, self.max_backoff, upstream.failures)
+            print(f"Log relay for {upstream.entry_id}/{upstream.task_id}: {upstream.last_error}; reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            f"{entry_id}:{task_id}": {
+                "connected": upstream.connected,
+                "viewers": len(upstream.viewers),
+                "frames": upstream.frames,
+                "reconnects": upstream.reconnects,
+                "last_error": upstream.last_error,
+            }
+            for (entry_id, task_id), upstream in self.upstreams.items()
+        }
+
+
+node_relay = NodeStatusRelay(ws_manager)
+log_relay = LogStreamRelay(ws_manager)
@@ -22,6 +22,18 @@ from backend.schemas import (
     NoteBatchUpdateResponse,
 )
 from backend.core.auth import get_current_active_user
+from backend.core.note_cache import (
+    EdgeMeta,
+    NoteMeta,
+    fetch_note_metas,
+    load_edge_metas,
+    load_note_metas,
+    note_graphs,
+    note_list_rows,
+    select_note_metas,
+)
+from backend.core.note_columns import NoteColumns, compile_columnar_scan
+from backend.core.note_planner import NoteProgramPlan, plan_note_program
 from backend.core.note_walker import NoteGraphContext, NoteWalker
 import time
 import uuid
@@ -36,8 +48,8 @@ def _get_filtered_edge_pool(
     mode: str,
     user_id: int,
     session: Session
-) -> List[NoteEdge]:
-    edges = session.exec(select(NoteEdge).where(NoteEdge.user_id == user_id)).all()
+) -> List[EdgeMeta]:
+    edges = load_edge_metas(session, NoteEdge.user_id == user_id)
     if mode == "satellite":
         edges = [edge for edge in edges if edge.target_id != seed_note_id]
     return edges
@@ -48,9 +60,9 @@ def _get_component_note_ids(
     mode: str,
     user_id: int,
     session: Session
-) -> Tuple[set[str], List[NoteEdge]]:
+) -> Tuple[set[str], List[EdgeMeta]]:
     start_note = session.exec(
-        select(NoteNode).where(NoteNode.id == seed_note_id, NoteNode.user_id == user_id)
+        select(NoteNode.id).where(NoteNode.id == seed_note_id, NoteNode.user_id == user_id)
     ).first()
     if not start_note:
         raise HTTPException(status_code=404, detail="Note not found")
@@ -74,7 +86,7 @@ def _get_component_note_ids(
     return visited, edges
 
 
-def _get_rule_value(note: NoteNode, field: str):
+def _get_rule_value(note: NoteMeta, field: str):
     if field.startswith("custom_fields."):
         key = field.split(".", 1)[1]
         custom_fields = note.custom_fields or []
@@ -89,7 +101,7 @@ def _get_rule_value(note: NoteNode, field: str):
     return getattr(note, field, None)
 
 
-def _matches_rule(note: NoteNode, rule: NoteFilterRule) -> bool:
+def _matches_rule(note: NoteMeta, rule: NoteFilterRule) -> bool:
     field_value = _get_rule_value(note, rule.field)
     op = rule.op
 
@@ -159,8 +171,12 @@ def _apply_sql_rule(query, rule: NoteFilterRule):
     return query, False
 
 
-def _sort_notes(notes: List[NoteNode], order_by: str, order_desc: bool) -> List[NoteNode]:
-    sort_field = order_by if order_by in ALLOWED_ORDER_FIELDS else "updated_at"
+def _sort_field(order_by: str) -> str:
+    return order_by if order_by in ALLOWED_ORDER_FIELDS else "updated_at"
+
+
+def _sort_notes(notes: List[NoteMeta], order_by: str, order_desc: bool) -> List[NoteMeta]:
+    sort_field = _sort_field(order_by)
     return sorted(
         notes,
         key=lambda note: (_get_rule_value(note, sort_field) is None, _get_rule_value(note, sort_field)),
@@ -168,14 +184,6 @@ def _sort_notes(notes: List[NoteNode], order_by: str, order_desc: bool) -> List[
     )
 
 
-def _load_note_context(user_id: int, session: Session, *, include_edges: bool) -> NoteGraphContext:
-    notes = session.exec(select(NoteNode).where(NoteNode.user_id == user_id)).all()
-    edges = []
-    if include_edges:
-        edges = session.exec(select(NoteEdge).where(NoteEdge.user_id == user_id)).all()
-    return NoteGraphContext.from_items(notes, edges)
-
-
 def _apply_program_matcher(builder, matcher) -> None:
     if matcher.kind == "all":
         builder.all()
@@ -255,43 +263,91 @@ def _execute_note_program(
     user_id: int,
     session: Session,
 ):
-    need_edges = request.result.include_edges or request.executor.kind == "component"
-    context = _load_note_context(user_id, session, include_edges=need_edges)
-    walker = _build_program_walker(context, request)
-
-    if request.executor.kind == "scan":
-        walk_result = walker.collect_all(include_edges=request.result.include_edges)
-    elif request.executor.kind == "component":
-        if not request.executor.seed_ids:
-            raise HTTPException(status_code=400, detail="component executor requires seed_ids")
-        _ensure_seed_ids_exist(context, request.executor.seed_ids)
-        walk_result = walker.collect_component(
-            request.executor.seed_ids,
-            mode=request.executor.mode,
-            max_depth=request.executor.max_depth,
-            include_edges=request.result.include_edges,
-        )
-    else:
-        raise HTTPException(status_code=400, detail=f"Unsupported executor kind: {request.executor.kind}")
+    plan = plan_note_program(request)
+    columnar = compile_columnar_scan(request)
+    if columnar is not None:
+        # Evaluated on column arrays of the cached graph, no SQL prefilter needed
+        plan.use_columnar_engine()
+
+    # Runs against the cached graph of note metadata; history is read for the visible page only
+    with note_graphs.graph(session, user_id) as context:
+        if columnar is not None:
+            visible_nodes, total_nodes = columnar.run(
+                NoteColumns.of(context),
+                order_by=_sort_field(request.result.order_by),
+                order_desc=request.result.order_desc,
+                skip=request.result.skip,
+                limit=request.result.limit,
+            )
+            visible_edges = (
+                context.induced_edges(node.id for node in visible_nodes)
+                if request.result.include_edges else []
+            )
+            return _program_response(session, request, plan, visible_nodes, visible_edges, total_nodes)
+
+        candidate_ids: Optional[List[str]] = None
+        if plan.empty:
+            candidate_ids = []
+        elif plan.where is not None:
+            # Row scans first narrow the candidates with the SQL part of the select channel.
+            # Candidates keep the graph's order, so sort ties page as in unfiltered scans
+            candidates = set(session.exec(
+                select(NoteNode.id).where(NoteNode.user_id == user_id, plan.where)
+            ).all())
+            candidate_ids = [note.id for note in context.iter_notes() if note.id in candidates]
+
+        walker = _build_program_walker(context, request)
+
+        if request.executor.kind == "scan":
+            walk_result = walker.collect_all(candidate_ids, include_edges=request.result.include_edges)
+        elif request.executor.kind == "component":
+            if not request.executor.seed_ids:
+                raise HTTPException(status_code=400, detail="component executor requires seed_ids")
+            _ensure_seed_ids_exist(context, request.executor.seed_ids)
+            walk_result = walker.collect_component(
+                request.executor.seed_ids,
+                mode=request.executor.mode,
+                max_depth=request.executor.max_depth,
+                include_edges=request.result.include_edges,
+            )
+        else:
+            raise HTTPException(status_code=400, detail=f"Unsupported executor kind: {request.executor.kind}")
+
+        sorted_nodes = _sort_notes(walk_result.nodes, request.result.order_by, request.result.order_desc)
+        total_nodes = len(sorted_nodes)
+        visible_nodes = sorted_nodes[request.result.skip: request.result.skip + request.result.limit]
+        visible_ids = {node.id for node in visible_nodes}
+
+        if request.result.include_edges:
+            visible_edges = [
+                edge for edge in walk_result.edges
+                if edge.source_id in visible_ids and edge.target_id in visible_ids
+            ]
+        else:
+            visible_edges = []
 
-    sorted_nodes = _sort_notes(walk_result.nodes, request.result.order_by, request.result.order_desc)
-    total_nodes = len(sorted_nodes)
-    visible_nodes = sorted_nodes[request.result.skip: request.result.skip + request.result.limit]
-    visible_ids = {node.id for node in visible_nodes}
+    return _program_response(
+        session, request, plan, visible_nodes, visible_edges, total_nodes,
+        candidates=None if candidate_ids is None else len(candidate_ids),
+    )
 
-    if request.result.include_edges:
-        visible_edges = [
-            edge for edge in walk_result.edges
-            if edge.source_id in visible_ids and edge.target_id in visible_ids
-        ]
-    else:
-        visible_edges = []
 
+def _program_response(
+    session: Session,
+    request: NoteProgramRequest,
+    plan: NoteProgramPlan,
+    visible_nodes: List[NoteMeta],
+    visible_edges: List[EdgeMeta],
+    total_nodes: int,
+    *,
+    candidates: Optional[int] = None,
+):
     return {
-        "nodes": visible_nodes,
+        "nodes": note_list_rows(session, visible_nodes),
         "edges": visible_edges,
         "total_nodes": total_nodes,
         "total_edges": len(visible_edges),
+        "plan": plan.to_dict(candidates) if request.explain else None,
     }
 
 # --- Notes ---
@@ -312,7 +368,7 @@ def read_notes(
     Supports filtering by start_at (mapped from created_*) and update time range.
     Default limit is 128.
     """
-    query = select(NoteNode).where(NoteNode.user_id == current_user.id)
+    query = select_note_metas(NoteNode.user_id == current_user.id)
     
     # Apply Time Filters
     # Note: 'created_start/end' params now filter by 'start_at' field
@@ -330,8 +386,7 @@ def read_notes(
     query = query.order_by(NoteNode.updated_at.desc())
     
     statement = query.offset(skip).limit(limit)
-    notes = session.exec(statement).all()
-    return notes
+    return note_list_rows(session, fetch_note_metas(session, statement))
 
 
 @router.post("/query", response_model=NoteQueryResponse)
@@ -344,9 +399,10 @@ def query_notes(
     Query a reusable note set using a generic scope + rules model.
     """
     scope = request.scope
-    query = select(NoteNode).where(NoteNode.user_id == current_user.id)
+    # Content is never part of the response, and history only for the visible page
+    query = select_note_metas(NoteNode.user_id == current_user.id)
 
-    edge_pool: List[NoteEdge] = []
+    edge_pool: List[EdgeMeta] = []
     if scope.mode in {"planetary", "satellite"}:
         if not scope.seed_note_id:
             raise HTTPException(status_code=400, detail="seed_note_id is required for graph scopes")
@@ -366,7 +422,7 @@ def query_notes(
         if not handled:
             python_rules.append(rule)
 
-    candidate_notes = session.exec(query).all()
+    candidate_notes = fetch_note_metas(session, query)
     filtered_notes = [note for note in candidate_notes if all(_matches_rule(note, rule) for rule in python_rules)]
     sorted_notes = _sort_notes(filtered_notes, request.order_by, request.order_desc)
 
@@ -376,7 +432,7 @@ def query_notes(
 
     if request.include_edges:
         if not edge_pool:
-            edge_pool = session.exec(select(NoteEdge).where(NoteEdge.user_id == current_user.id)).all()
+            edge_pool = load_edge_metas(session, NoteEdge.user_id == current_user.id)
         visible_edges = [
             edge for edge in edge_pool
             if edge.source_id in visible_ids and edge.target_id in visible_ids
@@ -385,7 +441,7 @@ def query_notes(
         visible_edges = []
 
     return {
-        "nodes": visible_notes,
+        "nodes": note_list_rows(session, visible_notes),
         "edges": visible_edges,
         "total_nodes": total_nodes,
         "total_edges": len(visible_edges)
@@ -458,6 +514,7 @@ def batch_update_notes(
         session.commit()
         for note in updated_notes:
             session.refresh(note)
+            note_graphs.put_note(session, current_user.id, note)
 
     return {
         "updated_count": len(updated_notes),
@@ -494,6 +551,7 @@ def create_note(
     session.add(db_note)
     session.commit()
     session.refresh(db_note)
+    note_graphs.put_note(session, current_user.id, db_note)
     return db_note
 
 @router.get("/{note_id}", response_model=NoteRead)
@@ -541,7 +599,7 @@ def read_note(
     parent_nodes = []
     if parent_ids:
         parent_nodes = session.exec(
-            select(NoteNode).where(
+            select(NoteNode.custom_fields).where(
                 NoteNode.id.in_(parent_ids),
                 NoteNode.user_id == current_user.id
             )
@@ -557,18 +615,18 @@ def read_note(
     direct_parent_fields = {} # Key -> [Key, Type, Value]
     
     # Process Direct Parents first
-    for p_node in parent_nodes:
-        if p_node.custom_fields:
-            if isinstance(p_node.custom_fields, list):
-                for field_item in p_node.custom_fields:
+    for custom_fields in parent_nodes:
+        if custom_fields:
+            if isinstance(custom_fields, list):
+                for field_item in custom_fields:
                     # field_item is [key, type, value] or {"key":...} (if old format lingers?)
                     # We migrated, so assume list [k, t, v]
                     if isinstance(field_item, list) and len(field_item) >= 3:
                         k, t, v = field_item[0], field_item[1], field_item[2]
                         direct_parent_fields[k] = [k, t, v]
-            elif isinstance(p_node.custom_fields, dict):
+            elif isinstance(custom_fields, dict):
                 # Fallback for unmigrated (shouldn't happen if migration ran)
-                for k, v in p_node.custom_fields.items():
+                for k, v in custom_fields.items():
                     direct_parent_fields[k] = [k, "string", v]
     
     # Process Ancestors (BFS Upstream)
@@ -599,21 +657,21 @@ def read_note(
             if new_ancestor_ids:
                 # Fetch these ancestor nodes
                 ancestor_nodes = session.exec(
-                    select(NoteNode).where(
+                    select(NoteNode.custom_fields).where(
                         NoteNode.id.in_(new_ancestor_ids),
                         NoteNode.user_id == current_user.id
                     )
                 ).all()
                 
-                for anc_node in ancestor_nodes:
-                    if anc_node.custom_fields:
-                        if isinstance(anc_node.custom_fields, list):
-                            for field_item in anc_node.custom_fields:
+                for custom_fields in ancestor_nodes:
+                    if custom_fields:
+                        if isinstance(custom_fields, list):
+                            for field_item in custom_fields:
                                 if isinstance(field_item, list) and len(field_item) >= 3:
                                     k, t, v = field_item[0], field_item[1], field_item[2]
                                     ancestor_fields[k] = [k, t, v]
-                        elif isinstance(anc_node.custom_fields, dict):
-                            for k, v in anc_node.custom_fields.items():
+                        elif isinstance(custom_fields, dict):
+                            for k, v in custom_fields.items():
                                 ancestor_fields[k] = [k, "string", v]
                 
                 queue = new_ancestor_ids
@@ -668,14 +726,9 @@ def get_connected_component(
     mode='satellite': Ignore incoming edges to the center note (only outgoing).
     """
     note_ids, edges = _get_component_note_ids(note_id, mode, current_user.id, session)
-    nodes = session.exec(
-        select(NoteNode).where(
-            NoteNode.user_id == current_user.id,
-            NoteNode.id.in_(note_ids)
-        )
-    ).all()
+    nodes = load_note_metas(session, NoteNode.user_id == current_user.id, NoteNode.id.in_(note_ids))
     component_edges = [edge for edge in edges if edge.source_id in note_ids and edge.target_id in note_ids]
-    return {"nodes": nodes, "edges": component_edges}
+    return {"nodes": note_list_rows(session, nodes), "edges": component_edges}
 
 @router.put("/{note_id}", response_model=NoteRead)
 def update_note(
@@ -757,6 +810,7 @@ def update_note(
     session.add(db_note)
     session.commit()
     session.refresh(db_note)
+    note_graphs.put_note(session, current_user.id, db_note)
     return db_note
 
 @router.delete("/{note_id}")
@@ -775,6 +829,7 @@ def delete_note(
     
     session.delete(db_note)
     session.commit()
+    note_graphs.remove_note(session, current_user.id, note_id)
     return {"ok": True}
 
 # --- Edges ---
@@ -802,8 +857,8 @@ def create_edge(
     Idempotent: If edge exists, return existing one (or update timestamp).
     """
     # Verify nodes exist and belong to user
-    source = session.exec(select(NoteNode).where(NoteNode.id == edge.source_id, NoteNode.user_id == current_user.id)).first()
-    target = session.exec(select(NoteNode).where(NoteNode.id == edge.target_id, NoteNode.user_id == current_user.id)).first()
+    source = session.exec(select(NoteNode.id).where(NoteNode.id == edge.source_id, NoteNode.user_id == current_user.id)).first()
+    target = session.exec(select(NoteNode.id).where(NoteNode.id == edge.target_id, NoteNode.user_id == current_user.id)).first()
     
     if not source or not target:
         raise HTTPException(status_code=404, detail="Source or Target node not found")
@@ -828,6 +883,7 @@ def create_edge(
             session.add(existing_edge)
             session.commit()
             session.refresh(existing_edge)
+            note_graphs.put_edge(session, current_user.id, existing_edge)
         return existing_edge
 
     db_edge = NoteEdge(
@@ -841,6 +897,7 @@ def create_edge(
     session.add(db_edge)
     session.commit()
     session.refresh(db_edge)
+    note_graphs.put_edge(session, current_user.id, db_edge)
     return db_edge
 
 @router.delete("/edges/")
@@ -865,10 +922,12 @@ def delete_edge_by_nodes(
         # Already deleted or never existed, return success
         return {"ok": True, "message": "Edge not found, treated as deleted"}
     
+    edge_ids = [edge.id for edge in db_edges]
     for edge in db_edges:
         session.delete(edge)
     
     session.commit()
+    note_graphs.remove_edges(session, current_user.id, edge_ids)
     return {"ok": True}
 
 @router.delete("/edges/{edge_id}")
@@ -889,4 +948,5 @@ def delete_edge(
     
     session.delete(db_edge)
     session.commit()
+    note_graphs.remove_edges(session, current_user.id, [edge_id])
     return {"ok": True}
@@ -0,0 +1,124 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import WebSocket
+
+
+def _dumps(message: Dict[str, Any]) -> str:
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class TaskFeed:
+    """
+    Versioned task list state for `task_list` subscribers.
+
+    Every change bumps `version`. Subscribers get a full snapshot when they connect
+    (or fall behind), then a patch from the version they have to the current one,
+    and a heartbeat when nothing changed. Each message is serialized once per version
+    and the same text is sent to every socket.
+
+    Messages:
+    - {"type": "snapshot", "version": v, "tasks": [...]}
+    - {"type": "patch", "base_version": b, "version": v,
+       "added": [...], "changed": [...], "removed": [ids], "order": [ids] | null}
+    - {"type": "heartbeat", "version": v}
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.tasks: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+        self._snapshot_text: Optional[str] = None
+        self._patch_text: Optional[str] = None
+        self._patch_base: Optional[int] = None
+        self._heartbeat_text: Optional[str] = None
+        self.cursors: Dict[WebSocket, Optional[int]] = {}
+
+    def update(self, tasks: List[Dict[str, Any]]) -> bool:
+        """Replace the current state with `tasks`; returns True when anything changed."""
+        new_tasks = {str(t["id"]): t for t in tasks}
+        new_order = list(new_tasks)
+
+        added = [t for task_id, t in new_tasks.items() if task_id not in self.tasks]
+        changed = [
+            t for task_id, t in new_tasks.items()
+            if task_id in self.tasks and self.tasks[task_id] != t
+        ]
+        removed = [task_id for task_id in self.order if task_id not in new_tasks]
+        order_changed = new_order != self.order
+
+        if self.version and not (added or changed or removed or order_changed):
+            return False
+
+        base_version = self.version
+        self.version += 1
+        self.tasks = new_tasks
+        self.order = new_order
+        self._snapshot_text = None
+        self._heartbeat_text = None
+        self._patch_base = base_version
+        self._patch_text = _dumps({
+            "type": "patch",
+            "base_version": base_version,
+            "version": self.version,
+            "added": added,
+            "changed": changed,
+            "removed": removed,
+            "order": new_order if order_changed else None,
+        })
+        return True
+
+    def snapshot_text(self) -> str:
+        if self._snapshot_text is None:
+            self._snapshot_text = _dumps({
+                "type": "snapshot",
+                "version": self.version,
+                "tasks": [self.tasks[task_id] for task_id in self.order],
+            })
+        return self._snapshot_text
+
+    def heartbeat_text(self) -> str:
+        if self._heartbeat_text is None:
+            self._heartbeat_text = _dumps({"type": "heartbeat", "version": self.version})
+        return self._heartbeat_text
+
+    def message_for(self, cursor: Optional[int]) -> str:
+        """The message that brings a subscriber at `cursor` up to date."""
+        if cursor == self.version:
+            return self.heartbeat_text()
+        if cursor is not None and cursor == self._patch_base:
+            return self._patch_text
+        return self.snapshot_text()
+
+    def subscribe(self, websocket: WebSocket) -> None:
+        self.cursors[websocket] = None
+
+    def forget(self, websocket: WebSocket) -> None:
+        self.cursors.pop(websocket, None)
+
+    async def publish(self, manager, room: str) -> None:
+        version = self.version
+        for websocket in list(manager.rooms.get(room, ())):
+            cursor = self.cursors.get(websocket)
+            if manager.has_pending(websocket, room):
+                # The room coalesces, so this send replaces the unsent message.
+                # A patch would leave a gap; resync with a snapshot instead.
+                if cursor == version:
+                    continue
+                text = self.snapshot_text()
+            else:
+                text = self.message_for(cursor)
+            sent = await manager.send_text(websocket, room, text)
+            if sent and websocket in self.cursors:
+                self.cursors[websocket] = version
+
+    async def send_snapshot(self, manager, room: str, websocket: WebSocket) -> None:
+        version = self.version
+        if not version:
+            return
+        sent = await manager.send_text(websocket, room, self.snapshot_text())
+        if sent and websocket in self.cursors:
+            self.cursors[websocket] = version
+
+
+task_feed = TaskFeed()
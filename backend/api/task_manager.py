@@ -1,39 +1,74 @@
+import random
 import subprocess
 import sys
 import time
 import uuid
+import re
 import shlex
 import socket
-from typing import List, Optional, Dict, Any
+from typing import Any, Dict, Iterator, List, Optional
 from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_MISSED
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from sqlalchemy import func as sa_func
+from sqlalchemy import select as sa_select
 from sqlmodel import Session, select
 
+from backend.api.task_feed import task_feed
 from backend.api.websocket_manager import manager as ws_manager
 from backend.core.auth import verify_api_token
 from backend.core.device import BaseDevice, device_manager, TaskStatus
+from backend.core.log_search import compile_query, to_ndjson
+from backend.core.settings import get_settings
+from backend.core.task_admission import AdmissionQueueFull, build_admission
 from backend.db import engine
 from backend.models import Task as TaskModel
+from backend.models import TaskRun as TaskRunModel
 
 import asyncio
 
 router = APIRouter()
 
 _status_broadcaster_task: Optional[asyncio.Task] = None
+_status_changed: Optional[asyncio.Event] = None
+
+def _log_broadcast_callback(loop, manager=ws_manager):
+    """LogBatcher callback that hands batches from the flusher thread to `loop`."""
+
+    def callback(task_id, lines, dropped):
+        # Nobody watching: nothing to send, but the batch counts as delivered
+        if not manager.has_watchers(f"task_logs:{task_id}"):
+            return True
+        # Not waited on, so disk writes never stall on the loop. Frames a slow
+        # watcher's queue drops are counted by broadcast_logs on the loop side
+        try:
+            asyncio.run_coroutine_threadsafe(manager.broadcast_logs(task_id, lines, dropped), loop)
+        except Exception:
+            return False
+        return True
+
+    return callback
 
 async def start_task_manager_services():
-    global _status_broadcaster_task
+    global _status_broadcaster_task, _status_changed
 
     if _status_broadcaster_task and not _status_broadcaster_task.done():
         return
 
     loop = asyncio.get_running_loop()
+    _status_changed = asyncio.Event()
+
+    thread_safe_log_callback = _log_broadcast_callback(loop)
 
-    def thread_safe_log_callback(task_id, line):
+    def thread_safe_status_callback(task_id):
+        task_manager.record_exit(task_id)
+        # Process exits are pushed by the ProcessSupervisor; wake the broadcaster early.
         try:
-            asyncio.run_coroutine_threadsafe(ws_manager.broadcast_log(task_id, line), loop)
+            loop.call_soon_threadsafe(_status_changed.set)
         except Exception:
             pass
 
@@ -42,6 +77,7 @@ async def start_task_manager_services():
         device = device_manager.get_device(local_id)
         if device:
             device.set_log_callback(thread_safe_log_callback)
+            device.set_status_callback(thread_safe_status_callback)
     except Exception:
         pass
 
@@ -53,6 +89,7 @@ async def stop_task_manager_services():
     if _status_broadcaster_task:
         _status_broadcaster_task.cancel()
         _status_broadcaster_task = None
+    task_manager.admission.close()
 
 async def status_broadcaster():
     while True:
@@ -61,11 +98,22 @@ async def status_broadcaster():
             if "task_list" in ws_manager.rooms and ws_manager.rooms["task_list"]:
                 await task_manager.broadcast_status()
             
-            await asyncio.sleep(2) # 2s interval
+            # 2s interval, or earlier when a tracked process exits
+            await _wait_for_status_change(2)
         except Exception as e:
             print(f"Broadcaster error: {e}")
             await asyncio.sleep(5)
 
+async def _wait_for_status_change(timeout: float):
+    if _status_changed is None:
+        await asyncio.sleep(timeout)
+        return
+    try:
+        await asyncio.wait_for(_status_changed.wait(), timeout=timeout)
+    except asyncio.TimeoutError:
+        pass
+    _status_changed.clear()
+
 # --- API Models ---
 
 class CreateTaskRequest(BaseModel):
@@ -76,6 +124,10 @@ class CreateTaskRequest(BaseModel):
     device_id: Optional[str] = Field(default_factory=socket.gethostname)
     schedule: Optional[str] = None
     timeout: Optional[int] = None
+    misfire_grace_time: Optional[int] = None
+    coalesce: bool = True
+    concurrency_group: Optional[str] = None
+    priority: int = 0
 
 class UpdateTaskRequest(BaseModel):
     name: Optional[str] = None
@@ -85,16 +137,46 @@ class UpdateTaskRequest(BaseModel):
     device_id: Optional[str] = None
     schedule: Optional[str] = None
     timeout: Optional[int] = None
+    misfire_grace_time: Optional[int] = None
+    coalesce: Optional[bool] = None
+    concurrency_group: Optional[str] = None  # "" clears the group
+    priority: Optional[int] = None
 
 # --- Manager ---
 
+def run_scheduled_task(task_id: str) -> Optional[str]:
+    """Scheduler job entry point. Module level so jobs can be stored in the database."""
+    return task_manager.run_scheduled(task_id)
+
+SCHEDULED_JOB_FUNC = f"{__name__}:run_scheduled_task"
+
+# Missed runs never started; order them by their scheduled time
+_run_time = sa_func.coalesce(TaskRunModel.started_at, TaskRunModel.scheduled_at)
+
 class TaskManager:
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
-        self.scheduler.start()
+        # Jobs live in the app database, so next fire times survive restarts and
+        # runs missed while the server was down are caught up (or recorded as missed)
+        self.jobstore = SQLAlchemyJobStore(engine=engine, tablename="apscheduler_jobs")
+        self.scheduler = BackgroundScheduler(
+            jobstores={"default": self.jobstore},
+            job_defaults={
+                "misfire_grace_time": self._misfire_grace(None),
+                "coalesce": True,
+                "max_instances": 1,
+            },
+        )
+        self.scheduler.add_listener(self._on_job_event, EVENT_JOB_EXECUTED | EVENT_JOB_MISSED)
+        # Caps concurrent local task processes; excess starts wait in a priority queue
+        self.admission = build_admission(is_running=self._process_running)
+        # The queue is in memory; starts still waiting at shutdown never ran
+        self._cancel_queued_runs(message="Server stopped before the start was admitted")
+        # Paused until stored jobs are reconciled with the task table
+        self.scheduler.start(paused=True)
         # Initial scan to sync state and restore timeouts
         self.scan_running_tasks(restore_timeouts=True)
         self.load_schedules()
+        self.scheduler.resume()
 
     def _get_local_device_id(self) -> str:
         return device_manager.get_local_device_id()
@@ -102,27 +184,188 @@ class TaskManager:
     def load_schedules(self):
         with Session(engine) as session:
             tasks = session.exec(select(TaskModel)).all()
-            for task in tasks:
-                if task.schedule:
-                    self.update_schedule(task.id, task.schedule)
+        scheduled = {task.id: task for task in tasks if task.schedule}
 
-    def update_schedule(self, task_id: str, cron_expression: Optional[str]):
-        # Remove existing job if any
-        if self.scheduler.get_job(task_id):
-            self.scheduler.remove_job(task_id)
-        
-        if cron_expression:
-            try:
-                self.scheduler.add_job(
-                    self.start_task, 
-                    CronTrigger.from_crontab(cron_expression), 
-                    id=task_id, 
-                    args=[task_id],
-                    replace_existing=True
-                )
-                print(f"Scheduled task {task_id} with cron: {cron_expression}")
-            except Exception as e:
-                print(f"Failed to schedule task {task_id}: {e}")
+        for job in self.scheduler.get_jobs():
+            if job.id not in scheduled:
+                job.remove()
+        for task in scheduled.values():
+            self.update_schedule(task.id, task.schedule, task.misfire_grace_time, task.coalesce)
+
+    @staticmethod
+    def _misfire_grace(misfire_grace_time: Optional[int]) -> Optional[int]:
+        if misfire_grace_time is None:
+            misfire_grace_time = get_settings().schedule_misfire_grace
+        # 0: run a missed job however late it is
+        return misfire_grace_time if misfire_grace_time > 0 else None
+
+    def update_schedule(
+        self,
+        task_id: str,
+        cron_expression: Optional[str],
+        misfire_grace_time: Optional[int] = None,
+        coalesce: bool = True,
+    ):
+        if not cron_expression:
+            if self.scheduler.get_job(task_id):
+                self.scheduler.remove_job(task_id)
+            return
+
+        try:
+            trigger = CronTrigger.from_crontab(cron_expression)
+        except Exception as e:
+            print(f"Failed to schedule task {task_id}: {e}")
+            return
+
+        grace = self._misfire_grace(misfire_grace_time)
+        job = self.scheduler.get_job(task_id)
+        if (
+            job is not None
+            and job.func_ref == SCHEDULED_JOB_FUNC
+            and str(job.trigger) == str(trigger)
+            and job.misfire_grace_time == grace
+            and job.coalesce == coalesce
+        ):
+            # Unchanged: keep the stored next fire time so missed runs are still seen
+            return
+
+        self.scheduler.add_job(
+            SCHEDULED_JOB_FUNC,
+            trigger,
+            id=task_id,
+            args=[task_id],
+            misfire_grace_time=grace,
+            coalesce=coalesce,
+            replace_existing=True,
+        )
+        print(f"Scheduled task {task_id} with cron: {cron_expression}")
+
+    def run_scheduled(self, task_id: str) -> Optional[str]:
+        try:
+            result = self.start_task(task_id, trigger="schedule")
+        except HTTPException as e:
+            print(f"Scheduled run of task {task_id} failed: {e.detail}")
+            return getattr(e, "run_id", None)
+        return result.get("run_id")
+
+    def _on_job_event(self, event):
+        scheduled_at = event.scheduled_run_time.timestamp() if event.scheduled_run_time else None
+        try:
+            with Session(engine) as session:
+                if event.code == EVENT_JOB_MISSED:
+                    self._add_run(session, TaskRunModel(
+                        task_id=event.job_id,
+                        trigger="schedule",
+                        scheduled_at=scheduled_at,
+                        status="missed",
+                        message="Missed its scheduled time (server down or busy past the misfire grace time)",
+                    ))
+                elif event.retval:
+                    run = session.get(TaskRunModel, event.retval)
+                    if run is not None:
+                        run.scheduled_at = scheduled_at
+                        session.add(run)
+                session.commit()
+        except Exception as e:
+            print(f"Failed to record scheduled run of task {event.job_id}: {e}")
+
+    def _add_run(self, session: Session, run: TaskRunModel) -> None:
+        session.add(run)
+        # Keep the most recent runs of the task only
+        keep = get_settings().task_run_history
+        stale = session.exec(
+            select(TaskRunModel.id)
+            .where(TaskRunModel.task_id == run.task_id)
+            .order_by(_run_time.desc())
+            .offset(keep)
+        ).all()
+        for run_id in stale:
+            if run_id != run.id:
+                session.delete(session.get(TaskRunModel, run_id))
+
+    def _process_running(self, task_id: str) -> bool:
+        device = device_manager.get_device(self._get_local_device_id())
+        return task_id in getattr(device, "processes", {})
+
+    def record_exit(self, task_id: str):
+        """Called from the device thread when a local task process stops."""
+        self.admission.release(task_id)
+        device = device_manager.get_device(self._get_local_device_id())
+        info = getattr(device, "last_run_info", {}).get(task_id) or {}
+        try:
+            self.finish_runs(
+                task_id,
+                exit_code=info.get("exit_code"),
+                finished_at=info.get("finished_at"),
+                stopped=bool(info.get("stopped")),
+            )
+        except Exception as e:
+            print(f"Failed to record exit of task {task_id}: {e}")
+
+    def finish_runs(
+        self,
+        task_id: str,
+        exit_code: Optional[int] = None,
+        finished_at: Optional[float] = None,
+        stopped: bool = False,
+    ):
+        """Close the open run records of a task once its process has exited."""
+        with Session(engine) as session:
+            runs = session.exec(
+                select(TaskRunModel).where(TaskRunModel.task_id == task_id, TaskRunModel.status == "running")
+            ).all()
+            for run in runs:
+                run.finished_at = finished_at or time.time()
+                run.exit_code = exit_code
+                if stopped:
+                    run.status = "stopped"
+                elif exit_code is None:
+                    run.status = "finished"
+                else:
+                    run.status = "succeeded" if exit_code == 0 else "failed"
+                session.add(run)
+            session.commit()
+
+    def list_runs(self, task_id: str, limit: int = 50) -> List[TaskRunModel]:
+        with Session(engine) as session:
+            return list(session.exec(
+                select(TaskRunModel)
+                .where(TaskRunModel.task_id == task_id)
+                .order_by(_run_time.desc())
+                .limit(limit)
+            ).all())
+
+    def upcoming_runs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Next fire times, read from the job store's indexed next_run_time column."""
+        jobs_t = self.jobstore.jobs_t
+        with engine.connect() as conn:
+            rows = conn.execute(
+                sa_select(jobs_t.c.id, jobs_t.c.next_run_time)
+                .where(jobs_t.c.next_run_time.isnot(None))
+                .order_by(jobs_t.c.next_run_time)
+                .limit(limit)
+            ).all()
+        if not rows:
+            return []
+
+        with Session(engine) as session:
+            tasks = {
+                task.id: task
+                for task in session.exec(select(TaskModel).where(TaskModel.id.in_([row[0] for row in rows]))).all()
+            }
+        upcoming = []
+        for job_id, next_run_time in rows:
+            task = tasks.get(job_id)
+            if task is None:
+                continue
+            upcoming.append({
+                "task_id": task.id,
+                "name": task.name,
+                "device_id": task.device_id,
+                "schedule": task.schedule,
+                "next_run_time": next_run_time,
+            })
+        return upcoming
 
     def scan_running_tasks(self, restore_timeouts: bool = False):
         # Scan local tasks
@@ -190,16 +433,11 @@ class TaskManager:
              stmt = select(TaskModel).order_by(TaskModel.order, TaskModel.created_at)
              tasks = session.exec(stmt).all()
         
-        results = []
-        for t in tasks:
-            status = self.get_task_status(t.id)
-            t_dict = t.model_dump()
-            t_dict["status"] = status.model_dump()
-            results.append(t_dict)
-            
-        await ws_manager.broadcast("task_list", results)
+        # Serialized once per change and shared by every subscriber
+        task_feed.update(self.tasks_with_status(tasks))
+        await task_feed.publish(ws_manager, "task_list")
 
-    def start_task(self, task_id: str):
+    def start_task(self, task_id: str, trigger: str = "manual"):
         with Session(engine) as session:
             task = session.get(TaskModel, task_id)
             if not task:
@@ -208,18 +446,98 @@ class TaskManager:
             # Assuming task is local for now, or check task.device_id
             target_device_id = task.device_id
             
+        now = time.time()
         device = device_manager.get_device(target_device_id)
         if not device:
-            raise HTTPException(status_code=500, detail=f"Device {target_device_id} unavailable")
-            
+            run = TaskRunModel(task_id=task_id, trigger=trigger, started_at=now, status="error")
+            run.message = f"Device {target_device_id} unavailable"
+            error = HTTPException(status_code=500, detail=run.message)
+            error.run_id = run.id
+            self._save_run(run)
+            raise error
+
+        run = TaskRunModel(task_id=task_id, trigger=trigger, queued_at=now, status="queued")
+        run_id = run.id
+        self._save_run(run)
+
+        jitter = get_settings().schedule_jitter
+        delay = random.uniform(0, jitter) if trigger == "schedule" and jitter > 0 else 0.0
+        try:
+            result = self.admission.submit(
+                task_id,
+                lambda: self._launch(device, task, run_id),
+                group=task.concurrency_group,
+                priority=task.priority or 0,
+                delay=delay,
+            )
+        except AdmissionQueueFull as e:
+            self._update_run(run_id, status="skipped", finished_at=now, message=str(e))
+            error = HTTPException(status_code=503, detail=str(e))
+            error.run_id = run_id
+            raise error
+
+        if result.get("status") == "already_queued":
+            self._update_run(run_id, status="skipped", finished_at=now, message="Already queued")
+        elif result.get("status") == "queued":
+            print(f"Task {task_id} queued at position {result.get('queue_position')}")
+        return {**result, "run_id": run_id}
+
+    def _launch(self, device: BaseDevice, task: TaskModel, run_id: str) -> Dict[str, Any]:
+        """Start an admitted task; runs on the caller's thread or the admission worker."""
+        started_at = time.time()
         try:
             # Pass command and env from DB
             result = device.start_task(task.id, task.command, task.cwd, env={}, timeout=task.timeout)
-            if result.get("status") == "already_running":
-                print(f"Task {task_id} skipped: already running (PID: {result.get('pid')})")
-            return result
         except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+            message = e.detail if isinstance(e, HTTPException) else str(e)
+            self._update_run(run_id, status="error", started_at=started_at, message=message)
+            error = e if isinstance(e, HTTPException) else HTTPException(status_code=500, detail=message)
+            error.run_id = run_id
+            raise error
+
+        changes = {"status": "running", "started_at": started_at, "pid": result.get("pid")}
+        if result.get("status") == "already_running":
+            print(f"Task {task.id} skipped: already running (PID: {result.get('pid')})")
+            changes.update(status="skipped", finished_at=started_at, message="Already running")
+        self._update_run(run_id, **changes)
+        return result
+
+    def _save_run(self, run: TaskRunModel) -> None:
+        task_id = run.task_id
+        try:
+            with Session(engine) as session:
+                self._add_run(session, run)
+                session.commit()
+        except Exception as e:
+            print(f"Failed to record run of task {task_id}: {e}")
+
+    def _update_run(self, run_id: str, **changes: Any) -> None:
+        try:
+            with Session(engine) as session:
+                run = session.get(TaskRunModel, run_id)
+                if run is None:
+                    return
+                for key, value in changes.items():
+                    setattr(run, key, value)
+                session.add(run)
+                session.commit()
+        except Exception as e:
+            print(f"Failed to update run {run_id}: {e}")
+
+    def _cancel_queued_runs(self, task_id: Optional[str] = None, message: str = "Cancelled while queued") -> None:
+        try:
+            with Session(engine) as session:
+                stmt = select(TaskRunModel).where(TaskRunModel.status == "queued")
+                if task_id is not None:
+                    stmt = stmt.where(TaskRunModel.task_id == task_id)
+                for run in session.exec(stmt).all():
+                    run.status = "cancelled"
+                    run.finished_at = time.time()
+                    run.message = message
+                    session.add(run)
+                session.commit()
+        except Exception as e:
+            print(f"Failed to cancel queued runs: {e}")
 
     def stop_task(self, task_id: str):
         with Session(engine) as session:
@@ -228,6 +546,10 @@ class TaskManager:
                  return {"status": "not_found"}
             target_device_id = task.device_id
 
+        if self.admission.cancel(task_id):
+            self._cancel_queued_runs(task_id)
+            return {"status": "dequeued"}
+
         device = device_manager.get_device(target_device_id)
         if not device:
              return {"status": "device_not_found"}
@@ -247,20 +569,93 @@ class TaskManager:
         device = device_manager.get_device(target_device_id)
         if not device:
             return TaskStatus(id=task_id, running=False, message="Device unavailable")
-        return device.get_task_status(task_id)
+        return self._with_queue_info({task_id: device.get_task_status(task_id)})[task_id]
+
+    def get_task_statuses(self, tasks: List[TaskModel]) -> Dict[str, TaskStatus]:
+        """Statuses for task rows the caller already has, one device call per device."""
+        by_device: Dict[str, List[str]] = {}
+        for task in tasks:
+            by_device.setdefault(task.device_id, []).append(task.id)
+
+        statuses: Dict[str, TaskStatus] = {}
+        for device_id, task_ids in by_device.items():
+            device = device_manager.get_device(device_id)
+            if not device:
+                for task_id in task_ids:
+                    statuses[task_id] = TaskStatus(id=task_id, running=False, message="Device unavailable")
+                continue
+            statuses.update(device.get_task_statuses(task_ids))
+        return self._with_queue_info(statuses)
+
+    def _with_queue_info(self, statuses: Dict[str, TaskStatus]) -> Dict[str, TaskStatus]:
+        for task_id, info in self.admission.queued_info(statuses).items():
+            statuses[task_id] = statuses[task_id].model_copy(update={
+                "queued": True,
+                "queue_position": info["queue_position"],
+                "queued_at": info["queued_at"],
+            })
+        return statuses
+
+    def tasks_with_status(self, tasks: List[TaskModel]) -> List[Dict[str, Any]]:
+        statuses = self.get_task_statuses(tasks)
+        results = []
+        for t in tasks:
+            t_dict = t.model_dump()
+            t_dict["status"] = statuses[t.id].model_dump()
+            results.append(t_dict)
+        return results
 
     def get_logs(self, task_id: str, lines: int = 50):
+        return self.read_logs(task_id, lines)["logs"]
+
+    def read_logs(self, task_id: str, lines: int = 50, before: Optional[int] = None, after: Optional[int] = None):
         with Session(engine) as session:
             task = session.get(TaskModel, task_id)
             if not task:
-                 return ["Task not found"]
+                 return {"logs": ["Task not found"]}
             target_device_id = task.device_id
 
         device = device_manager.get_device(target_device_id)
         if not device:
-            return ["Device unavailable"]
-        return device.get_logs(task_id, lines)
+            return {"logs": ["Device unavailable"]}
+        return device.read_logs(task_id, lines, before=before, after=after)
     
+    def list_log_runs(self, task_id: str) -> List[Dict[str, Any]]:
+        with Session(engine) as session:
+            task = session.get(TaskModel, task_id)
+            if not task:
+                 return []
+            target_device_id = task.device_id
+
+        device = device_manager.get_device(target_device_id)
+        if not device:
+            return []
+        return device.list_log_runs(task_id)
+
+    def read_run_logs(self, task_id: str, run: int, lines: int = 500) -> Optional[Dict[str, Any]]:
+        with Session(engine) as session:
+            task = session.get(TaskModel, task_id)
+            if not task:
+                 return None
+            target_device_id = task.device_id
+
+        device = device_manager.get_device(target_device_id)
+        if not device:
+            return None
+        return device.read_run_logs(task_id, run, lines)
+
+    def search_logs(self, task_id: str, pattern, **options) -> Iterator[Dict[str, Any]]:
+        with Session(engine) as session:
+            task = session.get(TaskModel, task_id)
+            if not task:
+                 return iter(())
+            target_device_id = task.device_id
+
+        device = device_manager.get_device(target_device_id)
+        if not device:
+            return iter(())
+        return device.search_logs(task_id, pattern, **options)
+
     def reorder_tasks(self, task_ids: List[str]):
         with Session(engine) as session:
             for idx, t_id in enumerate(task_ids):
@@ -355,14 +750,7 @@ def list_tasks(
         stmt = select(TaskModel).where(TaskModel.device_id == requesting_device_id).order_by(TaskModel.order, TaskModel.created_at)
         tasks = session.exec(stmt).all()
     
-    results = []
-    for t in tasks:
-        status = task_manager.get_task_status(t.id)
-        t_dict = t.model_dump()
-        t_dict["status"] = status.model_dump()
-        results.append(t_dict)
-        
-    return results
+    return task_manager.tasks_with_status(tasks)
 
 @router.get("/list")
 def list_tasks_deprecated(
@@ -394,6 +782,10 @@ def create_task(
             device_id=target_device_id,
             schedule=req.schedule,
             timeout=req.timeout,
+            misfire_grace_time=req.misfire_grace_time,
+            coalesce=req.coalesce,
+            concurrency_group=req.concurrency_group or None,
+            priority=req.priority,
             created_at=time.time(),
             order=next_order,
         )
@@ -402,7 +794,7 @@ def create_task(
         session.refresh(new_task)
         
     if req.schedule:
-        task_manager.update_schedule(new_task.id, req.schedule)
+        task_manager.update_schedule(new_task.id, req.schedule, new_task.misfire_grace_time, new_task.coalesce)
     
     task_manager.scan_running_tasks()
     return new_task
@@ -446,18 +838,41 @@ def update_task_route(task_id: str, req: UpdateTaskRequest, token_device: BaseDe
             if req.command is not None: task.command = req.command
             if req.cwd is not None: task.cwd = req.cwd
             if req.description is not None: task.description = req.description
-            if req.schedule is not None:
-                task.schedule = req.schedule
-                task_manager.update_schedule(task_id, req.schedule)
+            if req.schedule is not None: task.schedule = req.schedule
             if req.timeout is not None:
                 task.timeout = req.timeout
+            if req.misfire_grace_time is not None: task.misfire_grace_time = req.misfire_grace_time
+            if req.coalesce is not None: task.coalesce = req.coalesce
+            if req.concurrency_group is not None: task.concurrency_group = req.concurrency_group or None
+            if req.priority is not None: task.priority = req.priority
             
             session.add(task)
             session.commit()
             session.refresh(task)
+            if req.schedule is not None or req.misfire_grace_time is not None or req.coalesce is not None:
+                task_manager.update_schedule(task_id, task.schedule, task.misfire_grace_time, task.coalesce)
             return task
     raise HTTPException(status_code=404, detail="Task not found")
 
+@router.get("/schedule/upcoming")
+def upcoming_runs_route(limit: int = 20, token_device: BaseDevice = Depends(verify_api_token)):
+    """Scheduled tasks ordered by their next fire time."""
+    return {"upcoming": task_manager.upcoming_runs(min(max(limit, 1), 500))}
+
+@router.get("/admission/stats")
+def admission_stats_route(token_device: BaseDevice = Depends(verify_api_token)):
+    """Running slots, queue depth and start wait times of the local admission queue."""
+    return task_manager.admission.stats()
+
+@router.get("/{task_id}/history")
+def task_run_history_route(task_id: str, limit: int = 50, token_device: BaseDevice = Depends(verify_api_token)):
+    """Recent runs of a task: scheduled time, actual start time and result."""
+    with Session(engine) as session:
+        task = session.get(TaskModel, task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+    return {"runs": task_manager.list_runs(task_id, min(max(limit, 1), 500))}
+
 @router.post("/reorder")
 def reorder_tasks_route(task_ids: List[str], token_device: BaseDevice = Depends(verify_api_token)):
     task_manager.reorder_tasks(task_ids)
@@ -476,14 +891,86 @@ def get_task_details(task_id: str, token_device: BaseDevice = Depends(verify_api
     raise HTTPException(status_code=404, detail="Task not found")
 
 @router.get("/{task_id}/logs")
-def get_task_logs(task_id: str, n: int = 500, token_device: BaseDevice = Depends(verify_api_token)):
+def get_task_logs(
+    task_id: str,
+    n: int = 500,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    token_device: BaseDevice = Depends(verify_api_token),
+):
+    """
+    Last `n` log lines, or a page relative to a byte offset: `before` pages back
+    from a page's `start`, `after` pages forward from (or polls since) a page's `end`.
+    """
+    with Session(engine) as session:
+        task = session.get(TaskModel, task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+    return task_manager.read_logs(task_id, n, before=before, after=after)
+
+def compile_log_query(q: str, regex: bool, ignore_case: bool):
+    if not q:
+        raise HTTPException(status_code=400, detail="Query required")
+    try:
+        return compile_query(q, regex=regex, ignore_case=ignore_case)
+    except re.error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid regex: {e}")
+
+@router.get("/{task_id}/logs/search")
+def search_task_logs(
+    task_id: str,
+    q: str,
+    regex: bool = False,
+    ignore_case: bool = False,
+    context: int = 2,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 1000,
+    token_device: BaseDevice = Depends(verify_api_token),
+):
+    """
+    Search the current and rotated logs of a task. Streams NDJSON: one
+    {"type": "match"} object per matching line (with context lines), then a summary.
+    `since` / `until` are unix timestamps matched against run start/finish times.
+    """
+    with Session(engine) as session:
+        task = session.get(TaskModel, task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+    pattern = compile_log_query(q, regex, ignore_case)
+    records = task_manager.search_logs(
+        task_id,
+        pattern,
+        context=min(max(context, 0), 20),
+        since=since,
+        until=until,
+        limit=min(max(limit, 1), 10000),
+    )
+    return StreamingResponse(to_ndjson(records), media_type="application/x-ndjson")
+
+@router.get("/{task_id}/runs")
+def list_task_runs(task_id: str, token_device: BaseDevice = Depends(verify_api_token)):
+    """Runs recorded in the task log, including those in rotated segments."""
+    with Session(engine) as session:
+        task = session.get(TaskModel, task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+
+    return {"runs": task_manager.list_log_runs(task_id)}
+
+@router.get("/{task_id}/runs/{run}/logs")
+def get_task_run_logs(task_id: str, run: int, n: int = 500, token_device: BaseDevice = Depends(verify_api_token)):
     with Session(engine) as session:
         task = session.get(TaskModel, task_id)
         if not task:
             raise HTTPException(status_code=404, detail="Task not found")
 
-    logs = task_manager.get_logs(task_id, n)
-    return {"logs": logs}
+    result = task_manager.read_run_logs(task_id, run, n)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return result
 
 @router.get("/{task_id}/related_processes")
 def get_related_processes(task_id: str, token_device: BaseDevice = Depends(verify_api_token)):
@@ -520,8 +1007,17 @@ def associate_process_route(task_id: str, req: Dict[str, int], token_device: Bas
 
 # --- WebSocket Endpoint ---
 
+@router.get("/ws/stats")
+def websocket_stats(token_device: BaseDevice = Depends(verify_api_token)):
+    """Per-room send latency, drop and eviction counters."""
+    return ws_manager.stats()
+
 @router.websocket("/ws/logs/{task_id}")
 async def websocket_logs(websocket: WebSocket, task_id: str, token_device: BaseDevice = Depends(verify_api_token)):
+    await serve_task_logs(websocket, task_id)
+
+async def serve_task_logs(websocket: WebSocket, task_id: str):
+    """Stream live log batches of a task on this node to `websocket` until it disconnects."""
     room = f"task_logs:{task_id}"
     await ws_manager.connect(websocket, room)
     try:
@@ -535,10 +1031,23 @@ async def websocket_logs(websocket: WebSocket, task_id: str, token_device: BaseD
 
 @router.websocket("/ws/tasks")
 async def websocket_tasks(websocket: WebSocket, token_device: BaseDevice = Depends(verify_api_token)):
+    await serve_task_list(websocket)
+
+async def serve_task_list(websocket: WebSocket):
+    """Stream this node's task list feed to `websocket` until it disconnects."""
     room = "task_list"
     await ws_manager.connect(websocket, room)
+    task_feed.subscribe(websocket)
+    if task_feed.version:
+        await task_feed.send_snapshot(ws_manager, room, websocket)
+    elif _status_changed is not None:
+        # No state yet: have the broadcaster run now instead of at the next tick
+        _status_changed.set()
     try:
         while True:
             await websocket.receive_text()
     except WebSocketDisconnect:
+        pass
+    finally:
+        task_feed.forget(websocket)
         ws_manager.disconnect(websocket, room)
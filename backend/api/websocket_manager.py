@@ -1,19 +1,117 @@
 import asyncio
-from typing import List, Dict, Set
-from fastapi import WebSocket, WebSocketDisconnect
+import json
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+from fastapi import WebSocket
+
+from backend.core.settings import get_settings
+
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+# Rooms nobody is in any more whose stats are still reported, most recently emptied kept
+IDLE_ROOM_STATS = 64
+
+
+@dataclass(frozen=True)
+class RoomPolicy:
+    overflow: str = DROP_OLDEST
+    max_queue: int = 1000
+
+
+@dataclass
+class RoomStats:
+    sent: int = 0
+    dropped: int = 0
+    evicted: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "evicted": self.evicted,
+            "avg_latency_ms": round(self.latency_total / self.sent * 1000, 3) if self.sent else 0.0,
+            "max_latency_ms": round(self.latency_max * 1000, 3),
+        }
+
+
+class _Connection:
+    """Outbound queue and writer task for one socket in one room."""
+
+    def __init__(self, websocket: WebSocket, room: str, policy: RoomPolicy):
+        self.websocket = websocket
+        self.room = room
+        self.policy = policy
+        # (enqueued_at, text, weight); a log frame weighs the lines it stands for
+        self.queue: Deque[Tuple[float, str, int]] = deque()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+
+    def make_room(self) -> List[Tuple[float, str, int]]:
+        """Drop queued messages as the overflow policy says so one more fits; returns them."""
+        if self.policy.overflow == COALESCE:
+            dropped = list(self.queue)
+            self.queue.clear()
+            return dropped
+        if len(self.queue) >= self.policy.max_queue:
+            return [self.queue.popleft()]
+        return []
+
+    def push(self, text: str, weight: int = 1) -> None:
+        self.queue.append((time.monotonic(), text, weight))
+        self.ready.set()
+
 
 class ConnectionManager:
     """
     Manages WebSocket connections for real-time updates.
+
+    Every connection has its own bounded outbound queue drained by a writer task,
+    so a slow client only delays itself. On overflow, log rooms drop the oldest
+    message and the task list coalesces to the latest one. Sockets whose sends
+    fail or time out are evicted.
     """
-    def __init__(self):
-        # active_connections: List[WebSocket] = []
-        # We might want to group connections by type (e.g. task list watchers vs specific task log watchers)
-        # For now, simple broadcast for task list, and specific room for logs.
-        
+    def __init__(self, policies: Optional[Dict[str, RoomPolicy]] = None, send_timeout: Optional[float] = None):
+        settings = get_settings()
         # Room: "task_list" -> Set[WebSocket]
         # Room: "task_logs:{task_id}" -> Set[WebSocket]
+        # Room: "entry_tasks:{entry_id}" -> Set[WebSocket] (relayed from a remote node)
+        # Room: "entry_logs:{entry_id}:{task_id}" -> Set[WebSocket] (relayed from a remote node)
         self.rooms: Dict[str, Set[WebSocket]] = {}
+        # Policies are looked up by room name, then by the prefix before ':'
+        self.policies: Dict[str, RoomPolicy] = policies if policies is not None else {
+            "task_list": RoomPolicy(COALESCE, 1),
+            "entry_tasks": RoomPolicy(COALESCE, 1),
+            "task_logs": RoomPolicy(DROP_OLDEST, settings.ws_log_queue_size),
+            "entry_logs": RoomPolicy(DROP_OLDEST, settings.ws_log_queue_size),
+        }
+        self.send_timeout = settings.ws_send_timeout if send_timeout is None else send_timeout
+        self.connections: Dict[Tuple[int, str], _Connection] = {}
+        # Stats of rooms with sockets; emptied rooms move to the bounded idle map
+        self.room_stats: Dict[str, RoomStats] = {}
+        self.idle_room_stats: "OrderedDict[str, RoomStats]" = OrderedDict()
+
+    def policy_for(self, room: str) -> RoomPolicy:
+        if room in self.policies:
+            return self.policies[room]
+        return self.policies.get(room.split(":", 1)[0], RoomPolicy())
+
+    def _stats(self, room: str) -> RoomStats:
+        stats = self.room_stats.get(room)
+        if stats is None:
+            stats = self.room_stats[room] = self.idle_room_stats.pop(room, None) or RoomStats()
+        return stats
+
+    def _retire_stats(self, room: str) -> None:
+        stats = self.room_stats.pop(room, None)
+        if stats is None:
+            return
+        self.idle_room_stats[room] = stats
+        while len(self.idle_room_stats) > IDLE_ROOM_STATS:
+            self.idle_room_stats.popitem(last=False)
 
     async def connect(self, websocket: WebSocket, room: str):
         # Handle WebSocket Sub-Protocol negotiation (e.g. for token auth)
@@ -25,11 +123,21 @@ class ConnectionManager:
             await websocket.accept(subprotocol=selected)
         else:
             await websocket.accept()
-            
+
+        self.add(websocket, room)
+        print(f"Client connected to room: {room}. Total in room: {len(self.rooms[room])}")
+
+    def add(self, websocket: WebSocket, room: str):
+        """Join an already accepted socket to `room` and start its writer."""
         if room not in self.rooms:
             self.rooms[room] = set()
         self.rooms[room].add(websocket)
-        print(f"Client connected to room: {room}. Total in room: {len(self.rooms[room])}")
+
+        key = (id(websocket), room)
+        if key not in self.connections:
+            conn = _Connection(websocket, room, self.policy_for(room))
+            conn.writer = asyncio.create_task(self._writer(conn))
+            self.connections[key] = conn
 
     def disconnect(self, websocket: WebSocket, room: str):
         if room in self.rooms:
@@ -37,21 +145,99 @@ class ConnectionManager:
                 self.rooms[room].remove(websocket)
             if not self.rooms[room]:
                 del self.rooms[room]
+                self._retire_stats(room)
+
+        conn = self.connections.pop((id(websocket), room), None)
+        if conn is None:
+            return
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
         print(f"Client disconnected from room: {room}")
 
+    def has_pending(self, websocket: WebSocket, room: str) -> bool:
+        conn = self.connections.get((id(websocket), room))
+        return bool(conn and conn.queue)
+
+    def _make_room(self, conn: _Connection) -> int:
+        """Make room in a connection's queue; returns the weight of the messages dropped."""
+        dropped = conn.make_room()
+        if dropped:
+            self._stats(conn.room).dropped += len(dropped)
+        return sum(weight for _, _, weight in dropped)
+
+    def _enqueue(self, conn: _Connection, text: str) -> None:
+        self._make_room(conn)
+        conn.push(text)
+
+    def _room_connections(self, room: str) -> List[_Connection]:
+        connections = (self.connections.get((id(websocket), room)) for websocket in list(self.rooms.get(room, ())))
+        return [conn for conn in connections if conn is not None]
+
+    async def send_text(self, websocket: WebSocket, room: str, text: str) -> bool:
+        """Queue pre-serialized text for one connection; False if it is not in the room."""
+        conn = self.connections.get((id(websocket), room))
+        if conn is None:
+            return False
+        self._enqueue(conn, text)
+        return True
+
     async def broadcast(self, room: str, message: dict):
-        if room in self.rooms:
-            # Create a list copy to avoid "Set changed size during iteration"
-            for connection in list(self.rooms[room]):
-                try:
-                    await connection.send_json(message)
-                except Exception as e:
-                    print(f"Error broadcasting to {connection}: {e}")
-                    # Optionally remove dead connection here, but disconnect() should handle it via exception in endpoint
-    
-    async def broadcast_log(self, task_id: str, log_line: str):
-        """Helper to broadcast a new log line to watchers"""
+        self.broadcast_text(room, json.dumps(message, ensure_ascii=False, default=str))
+
+    def broadcast_text(self, room: str, text: str):
+        for conn in self._room_connections(room):
+            self._enqueue(conn, text)
+
+    async def _writer(self, conn: _Connection):
+        stats = self._stats(conn.room)
+        try:
+            while True:
+                await conn.ready.wait()
+                while conn.queue:
+                    enqueued_at, text, _ = conn.queue.popleft()
+                    await asyncio.wait_for(conn.websocket.send_text(text), timeout=self.send_timeout)
+                    latency = time.monotonic() - enqueued_at
+                    stats.sent += 1
+                    stats.latency_total += latency
+                    stats.latency_max = max(stats.latency_max, latency)
+                conn.ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Evicting WebSocket from room {conn.room}: {e!r}")
+            stats.evicted += 1
+            self.disconnect(conn.websocket, conn.room)
+            try:
+                await asyncio.wait_for(conn.websocket.close(), timeout=1)
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        rooms: Dict[str, Any] = {}
+        for room, stats in [*self.idle_room_stats.items(), *self.room_stats.items()]:
+            data = stats.to_dict()
+            data["connections"] = len(self.rooms.get(room, ()))
+            data["queued"] = sum(len(c.queue) for c in self.connections.values() if c.room == room)
+            rooms[room] = data
+        return {"rooms": rooms}
+
+    def has_watchers(self, room: str) -> bool:
+        return bool(self.rooms.get(room))
+
+    async def broadcast_logs(self, task_id: str, lines: List[str], dropped: int = 0):
+        """
+        Helper to broadcast a batch of new log lines to watchers as one frame.
+
+        `dropped` is how many lines were missed before this batch. A watcher whose
+        queue is full loses its oldest frame; the lines that frame stood for are
+        added to `dropped` in the frame queued in its place, per watcher.
+        """
         room = f"task_logs:{task_id}"
-        await self.broadcast(room, {"type": "log", "data": log_line})
+        frames: Dict[int, str] = {}
+        for conn in self._room_connections(room):
+            missed = dropped + self._make_room(conn)
+            if missed not in frames:
+                frames[missed] = json.dumps({"type": "logs", "data": lines, "dropped": missed}, ensure_ascii=False, default=str)
+            conn.push(frames[missed], weight=len(lines) + missed)
 
 manager = ConnectionManager()
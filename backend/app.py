@@ -13,6 +13,7 @@ from backend.api.device_entries import router as device_entries_router
 from backend.api.device_control import router as device_control_router
 from backend.api.fanxiu import router as fanxiu_router
 from backend.api.filesystem import router as filesystem_router
+from backend.api.node_relay import log_relay, node_relay
 from backend.api.notes import router as notes_router
 from backend.api.task_manager import (
     router as task_router,
@@ -22,6 +23,7 @@ from backend.api.task_manager import (
 from backend.api.upload import router as upload_router
 from backend.core.bootstrap import ensure_bootstrap_admin
 from backend.core.auth import verify_api_token
+from backend.core.remote_clients import remote_clients
 from backend.core.settings import get_settings
 from backend.core.storage import (
     ATTACHMENTS_URL_PREFIX,
@@ -41,6 +43,9 @@ async def lifespan(app: FastAPI):
     init_storage_scheduler()
     yield
     await stop_task_manager_services()
+    await node_relay.close()
+    await log_relay.close()
+    await remote_clients.close()
 
 
 cors_kwargs = {
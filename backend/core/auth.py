@@ -1,14 +1,19 @@
-from fastapi import Depends, HTTPException, status, Header, Query
+from fastapi import Depends, HTTPException, status, Header, Query, WebSocketException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Optional, Tuple
 from sqlmodel import Session, select
-from backend.db import get_session
+from backend.db import engine, get_session
 from backend.models import User
 from backend.core.settings import get_settings
+import hashlib
+import hmac
 import secrets
+import threading
+import time
 # import backend.core.device as device_module # deferred to avoid cycle
 
 settings = get_settings()
@@ -41,12 +46,87 @@ def generate_token() -> str:
     """Generate a secure random token"""
     return secrets.token_urlsafe(32)
 
+def _extract_device_token(
+    authorization: Optional[str],
+    x_device_token: Optional[str],
+    token: Optional[str],
+    sec_websocket_protocol: Optional[str],
+) -> Optional[str]:
+    if x_device_token:
+        return x_device_token
+    if authorization and authorization.startswith("Bearer "):
+        return authorization.split(" ")[1]
+    if sec_websocket_protocol:
+        # Browser sends list of protocols, usually just the token in our case
+        # But it might be comma separated if multiple protocols
+        # We assume the token is one of them. 
+        # Since token is urlsafe base64, it should be safe in protocol string.
+        # Format usually: "token_value"
+        return sec_websocket_protocol.split(',')[0].strip()
+    if token:
+        return token
+    return None
+
+
+class DeviceTokenVerifier:
+    """
+    Verify device tokens against the local device's api_token.
+
+    Comparison is constant-time. Accept/reject decisions are kept in a small
+    TTL LRU keyed by the token digest, and the whole cache is dropped as soon
+    as the expected token (settings.device_token) changes.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._decisions: "OrderedDict[bytes, Tuple[bool, float]]" = OrderedDict()
+        self._expected_fingerprint: Optional[bytes] = None
+
+    @staticmethod
+    def _digest(value: str) -> bytes:
+        return hashlib.sha256(value.encode("utf-8")).digest()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._decisions.clear()
+            self._expected_fingerprint = None
+
+    def verify(self, candidate: str, expected: str) -> bool:
+        expected_fingerprint = self._digest(expected)
+        key = self._digest(candidate)
+        now = time.monotonic()
+
+        with self._lock:
+            if self._expected_fingerprint != expected_fingerprint:
+                self._decisions.clear()
+                self._expected_fingerprint = expected_fingerprint
+
+            cached = self._decisions.get(key)
+            if cached is not None and cached[1] > now:
+                self._decisions.move_to_end(key)
+                return cached[0]
+
+        accepted = hmac.compare_digest(key, expected_fingerprint)
+
+        with self._lock:
+            if self._expected_fingerprint == expected_fingerprint:
+                self._decisions[key] = (accepted, now + self.ttl)
+                self._decisions.move_to_end(key)
+                while len(self._decisions) > self.maxsize:
+                    self._decisions.popitem(last=False)
+        return accepted
+
+
+device_token_verifier = DeviceTokenVerifier()
+
+
 async def verify_api_token(
     authorization: Optional[str] = Header(None),
     x_device_token: Optional[str] = Header(None),
     token: Optional[str] = Query(None),
     sec_websocket_protocol: Optional[str] = Header(None),
-    session: Session = Depends(get_session)
 ):
     """
     Verify the token provided in the header or query parameter.
@@ -59,20 +139,7 @@ async def verify_api_token(
     This verifies if the request comes from a trusted device (using Master Token).
     Used for Server-side validation of incoming requests.
     """
-    final_token = None
-    if x_device_token:
-        final_token = x_device_token
-    elif authorization and authorization.startswith("Bearer "):
-        final_token = authorization.split(" ")[1]
-    elif sec_websocket_protocol:
-        # Browser sends list of protocols, usually just the token in our case
-        # But it might be comma separated if multiple protocols
-        # We assume the token is one of them. 
-        # Since token is urlsafe base64, it should be safe in protocol string.
-        # Format usually: "token_value"
-        final_token = sec_websocket_protocol.split(',')[0].strip()
-    elif token:
-        final_token = token
+    final_token = _extract_device_token(authorization, x_device_token, token, sec_websocket_protocol)
     
     if not final_token:
         # Fallback for now: If no token provided, return None or raise error depending on strictness
@@ -83,10 +150,9 @@ async def verify_api_token(
         )
     
     # Lazy import to avoid cycle
-    from backend.core.device import device_manager, get_device_id
+    from backend.core.device import device_manager
 
-    local_id = get_device_id()
-    local_dev = device_manager.get_device(local_id)
+    local_dev = device_manager.get_local_device()
 
     if not local_dev or not local_dev.api_token:
         raise HTTPException(
@@ -94,7 +160,7 @@ async def verify_api_token(
             detail="Device control is disabled on this node",
         )
 
-    if final_token == local_dev.api_token:
+    if device_token_verifier.verify(final_token, local_dev.api_token):
         return local_dev
 
     raise HTTPException(
@@ -102,14 +168,60 @@ async def verify_api_token(
         detail="Invalid authentication token",
     )
 
-async def get_current_user_from_token(
-    token: str = Depends(oauth2_scheme), 
-    session: Session = Depends(get_session)
-):
+class UserCache:
     """
-    Authenticate User via JWT.
-    Used for frontend user sessions.
+    Bounded cache of JWT-authenticated users keyed by (username, token exp).
+
+    Entries never outlive the token they were resolved for, and are dropped
+    explicitly via `invalidate()` when a user is written through the
+    auth/bootstrap paths.
     """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Any], Tuple[User, float]]" = OrderedDict()
+
+    def get(self, username: str, exp: Any) -> Optional[User]:
+        key = (username, exp)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            user, expires_at = cached
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def put(self, username: str, exp: Any, user: User) -> None:
+        expires_at = time.time() + self.ttl
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+
+        # Keep a detached copy so the cached object never belongs to a request session.
+        detached = User(**user.model_dump())
+        with self._lock:
+            self._entries[(username, exp)] = (detached, expires_at)
+            self._entries.move_to_end((username, exp))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username: Optional[str] = None) -> None:
+        with self._lock:
+            if username is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == username]:
+                del self._entries[key]
+
+
+user_cache = UserCache()
+
+
+def _user_from_jwt(token: str, session: Session) -> User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -122,13 +234,49 @@ async def get_current_user_from_token(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
+
+    exp = payload.get("exp")
+    cached_user = user_cache.get(username, exp)
+    if cached_user is not None:
+        return cached_user
     
     statement = select(User).where(User.username == username)
     user = session.exec(statement).first()
     if user is None:
         raise credentials_exception
+    user_cache.put(username, exp, user)
     return user
 
+async def get_current_user_from_token(
+    token: str = Depends(oauth2_scheme), 
+    session: Session = Depends(get_session)
+):
+    """
+    Authenticate User via JWT.
+    Used for frontend user sessions.
+    """
+    return _user_from_jwt(token, session)
+
+async def get_current_user_from_websocket(
+    token: Optional[str] = Query(None),
+    sec_websocket_protocol: Optional[str] = Header(None),
+):
+    """
+    Authenticate a browser WebSocket via JWT.
+    Browsers cannot set headers on WebSockets, so the JWT comes as the
+    Sec-WebSocket-Protocol value (preferred) or the '?token=' query parameter.
+    The user is looked up in a short-lived session: a pooled connection held
+    for the life of the socket would starve the HTTP routes.
+    """
+    final_token = _extract_device_token(None, None, token, sec_websocket_protocol)
+    if not final_token:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Missing authentication token")
+    try:
+        with Session(engine) as session:
+            return _user_from_jwt(final_token, session)
+    except HTTPException:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Could not validate credentials")
+
 async def get_current_active_user(current_user: User = Depends(get_current_user_from_token)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -1,6 +1,6 @@
 from sqlmodel import Session, select
 
-from backend.core.auth import get_password_hash
+from backend.core.auth import get_password_hash, user_cache
 from backend.core.settings import get_settings
 from backend.db import engine
 from backend.models import User
@@ -43,3 +43,4 @@ def ensure_bootstrap_admin() -> None:
         if changed:
             session.add(user)
             session.commit()
+            user_cache.invalidate(username)
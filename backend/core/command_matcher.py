@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import shlex
+import sys
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+
+def split_command(command: str) -> List[str]:
+    """Split a task command the way it is compared against a process argv."""
+    try:
+        args = shlex.split(command, posix=(sys.platform != "win32"))
+    except Exception:
+        args = command.split()
+
+    # Windows/non-posix shlex keeps quotes, so we strip them
+    if sys.platform == "win32":
+        args = [arg.strip('"') for arg in args]
+    return args
+
+
+def is_python_executable(arg: str) -> bool:
+    return arg.startswith("python") or arg.endswith("python.exe") or arg.endswith("python")
+
+
+def _failure_table(pattern: Sequence[str]) -> Tuple[int, ...]:
+    table = [0] * len(pattern)
+    k = 0
+    for i in range(1, len(pattern)):
+        while k and pattern[i] != pattern[k]:
+            k = table[k - 1]
+        if pattern[i] == pattern[k]:
+            k += 1
+        table[i] = k
+    return tuple(table)
+
+
+class CommandMatcher:
+    """
+    A task command compiled once for matching against process cmdlines.
+
+    A cmdline matches when it is at least as long as the command and contains
+    its args as a contiguous run. For python commands the interpreter may differ
+    (`python` vs `/usr/bin/python3`), so only the args after it have to appear.
+
+    `required` holds the args every match contains, `anchor` the longest of them,
+    which is checked first to reject most processes without scanning.
+    """
+
+    __slots__ = ("command", "args", "required", "anchor", "_failure")
+
+    def __init__(self, command: str):
+        self.command = command
+        self.args: Tuple[str, ...] = tuple(split_command(command))
+
+        required = self.args
+        if len(required) > 1 and is_python_executable(required[0]):
+            required = required[1:]
+        self.required: Tuple[str, ...] = required
+        self.anchor: Optional[str] = max(required, key=len) if required else None
+        self._failure = _failure_table(required)
+
+    @classmethod
+    def compile(cls, command: str) -> "CommandMatcher":
+        return _compile(command)
+
+    def matches(self, cmdline: Optional[Sequence[str]]) -> bool:
+        if not self.required or not cmdline or len(cmdline) < len(self.args):
+            return False
+        if self.anchor not in cmdline:
+            return False
+
+        # KMP search for `required` as a contiguous run of cmdline
+        pattern = self.required
+        failure = self._failure
+        n = len(pattern)
+        k = 0
+        for arg in cmdline:
+            while k and arg != pattern[k]:
+                k = failure[k - 1]
+            if arg == pattern[k]:
+                k += 1
+                if k == n:
+                    return True
+        return False
+
+    def match_many(self, processes: Iterable) -> List:
+        """Processes (psutil.Process with `.info['cmdline']`) whose cmdline matches."""
+        results = []
+        for proc in processes:
+            info = getattr(proc, "info", None) or {}
+            if self.matches(info.get("cmdline")):
+                results.append(proc)
+        return results
+
+
+@lru_cache(maxsize=1024)
+def _compile(command: str) -> CommandMatcher:
+    return CommandMatcher(command)
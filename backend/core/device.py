@@ -11,8 +11,9 @@ import datetime
 import json
 import ctypes
 import hashlib
+import re
 from ctypes import wintypes
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, Iterator, List, Optional, Any, Callable
 from abc import ABC, abstractmethod
 from pydantic import BaseModel
 import asyncio
@@ -20,6 +21,13 @@ from sqlalchemy import text
 
 import uuid
 
+from backend.core.command_matcher import CommandMatcher
+from backend.core.log_batcher import LogBatchCallback, LogBatcher
+from backend.core.log_rotation import begin_run, finish_run, list_runs, read_run_logs, rotate_log
+from backend.core.log_search import search_logs
+from backend.core.log_store import LogPage, read_log_page
+from backend.core.process_snapshot import ProcessSnapshot, process_snapshots
+from backend.core.process_supervisor import ProcessExit, ProcessSupervisor
 from backend.core.settings import get_settings
 
 # --- Shared Constants (Consider moving to a config file) ---
@@ -319,6 +327,15 @@ def _persist_device_identity(
     seed_value: Optional[str],
     created_at_hint: Optional[float],
 ) -> None:
+    existing = _load_machine_identity()
+    if (
+        existing.get("device_id") == device_id
+        and existing.get("device_identity_source") == source
+        and int(existing.get("device_identity_version") or 0) == DEVICE_IDENTITY_VERSION
+    ):
+        # Identity unchanged, skip the rewrite.
+        return
+
     _save_machine_identity(
         device_id=device_id,
         source=source,
@@ -332,8 +349,8 @@ def get_device_token() -> Optional[str]:
     return token or None
 
 
-def get_device_id():
-    """Get the stable unique ID for this node and migrate legacy state if needed."""
+def _resolve_device_id() -> str:
+    """Resolve the stable unique ID for this node and migrate legacy state if needed."""
     config = get_local_config()
     current_id = _current_device_id_from_state(config)
     current_version = int(config.get("device_identity_version") or 0)
@@ -388,6 +405,66 @@ def get_device_id():
 
     return target_id
 
+
+def _file_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class DeviceIdentityService:
+    """
+    Resolve the local device id once and serve it from memory.
+
+    The identity file is only re-read when its mtime changes (external edit)
+    or when `refresh()` is called explicitly.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._device_id: Optional[str] = None
+        self._identity_path: Optional[str] = None
+        self._identity_mtime: Optional[int] = None
+
+    def _is_fresh(self) -> bool:
+        if self._device_id is None:
+            return False
+        if self._identity_path != MACHINE_IDENTITY_FILE:
+            return False
+        return _file_mtime(MACHINE_IDENTITY_FILE) == self._identity_mtime
+
+    def get(self) -> str:
+        if self._is_fresh():
+            return self._device_id
+        with self._lock:
+            if self._is_fresh():
+                return self._device_id
+            return self.refresh()
+
+    def refresh(self) -> str:
+        """Force a full resolution (legacy migration + persistence check)."""
+        with self._lock:
+            device_id = _resolve_device_id()
+            self._device_id = device_id
+            self._identity_path = MACHINE_IDENTITY_FILE
+            self._identity_mtime = _file_mtime(MACHINE_IDENTITY_FILE)
+            return device_id
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._device_id = None
+            self._identity_path = None
+            self._identity_mtime = None
+
+
+device_identity = DeviceIdentityService()
+
+
+def get_device_id():
+    """Get the stable unique ID for this node (cached, see DeviceIdentityService)."""
+    return device_identity.get()
+
 def get_system_id():
     return get_device_id()
 
@@ -399,45 +476,35 @@ class TaskStatus(BaseModel):
     finished_at: Optional[float] = None  # New field
     cpu_percent: Optional[float] = None
     memory_rss: Optional[int] = None  # bytes
+    exit_code: Optional[int] = None
     message: Optional[str] = None
+    # Waiting for a free slot in the admission queue
+    queued: bool = False
+    queue_position: Optional[int] = None
+    queued_at: Optional[float] = None
 
 def match_cmdline(target_cmd: str, proc_cmdline: List[str]) -> bool:
     """Logic to match a target command string against a process cmdline list"""
     try:
-        try:
-            target_args = shlex.split(target_cmd, posix=(sys.platform != 'win32'))
-        except:
-            target_args = target_cmd.split()
-        
-        # Windows/non-posix shlex keeps quotes, so we strip them
-        if sys.platform == 'win32':
-             target_args = [arg.strip('"') for arg in target_args]
-        
-        if not target_args:
-            return False
+        return CommandMatcher.compile(target_cmd).matches(proc_cmdline)
+    except Exception:
+        return False
 
-        n = len(target_args)
-        if len(proc_cmdline) < n:
-            return False
-            
-        for i in range(len(proc_cmdline) - n + 1):
-            sub = proc_cmdline[i:i+n]
-            if sub == target_args:
-                return True
-        
-        if target_args[0].startswith('python') or target_args[0].endswith('python.exe') or target_args[0].endswith('python'):
-             rest_target = target_args[1:]
-             if not rest_target:
-                 return False 
-             
-             n_rest = len(rest_target)
-             for i in range(len(proc_cmdline) - n_rest + 1):
-                 if proc_cmdline[i:i+n_rest] == rest_target:
-                     return True
+def find_matching_processes(command: str, snapshot: Optional[ProcessSnapshot] = None) -> List[psutil.Process]:
+    """
+    Processes in `snapshot` whose cmdline matches `command` (see CommandMatcher).
+    Only processes indexed under every required token are checked.
+    """
+    if snapshot is None:
+        snapshot = process_snapshots.get()
 
-        return False
+    try:
+        matcher = CommandMatcher.compile(command)
     except Exception:
-        return False
+        return []
+    if not matcher.required:
+        return []
+    return matcher.match_many(snapshot.with_all_tokens(matcher.required))
 
 def parse_cmdline(cmdline: str) -> List[str]:
     if sys.platform != 'win32':
@@ -468,15 +535,19 @@ class BaseDevice(ABC):
         self.python_exec = python_exec
         self.api_token = api_token
         self.order_index = order_index
-        self.log_callback: Optional[Callable[[str, str], None]] = None # task_id, line
+        self.log_callback: Optional[LogBatchCallback] = None # task_id, lines, dropped
+        self.status_callback: Optional[Callable[[str], None]] = None # task_id
 
     @property
     def id(self):
         return self.device_id
 
-    def set_log_callback(self, callback: Callable[[str, str], None]):
+    def set_log_callback(self, callback: LogBatchCallback):
         self.log_callback = callback
 
+    def set_status_callback(self, callback: Callable[[str], None]):
+        self.status_callback = callback
+
     @abstractmethod
     def start_task(self, task_id: str, command: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         pass
@@ -488,11 +559,31 @@ class BaseDevice(ABC):
     @abstractmethod
     def get_task_status(self, task_id: str) -> TaskStatus:
         pass
+
+    def get_task_statuses(self, task_ids: List[str]) -> Dict[str, TaskStatus]:
+        """Statuses for several tasks at once; devices override this to batch the work."""
+        return {task_id: self.get_task_status(task_id) for task_id in task_ids}
     
     @abstractmethod
     def get_logs(self, task_id: str, lines: int = 50) -> List[str]:
         pass
 
+    def read_logs(self, task_id: str, lines: int = 50, before: Optional[int] = None, after: Optional[int] = None) -> Dict[str, Any]:
+        """A page of log lines with byte-offset cursors; devices without an index only tail."""
+        return {"logs": self.get_logs(task_id, lines)}
+
+    def list_log_runs(self, task_id: str) -> List[Dict[str, Any]]:
+        """Runs recorded in the task's log manifest, oldest first."""
+        return []
+
+    def read_run_logs(self, task_id: str, run: int, lines: int = 500) -> Optional[Dict[str, Any]]:
+        """The last `lines` lines of one run, or None if the run is unknown."""
+        return None
+
+    def search_logs(self, task_id: str, pattern: "re.Pattern[bytes]", context: int = 0, since: Optional[float] = None, until: Optional[float] = None, limit: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream log matches (see backend.core.log_search); devices without log storage find nothing."""
+        yield {"type": "summary", "matches": 0, "truncated": False, "bytes_scanned": 0}
+
     @abstractmethod
     def find_related_processes(self, command: str) -> List[Dict[str, Any]]:
         pass
@@ -556,40 +647,59 @@ class LogManager:
             os.makedirs(log_dir)
         log_file_path = os.path.join(log_dir, f"{task_id}.log")
         
-        # Rotation logic
+        # Rotation logic: older runs move into compressed generations
         try:
-            if os.path.exists(log_file_path) and os.path.getsize(log_file_path) > 10 * 1024 * 1024:
-                backup_path = log_file_path + ".old"
-                if os.path.exists(backup_path):
-                    os.remove(backup_path)
-                os.rename(log_file_path, backup_path)
+            if os.path.exists(log_file_path) and os.path.getsize(log_file_path) > settings.log_rotate_bytes:
+                LogManager.rotate(log_file_path)
         except Exception as e:
             print(f"Log rotation failed: {e}")
             
         return log_file_path
 
     @staticmethod
-    def start_stream(task_id: str, process: subprocess.Popen, log_file_path: str, callback: Optional[Callable[[str, str], None]]):
+    def rotate(log_file_path: str) -> Optional[str]:
+        return rotate_log(log_file_path, settings.log_generations, settings.log_compression)
+
+    @staticmethod
+    def log_path(task_id: str) -> str:
+        return os.path.join(LOGS_DIR, f"{task_id}.log")
+
+    @staticmethod
+    def finish_run(task_id: str, finished_at: Optional[float] = None):
+        try:
+            finish_run(LogManager.log_path(task_id), finished_at)
+        except Exception as e:
+            print(f"Failed to record end of run for task {task_id}: {e}")
+
+    @staticmethod
+    def start_stream(task_id: str, process: subprocess.Popen, log_file_path: str, callback: Optional[LogBatchCallback]):
         def _stream():
             try:
-                # Open with 'a' (append) or 'w' (write)? 
-                # Original code used 'a'.
-                # But wait, we are creating a new file or appending?
-                # Usually we want to append if we rotated.
-                # But if it's a new run, we might want to truncate?
-                # The rotation logic handles keeping old logs.
-                # So 'a' is correct.
-                with open(log_file_path, 'a', encoding='utf-8') as f:
-                    # Write header
-                    # Actually header writing is done separately in original code.
-                    # I'll add a separate method for header writing if needed, or just let caller do it.
-                    # But wait, the original code writes header before starting process.
-                    # And then stream logs writes stdout.
-                    
-                    # We need to make sure process.stdout is not None
-                    if not process.stdout:
-                        return
+                # We need to make sure process.stdout is not None
+                if not process.stdout:
+                    return
+
+                def _rotate(f):
+                    # Long-running tasks rotate mid-run; the run continues in the new file
+                    f.close()
+                    try:
+                        LogManager.rotate(log_file_path)
+                    except Exception as e:
+                        print(f"Log rotation failed: {e}")
+                    return open(log_file_path, 'a', encoding='utf-8')
+
+                # Lines reach the file and the watchers in batches, not one by one
+                batcher = LogBatcher(
+                    task_id,
+                    open(log_file_path, 'a', encoding='utf-8'),
+                    callback,
+                    flush_interval=settings.log_flush_interval,
+                    batch_bytes=settings.log_batch_bytes,
+                    rotate=_rotate,
+                    rotate_bytes=settings.log_rotate_bytes,
+                ).start()
 
+                try:
                     for line in iter(process.stdout.readline, b''):
                         decoded_line = ''
                         try:
@@ -599,17 +709,13 @@ class LogManager:
                                 decoded_line = line.decode('gbk')
                             except:
                                 decoded_line = line.decode('utf-8', errors='replace')
-                        
-                        # Write to file
-                        f.write(decoded_line)
-                        f.flush()
-                        
-                        # Callback
-                        if callback:
-                            try:
-                                callback(task_id, decoded_line)
-                            except Exception as e:
-                                print(f"Log callback error: {e}")
+
+                        batcher.add(decoded_line)
+                finally:
+                    batcher.close()
+                    batcher.log_file.close()
+                    if batcher.dropped:
+                        print(f"Task {task_id}: {batcher.dropped} log lines were not delivered to busy watchers")
             except Exception as e:
                 print(f"Log streamer error for pid {process.pid}: {e}")
             finally:
@@ -681,7 +787,49 @@ class LocalDevice(BaseDevice):
         self.saved_pids: Dict[str, int] = {}
         self.last_run_info: Dict[str, Dict[str, Any]] = {} # Store finished_at, started_at for ended tasks
         self.lock = threading.RLock()
+        self.supervisor = ProcessSupervisor(self._on_process_exit)
         self.load_pids()
+
+    def _track_process(self, task_id: str, proc: psutil.Process, popen: Optional[subprocess.Popen] = None) -> bool:
+        """Register a running process for a task and subscribe to its exit."""
+        with self.lock:
+            self.processes[task_id] = proc
+            if self.supervisor.watch(task_id, proc, popen):
+                return True
+
+            # Already gone before we could watch it.
+            del self.processes[task_id]
+            self.last_run_info[task_id] = {
+                "started_at": None,
+                "finished_at": time.time(),
+            }
+            return False
+
+    def _on_process_exit(self, event: ProcessExit):
+        with self.lock:
+            proc = self.processes.get(event.key)
+            if proc is None or proc.pid != event.pid:
+                return
+
+            del self.processes[event.key]
+            self.last_run_info[event.key] = {
+                "started_at": event.started_at,
+                "finished_at": event.finished_at,
+                "exit_code": event.returncode,
+            }
+            if self.saved_pids.get(event.key) == event.pid:
+                del self.saved_pids[event.key]
+            self.save_pids()
+
+        LogManager.finish_run(event.key, event.finished_at)
+        self._notify_status(event.key)
+
+    def _notify_status(self, task_id: str):
+        if self.status_callback:
+            try:
+                self.status_callback(task_id)
+            except Exception as e:
+                print(f"Status callback error: {e}")
         
     def load_pids(self):
         from backend.models import TaskRuntime
@@ -772,31 +920,9 @@ class LocalDevice(BaseDevice):
         with self.lock:
             pids_changed = False
             
-            # 1. Clean up existing tracked processes
-            for tid, proc in list(self.processes.items()):
-                try:
-                    if not proc.is_running() or proc.status() == psutil.STATUS_ZOMBIE:
-                        # Process finished
-                        try:
-                            create_time = proc.create_time()
-                        except:
-                            create_time = None
-                        
-                        self.last_run_info[tid] = {
-                            "started_at": create_time,
-                            "finished_at": time.time()
-                        }
-                        del self.processes[tid]
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    # Process gone
-                    if tid in self.processes:
-                        # We might not have create_time if it's already gone
-                        self.last_run_info[tid] = {
-                            "started_at": None, # Cannot retrieve
-                            "finished_at": time.time()
-                        }
-                        del self.processes[tid]
-            
+            # 1. Tracked processes are kept up to date by the ProcessSupervisor,
+            #    so there is nothing to poll here.
+
             # 2. Try to restore from saved_pids
             for task in tasks_to_check:
                 t_id = str(task.id)
@@ -814,8 +940,7 @@ class LocalDevice(BaseDevice):
                              if cmd:
                                  try:
                                      p_cmd = proc.cmdline()
-                                     if match_cmdline(cmd, p_cmd):
-                                         self.processes[t_id] = proc
+                                     if match_cmdline(cmd, p_cmd) and self._track_process(t_id, proc):
                                          continue
                                  except (psutil.NoSuchProcess, psutil.AccessDenied):
                                      pass
@@ -832,18 +957,8 @@ class LocalDevice(BaseDevice):
             missing_tasks = [t for t in tasks_to_check if str(t.id) not in self.processes]
             
             if missing_tasks:
-                candidates = []
-                try:
-                    # Snapshot all system processes once
-                    for proc in psutil.process_iter(['pid', 'cmdline', 'create_time']):
-                        try:
-                            if proc.info['cmdline']:
-                                candidates.append(proc)
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
-                            continue
-                except Exception:
-                    pass
-                
+                # One shared, indexed snapshot of all system processes
+                snapshot = process_snapshots.get()
                 used_pids = set(p.pid for p in self.processes.values())
                 
                 for task in missing_tasks:
@@ -852,20 +967,17 @@ class LocalDevice(BaseDevice):
                     if not cmd:
                         continue
                         
-                    for proc in candidates:
+                    for proc in find_matching_processes(cmd, snapshot):
                         if proc.pid in used_pids:
                             continue
                             
-                        try:
-                            if match_cmdline(cmd, proc.info['cmdline']):
-                                # Found a match!
-                                self.processes[t_id] = proc
-                                self.saved_pids[t_id] = proc.pid
-                                used_pids.add(proc.pid)
-                                pids_changed = True
-                                break
-                        except (psutil.NoSuchProcess, psutil.AccessDenied):
+                        # Found a match!
+                        if not self._track_process(t_id, proc):
                             continue
+                        self.saved_pids[t_id] = proc.pid
+                        used_pids.add(proc.pid)
+                        pids_changed = True
+                        break
             
             if pids_changed:
                 self.save_pids()
@@ -895,7 +1007,13 @@ class LocalDevice(BaseDevice):
         # Simple heuristic: match executable name
         target_name = os.path.basename(target_exe_lower)
 
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time', 'memory_info', 'exe']):
+        # Only processes that can score: cmdline matches and executable name matches
+        snapshot = process_snapshots.get()
+        candidates = {proc.pid: proc for proc in find_matching_processes(command, snapshot)}
+        for proc in snapshot.with_name_containing(target_name):
+            candidates.setdefault(proc.pid, proc)
+
+        for proc in candidates.values():
             try:
                 p_name = proc.info['name'].lower() if proc.info['name'] else ''
                 p_cmd = proc.info['cmdline'] or []
@@ -957,8 +1075,8 @@ class LocalDevice(BaseDevice):
                         "exe": p_exe, # Return full path
                         "cmdline": ' '.join(p_cmd),
                         "cmd_args": ' '.join(p_cmd[1:]) if len(p_cmd) > 1 else '',
-                        "started_at": proc.info['create_time'],
-                        "memory_rss": proc.info['memory_info'].rss,
+                        "started_at": proc.info['create_time'] or 0,
+                        "memory_rss": proc.info['memory_info'].rss if proc.info['memory_info'] else None,
                         "score": score
                     })
 
@@ -977,6 +1095,7 @@ class LocalDevice(BaseDevice):
                 p.wait(timeout=2)
             except psutil.TimeoutExpired:
                 p.kill()
+            process_snapshots.invalidate()
             return True
         except psutil.NoSuchProcess:
             return True # Already gone
@@ -992,7 +1111,8 @@ class LocalDevice(BaseDevice):
                      return {"status": "error", "message": "Process not running"}
                 
                 # Update process map
-                self.processes[task_id] = proc
+                if not self._track_process(task_id, proc):
+                    return {"status": "error", "message": "Process not running"}
                 self.saved_pids[task_id] = pid
                 self.save_pids()
                 
@@ -1016,28 +1136,18 @@ class LocalDevice(BaseDevice):
                 return {"status": "error", "message": str(e)}
 
     def _ensure_not_running(self, task_id: str, command: str) -> Optional[Dict[str, Any]]:
-        # Check internal cache first
+        # Check internal cache first (kept current by the ProcessSupervisor)
         if task_id in self.processes:
-            proc = self.processes[task_id]
-            if proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE:
-                 return {"status": "already_running", "pid": proc.pid}
-            else:
-                del self.processes[task_id]
+            return {"status": "already_running", "pid": self.processes[task_id].pid}
 
-        # Double check: Scan actual processes just in case cache is stale (Lazy Loading scenario)
-        try:
-            for proc in psutil.process_iter(['pid', 'cmdline']):
-                try:
-                    cmdline = proc.info['cmdline']
-                    if not cmdline:
-                        continue
-                    if match_cmdline(command, cmdline):
-                         self.processes[task_id] = proc
-                         return {"status": "already_running", "pid": proc.pid}
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-        except Exception:
-            pass
+        # Double check: Scan actual processes just in case cache is stale (Lazy Loading scenario).
+        # The snapshot may be up to a TTL old, so confirm the match is still alive.
+        for proc in find_matching_processes(command):
+            try:
+                if proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE and self._track_process(task_id, proc):
+                    return {"status": "already_running", "pid": proc.pid}
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
         return None
 
     def start_task(self, task_id: str, command: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None, timeout: Optional[int] = None) -> Dict[str, Any]:
@@ -1070,8 +1180,10 @@ class LocalDevice(BaseDevice):
         
         actual_cwd = cwd if cwd and os.path.exists(cwd) else None
 
+        proc = None
         try:
-            # Write header
+            # Write header (and record where this run starts)
+            begin_run(log_file_path)
             with open(log_file_path, 'a', encoding='utf-8') as log_f:
                 log_f.write(f"\n--- Starting task at {datetime.datetime.now()} ---\n")
                 log_f.write(f"Command: {cmd_args}\n")
@@ -1092,12 +1204,14 @@ class LocalDevice(BaseDevice):
                 creationflags=creationflags,
                 close_fds=True
             )
+            process_snapshots.invalidate()
             
-            self.processes[task_id] = psutil.Process(proc.pid)
-            
-            # Save PID persistence
-            self.saved_pids[task_id] = proc.pid
-            self.save_pids()
+            with self.lock:
+                self._track_process(task_id, psutil.Process(proc.pid), popen=proc)
+
+                # Save PID persistence
+                self.saved_pids[task_id] = proc.pid
+                self.save_pids()
             
             # Start background threads
             LogManager.start_stream(task_id, proc, log_file_path, self.log_callback)
@@ -1106,10 +1220,19 @@ class LocalDevice(BaseDevice):
             return {"status": "started", "pid": proc.pid}
 
         except Exception as e:
+            if proc is None:
+                # The process never started; close the run recorded for it
+                LogManager.finish_run(task_id)
             error_msg = ErrorMapper.map_start_error(e, cmd_args, actual_cwd)
             raise Exception(error_msg)
 
     def stop_task(self, task_id: str) -> Dict[str, Any]:
+        result = self._stop_task(task_id)
+        if result.get("status") == "stopped":
+            self._notify_status(task_id)
+        return result
+
+    def _stop_task(self, task_id: str) -> Dict[str, Any]:
         with self.lock:
             if task_id not in self.processes:
                 # Clean up persistence if exists
@@ -1131,12 +1254,15 @@ class LocalDevice(BaseDevice):
                     proc.wait(timeout=2)
                 except psutil.TimeoutExpired:
                     proc.kill()
+                process_snapshots.invalidate()
                 
                 # Record completion info
                 self.last_run_info[task_id] = {
                     "started_at": create_time,
-                    "finished_at": time.time()
+                    "finished_at": time.time(),
+                    "stopped": True,
                 }
+                LogManager.finish_run(task_id, self.last_run_info[task_id]["finished_at"])
                 
                 del self.processes[task_id]
                 if task_id in self.saved_pids:
@@ -1154,63 +1280,73 @@ class LocalDevice(BaseDevice):
 
     def get_task_status(self, task_id: str) -> TaskStatus:
         with self.lock:
-            running = False
-            pid = None
-            started_at = None
-            cpu_percent = None
-            memory_rss = None
-            finished_at = None
-            
-            if task_id in self.processes:
-                proc = self.processes[task_id]
-                if proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE:
-                    running = True
-                    pid = proc.pid
-                    try:
-                        started_at = proc.create_time()
-                        cpu_percent = proc.cpu_percent(interval=None)
-                        memory_rss = proc.memory_info().rss
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
-                else:
-                    # Clean up if dead
-                    try:
-                        create_time = proc.create_time()
-                    except:
-                        create_time = None
-                    self.last_run_info[task_id] = {
-                        "started_at": create_time,
-                        "finished_at": time.time()
-                    }
-                    del self.processes[task_id]
-            
-            # If not running, check history
-            if not running and task_id in self.last_run_info:
-                info = self.last_run_info[task_id]
-                started_at = info.get("started_at")
-                finished_at = info.get("finished_at")
-
-            return TaskStatus(
-                id=task_id,
-                running=running, 
-                pid=pid, 
-                started_at=started_at,
-                finished_at=finished_at,
-                cpu_percent=cpu_percent,
-                memory_rss=memory_rss
-            )
+            return self._task_status_locked(task_id)
+
+    def get_task_statuses(self, task_ids: List[str]) -> Dict[str, TaskStatus]:
+        with self.lock:
+            return {task_id: self._task_status_locked(task_id) for task_id in task_ids}
+
+    def _task_status_locked(self, task_id: str) -> TaskStatus:
+        running = False
+        pid = None
+        started_at = None
+        cpu_percent = None
+        memory_rss = None
+        finished_at = None
+        exit_code = None
+        
+        # Liveness comes from the ProcessSupervisor; no psutil polling here.
+        if task_id in self.processes:
+            proc = self.processes[task_id]
+            running = True
+            pid = proc.pid
+            try:
+                with proc.oneshot():
+                    started_at = proc.create_time()
+                    cpu_percent = proc.cpu_percent(interval=None)
+                    memory_rss = proc.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        
+        # If not running, check history
+        if not running and task_id in self.last_run_info:
+            info = self.last_run_info[task_id]
+            started_at = info.get("started_at")
+            finished_at = info.get("finished_at")
+            exit_code = info.get("exit_code")
+
+        return TaskStatus(
+            id=task_id,
+            running=running, 
+            pid=pid, 
+            started_at=started_at,
+            finished_at=finished_at,
+            cpu_percent=cpu_percent,
+            memory_rss=memory_rss,
+            exit_code=exit_code,
+        )
 
     def get_logs(self, task_id: str, lines: int = 50) -> List[str]:
-        log_file_path = os.path.join(LOGS_DIR, f"{task_id}.log")
+        return self.read_logs(task_id, lines)["logs"]
+
+    def read_logs(self, task_id: str, lines: int = 50, before: Optional[int] = None, after: Optional[int] = None) -> Dict[str, Any]:
+        log_file_path = LogManager.log_path(task_id)
         if not os.path.exists(log_file_path):
-            return []
-        
+            return LogPage().to_dict()
+
         try:
-            from collections import deque
-            with open(log_file_path, 'r', encoding='utf-8', errors='replace') as f:
-                return list(deque(f, maxlen=lines))
+            return read_log_page(log_file_path, lines, before=before, after=after).to_dict()
         except Exception as e:
-            return [f"Error reading logs: {e}"]
+            return {"logs": [f"Error reading logs: {e}"]}
+
+    def list_log_runs(self, task_id: str) -> List[Dict[str, Any]]:
+        return list_runs(LogManager.log_path(task_id))
+
+    def read_run_logs(self, task_id: str, run: int, lines: int = 500) -> Optional[Dict[str, Any]]:
+        return read_run_logs(LogManager.log_path(task_id), run, lines)
+
+    def search_logs(self, task_id: str, pattern: "re.Pattern[bytes]", context: int = 0, since: Optional[float] = None, until: Optional[float] = None, limit: int = 1000) -> Iterator[Dict[str, Any]]:
+        return search_logs(LogManager.log_path(task_id), pattern, context=context, since=since, until=until, limit=limit)
 
     def rename_device(self, new_name: str) -> bool:
         with self.lock:
@@ -1257,6 +1393,16 @@ class DeviceManager:
     def get_local_device_id(self) -> str:
         return get_device_id()
 
+    def refresh_identity(self) -> str:
+        """Re-resolve the local identity and reload the local device if it moved."""
+        device_id = device_identity.refresh()
+        if device_id not in self.devices:
+            self.load()
+        return device_id
+
+    def get_local_device(self) -> Optional[BaseDevice]:
+        return self.devices.get(get_device_id())
+
     def get_device(self, device_id: str) -> Optional[BaseDevice]:
         local_device_id = get_device_id()
         if device_id == local_device_id or device_id == "local":
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable, List, Optional, TextIO
+
+# callback(task_id, lines, dropped) -> False when watchers are busy and the batch was not taken
+LogBatchCallback = Callable[[str, List[str], int], Optional[bool]]
+
+
+class LogBatcher:
+    """
+    Buffer decoded log lines and flush them as batches.
+
+    The reader thread calls `add()` for each line; a flusher thread writes the batch
+    to the log file with one write and hands it to the callback as one frame, every
+    `flush_interval` seconds or as soon as `batch_bytes` are buffered.
+
+    - Disk never loses lines: once `max_buffer_bytes` are pending, `add()` blocks,
+      which pushes back on the process through its stdout pipe.
+    - With `rotate`, the file is handed over for rotation between batches once it
+      reaches `rotate_bytes`, so long-running tasks rotate without a restart.
+    - Watchers may: when the callback returns False the batch is dropped for them
+      and counted; the next delivered frame reports how many lines were missed.
+    """
+
+    def __init__(
+        self,
+        task_id: str,
+        log_file: TextIO,
+        callback: Optional[LogBatchCallback],
+        flush_interval: float = 0.05,
+        batch_bytes: int = 64 * 1024,
+        max_buffer_bytes: Optional[int] = None,
+        rotate: Optional[Callable[[TextIO], TextIO]] = None,
+        rotate_bytes: Optional[int] = None,
+    ):
+        self.task_id = task_id
+        self.log_file = log_file
+        self.callback = callback
+        self.flush_interval = flush_interval
+        self.batch_bytes = batch_bytes
+        self.max_buffer_bytes = max_buffer_bytes or batch_bytes * 16
+        # rotate(old_file) -> new_file, called once the file reaches rotate_bytes
+        self.rotate = rotate
+        self.rotate_bytes = rotate_bytes
+        self.dropped = 0
+        self.batches = 0
+        self._missed = 0
+        self._cond = threading.Condition()
+        self._lines: List[str] = []
+        self._bytes = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LogBatcher":
+        self._thread = threading.Thread(target=self._run, name=f"log-batcher-{self.task_id}", daemon=True)
+        self._thread.start()
+        return self
+
+    def add(self, line: str) -> None:
+        with self._cond:
+            while self._bytes >= self.max_buffer_bytes and not self._closed:
+                self._cond.wait()
+            self._lines.append(line)
+            self._bytes += len(line)
+            if len(self._lines) == 1 or self._bytes >= self.batch_bytes:
+                self._cond.notify_all()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Flush what is left and stop the flusher thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _take_batch(self) -> tuple[List[str], bool]:
+        with self._cond:
+            if not self._lines and not self._closed:
+                self._cond.wait()
+            if self._lines and self._bytes < self.batch_bytes and not self._closed:
+                # Give the batch up to one interval to fill
+                deadline = time.monotonic() + self.flush_interval
+                while self._bytes < self.batch_bytes and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            batch, self._lines, self._bytes = self._lines, [], 0
+            self._cond.notify_all()
+            return batch, self._closed
+
+    def _run(self) -> None:
+        while True:
+            batch, closed = self._take_batch()
+            if batch:
+                self._flush(batch)
+            if closed and not batch:
+                return
+
+    def _flush(self, batch: List[str]) -> None:
+        try:
+            self.log_file.write("".join(batch))
+            self.log_file.flush()
+            if self.rotate and self.rotate_bytes and os.fstat(self.log_file.fileno()).st_size >= self.rotate_bytes:
+                self.log_file = self.rotate(self.log_file)
+        except Exception as e:
+            print(f"Log write error for task {self.task_id}: {e}")
+
+        self.batches += 1
+        if not self.callback:
+            return
+        try:
+            accepted = self.callback(self.task_id, batch, self._missed)
+        except Exception as e:
+            print(f"Log callback error: {e}")
+            accepted = False
+        if accepted is False:
+            self.dropped += len(batch)
+            self._missed += len(batch)
+        else:
+            self._missed = 0
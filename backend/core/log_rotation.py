@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import datetime
+import gzip
+import io
+import json
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from typing import Any, BinaryIO, Dict, List, Optional
+
+from backend.core.log_store import INDEX_SUFFIX, decode_lines
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional compression backend
+    zstandard = None
+
+RUN_HEADER = b"--- Starting task at "
+MANIFEST_SUFFIX = ".runs.json"
+COMPRESSION_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+manifest_lock = threading.RLock()
+
+
+def resolve_compression(name: str) -> str:
+    name = (name or "gzip").strip().lower()
+    if name == "zstd" and zstandard is None:
+        return "gzip"
+    return name if name in COMPRESSION_EXTENSIONS else "gzip"
+
+
+def open_segment(path: str) -> BinaryIO:
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {os.path.basename(path)}")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return io.BufferedReader(reader)
+    return open(path, "rb")
+
+
+def _compress(src: str, dst: str, compression: str) -> None:
+    tmp = dst + ".tmp"
+    with open(src, "rb") as f_in:
+        if compression == "gzip":
+            with gzip.open(tmp, "wb", compresslevel=6) as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        elif compression == "zstd":
+            with open(tmp, "wb") as raw_out:
+                with zstandard.ZstdCompressor(level=3).stream_writer(raw_out) as f_out:
+                    shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+        else:
+            with open(tmp, "wb") as f_out:
+                shutil.copyfileobj(f_in, f_out, 1024 * 1024)
+    os.replace(tmp, dst)
+
+
+def _parse_header_time(line: bytes) -> Optional[float]:
+    text = line[len(RUN_HEADER):].decode("utf-8", errors="replace").strip().rstrip("-").strip()
+    try:
+        return datetime.datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        return None
+
+
+class RunManifest:
+    """
+    Segments and runs of one task log, stored as `<log>.runs.json`.
+
+    The live file is segment `current_seq`; rotated segments are
+    `<log>.<seq><ext>` and keep their seq forever. A run is located by the
+    segment and byte offset of its "--- Starting task" header and lasts until the
+    next run starts, possibly across rotated segments.
+    """
+
+    def __init__(self, log_path: str):
+        self.log_path = log_path
+        self.path = log_path + MANIFEST_SUFFIX
+        self.current_seq = 0
+        self.next_run = 1
+        self.segments: List[Dict[str, Any]] = []
+        self.runs: List[Dict[str, Any]] = []
+
+    @classmethod
+    def load(cls, log_path: str) -> "RunManifest":
+        manifest = cls(log_path)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            manifest.current_seq = int(data.get("current_seq", 0))
+            manifest.next_run = int(data.get("next_run", 1))
+            manifest.segments = list(data.get("segments", []))
+            manifest.runs = list(data.get("runs", []))
+        except FileNotFoundError:
+            manifest._scan_headers()
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Failed to load log manifest {manifest.path}: {e}")
+            manifest._scan_headers()
+        return manifest
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "current_seq": self.current_seq,
+                        "next_run": self.next_run,
+                        "segments": self.segments,
+                        "runs": self.runs,
+                    },
+                    f,
+                )
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Failed to save log manifest {self.path}: {e}")
+
+    def _scan_headers(self) -> None:
+        """Recover runs of a log written before manifests existed."""
+        if not os.path.exists(self.log_path):
+            return
+        offset = 0
+        with open(self.log_path, "rb") as f:
+            for line in f:
+                if line.startswith(RUN_HEADER):
+                    self._append_run(self.current_seq, offset, _parse_header_time(line))
+                offset += len(line)
+
+    def _append_run(self, seq: int, start: int, started_at: Optional[float]) -> Dict[str, Any]:
+        run = {"run": self.next_run, "seq": seq, "start": start, "started_at": started_at, "finished_at": None}
+        self.next_run += 1
+        self.runs.append(run)
+        return run
+
+    def segment_path(self, seq: int) -> Optional[str]:
+        if seq == self.current_seq:
+            return self.log_path
+        for segment in self.segments:
+            if segment["seq"] == seq:
+                return os.path.join(os.path.dirname(self.log_path), segment["file"])
+        return None
+
+    def get_run(self, run_no: int) -> Optional[Dict[str, Any]]:
+        for run in self.runs:
+            if run["run"] == run_no:
+                return run
+        return None
+
+    def run_end(self, run: Dict[str, Any]) -> Optional[tuple]:
+        """(seq, offset) where the next run starts, or None when it runs to the live EOF."""
+        idx = self.runs.index(run)
+        if idx + 1 < len(self.runs):
+            nxt = self.runs[idx + 1]
+            return nxt["seq"], nxt["start"]
+        return None
+
+
+def begin_run(log_path: str, started_at: Optional[float] = None) -> int:
+    """Record a run whose header is about to be appended to `log_path`."""
+    with manifest_lock:
+        manifest = RunManifest.load(log_path)
+        try:
+            size = os.path.getsize(log_path)
+        except OSError:
+            size = 0
+        # The header is written after a newline
+        start = size + 1
+        run = manifest._append_run(manifest.current_seq, start, started_at or time.time())
+        manifest.save()
+        return run["run"]
+
+
+def finish_run(log_path: str, finished_at: Optional[float] = None) -> None:
+    """Mark the latest run as finished."""
+    with manifest_lock:
+        if not os.path.exists(log_path + MANIFEST_SUFFIX):
+            return
+        manifest = RunManifest.load(log_path)
+        if manifest.runs and manifest.runs[-1].get("finished_at") is None:
+            manifest.runs[-1]["finished_at"] = finished_at or time.time()
+            manifest.save()
+
+
+def rotate_log(log_path: str, generations: int, compression: str = "gzip") -> Optional[str]:
+    """
+    Move the live log into a compressed segment and drop segments beyond
+    `generations`, along with their runs. Returns the new segment path.
+    """
+    with manifest_lock:
+        if not os.path.exists(log_path):
+            return None
+        manifest = RunManifest.load(log_path)
+        compression = resolve_compression(compression)
+        seq = manifest.current_seq
+        name = f"{os.path.basename(log_path)}.{seq}{COMPRESSION_EXTENSIONS[compression]}"
+        segment_path = os.path.join(os.path.dirname(log_path), name)
+
+        size = os.path.getsize(log_path)
+        _compress(log_path, segment_path, compression)
+        os.remove(log_path)
+        if os.path.exists(log_path + INDEX_SUFFIX):
+            os.remove(log_path + INDEX_SUFFIX)
+
+        manifest.segments.append({"seq": seq, "file": name, "size": size, "rotated_at": time.time()})
+        manifest.current_seq = seq + 1
+
+        keep = max(0, generations)
+        expired = manifest.segments[:-keep] if keep else list(manifest.segments)
+        manifest.segments = manifest.segments[len(expired):]
+        for segment in expired:
+            try:
+                os.remove(os.path.join(os.path.dirname(log_path), segment["file"]))
+            except OSError:
+                pass
+        live_seqs = {s["seq"] for s in manifest.segments} | {manifest.current_seq}
+        manifest.runs = [run for run in manifest.runs if run["seq"] in live_seqs]
+        manifest.save()
+        return segment_path
+
+
+def list_runs(log_path: str) -> List[Dict[str, Any]]:
+    with manifest_lock:
+        manifest = RunManifest.load(log_path)
+        runs = []
+        for run in manifest.runs:
+            info = dict(run)
+            if run["seq"] == manifest.current_seq:
+                info["segment"] = "current"
+            else:
+                path = manifest.segment_path(run["seq"])
+                info["segment"] = os.path.basename(path) if path else None
+            runs.append(info)
+        return runs
+
+
+def read_run_logs(log_path: str, run_no: int, lines: int = 500) -> Optional[Dict[str, Any]]:
+    """Last `lines` lines of run `run_no`, reading only the segments it spans."""
+    with manifest_lock:
+        manifest = RunManifest.load(log_path)
+        run = manifest.get_run(run_no)
+        if run is None:
+            return None
+        end = manifest.run_end(run)
+        seqs = [run["seq"]] + [s["seq"] for s in manifest.segments if s["seq"] > run["seq"]]
+        seqs.append(manifest.current_seq)
+        paths = []
+        for seq in sorted(set(seqs)):
+            if end is not None and seq > end[0]:
+                break
+            path = manifest.segment_path(seq)
+            if path:
+                paths.append((seq, path))
+
+    tail: deque = deque(maxlen=max(0, lines))
+    for seq, path in paths:
+        start = run["start"] if seq == run["seq"] else 0
+        stop = end[1] if end is not None and seq == end[0] else None
+        try:
+            with open_segment(path) as f:
+                _skip(f, start)
+                pos = start
+                for line in f:
+                    if stop is not None and pos >= stop:
+                        break
+                    if stop is not None and pos + len(line) > stop:
+                        line = line[: stop - pos]
+                    pos += len(line)
+                    tail.append(line)
+        except FileNotFoundError:
+            continue
+
+    return {
+        "run": run["run"],
+        "started_at": run.get("started_at"),
+        "finished_at": run.get("finished_at"),
+        "logs": [text for line in tail for text in decode_lines(line)],
+    }
+
+
+def _skip(f: BinaryIO, offset: int) -> None:
+    try:
+        f.seek(offset)
+    except (OSError, ValueError):
+        # Streams that cannot seek are read forward
+        remaining = offset
+        while remaining > 0:
+            chunk = f.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
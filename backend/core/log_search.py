@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import bisect
+import json
+import mmap
+import os
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from backend.core.log_rotation import RunManifest, manifest_lock, open_segment
+
+CHUNK_SIZE = 4 * 1024 * 1024
+MAX_LINE_CHARS = 4000
+
+
+def compile_query(query: str, regex: bool = False, ignore_case: bool = False) -> "re.Pattern[bytes]":
+    """Compile a search query to a bytes pattern; raises re.error for bad regexes."""
+    source = query if regex else re.escape(query)
+    flags = re.MULTILINE | (re.IGNORECASE if ignore_case else 0)
+    return re.compile(source.encode("utf-8"), flags)
+
+
+def to_ndjson(records: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _text(line: bytes) -> str:
+    text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+    return text[:MAX_LINE_CHARS]
+
+
+def _segment_chunks(path: str, start: int, stop: Optional[int]) -> Iterator[Tuple[int, bytes]]:
+    """
+    Yield (offset, bytes) chunks of whole lines in [start, stop).
+
+    Plain files are mapped with mmap; compressed segments are decompressed a chunk
+    at a time. Neither is loaded into memory as a whole.
+    """
+    if path.endswith((".gz", ".zst")):
+        with open_segment(path) as f:
+            yield from _stream_chunks(f, start, stop)
+        return
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        end = size if stop is None else min(stop, size)
+        if end <= start:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = start
+            while pos < end:
+                chunk_end = min(pos + CHUNK_SIZE, end)
+                if chunk_end < end:
+                    nl = mm.rfind(b"\n", pos, chunk_end)
+                    if nl >= pos:
+                        chunk_end = nl + 1
+                    else:
+                        # One very long line: extend to its end
+                        nl = mm.find(b"\n", chunk_end, end)
+                        chunk_end = end if nl < 0 else nl + 1
+                yield pos, mm[pos:chunk_end]
+                pos = chunk_end
+
+
+def _stream_chunks(f, start: int, stop: Optional[int]) -> Iterator[Tuple[int, bytes]]:
+    pos = 0
+    while pos < start:
+        skipped = f.read(min(CHUNK_SIZE, start - pos))
+        if not skipped:
+            return
+        pos += len(skipped)
+
+    carry = b""
+    carry_at = pos
+    while True:
+        limit = CHUNK_SIZE if stop is None else min(CHUNK_SIZE, stop - pos)
+        data = f.read(limit) if limit > 0 else b""
+        pos += len(data)
+        buf = carry + data
+        if not data:
+            if buf:
+                yield carry_at, buf
+            return
+        nl = buf.rfind(b"\n")
+        if nl < 0:
+            carry = buf
+            continue
+        yield carry_at, buf[: nl + 1]
+        carry = buf[nl + 1 :]
+        carry_at = pos - len(carry)
+
+
+class _Scanner:
+    """Regex matches with context lines over a sequence of whole-line chunks."""
+
+    def __init__(self, pattern: "re.Pattern[bytes]", context: int, segment: str, run_of):
+        self.pattern = pattern
+        self.context = context
+        self.segment = segment
+        self.run_of = run_of
+        self.previous: Deque[bytes] = deque(maxlen=context)
+        self.pending: List[Tuple[Dict[str, Any], int]] = []
+
+    def feed(self, base: int, chunk: bytes) -> Iterator[Dict[str, Any]]:
+        lines = chunk.splitlines(keepends=True)
+        starts = [0]
+        for line in lines[:-1]:
+            starts.append(starts[-1] + len(line))
+
+        # Matches waiting for after-context from this chunk
+        if self.pending:
+            still = []
+            for record, missing in self.pending:
+                take = lines[:missing]
+                record["after"].extend(_text(line) for line in take)
+                if len(take) < missing:
+                    still.append((record, missing - len(take)))
+                else:
+                    yield record
+            self.pending = still
+
+        last_line = -1
+        for match in self.pattern.finditer(chunk):
+            idx = bisect.bisect_right(starts, match.start()) - 1
+            if idx <= last_line or idx >= len(lines):
+                continue
+            last_line = idx
+
+            before = lines[max(0, idx - self.context):idx] if self.context else []
+            if self.context and len(before) < self.context:
+                needed = self.context - len(before)
+                before = list(self.previous)[-needed:] + before
+            after = lines[idx + 1: idx + 1 + self.context] if self.context else []
+
+            offset = base + starts[idx]
+            record = {
+                "type": "match",
+                "segment": self.segment,
+                "run": self.run_of(offset),
+                "offset": offset,
+                "line": _text(lines[idx]),
+                "before": [_text(line) for line in before],
+                "after": [_text(line) for line in after],
+            }
+            if len(after) < self.context:
+                self.pending.append((record, self.context - len(after)))
+            else:
+                yield record
+
+        if self.context:
+            self.previous.extend(lines[-self.context:])
+
+    def finish(self) -> Iterator[Dict[str, Any]]:
+        for record, _ in self.pending:
+            yield record
+        self.pending = []
+
+
+def _selected_ranges(
+    manifest: RunManifest,
+    since: Optional[float],
+    until: Optional[float],
+) -> List[Tuple[int, int, Optional[int]]]:
+    """(seq, start, stop) byte ranges to scan, oldest first."""
+    seqs = [s["seq"] for s in manifest.segments] + [manifest.current_seq]
+    if since is None and until is None:
+        return [(seq, 0, None) for seq in seqs]
+
+    now = time.time()
+    ranges: List[Tuple[int, int, Optional[int]]] = []
+    for i, run in enumerate(manifest.runs):
+        nxt = manifest.runs[i + 1] if i + 1 < len(manifest.runs) else None
+        started = run.get("started_at") or 0
+        ended = run.get("finished_at") or (nxt.get("started_at") if nxt else None) or now
+        if until is not None and started > until:
+            continue
+        if since is not None and ended < since:
+            continue
+
+        end_seq, end_off = (nxt["seq"], nxt["start"]) if nxt else (manifest.current_seq, None)
+        for seq in seqs:
+            if seq < run["seq"] or seq > end_seq:
+                continue
+            start = run["start"] if seq == run["seq"] else 0
+            stop = end_off if seq == end_seq else None
+            if ranges and ranges[-1][0] == seq and ranges[-1][2] is not None and ranges[-1][2] >= start:
+                # Adjacent runs in one segment: extend the previous range
+                ranges[-1] = (seq, ranges[-1][1], stop)
+            else:
+                ranges.append((seq, start, stop))
+    return ranges
+
+
+def search_logs(
+    log_path: str,
+    pattern: "re.Pattern[bytes]",
+    context: int = 0,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 1000,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream matches from the live log and its rotated segments, oldest first.
+
+    Yields {"type": "match", ...} records and a final {"type": "summary", ...}.
+    `since` / `until` (unix time) restrict the search to runs active in that window,
+    using the run manifest.
+    """
+    with manifest_lock:
+        manifest = RunManifest.load(log_path)
+    ranges = _selected_ranges(manifest, since, until)
+
+    run_keys = [(run["seq"], run["start"]) for run in manifest.runs]
+    run_numbers = [run["run"] for run in manifest.runs]
+
+    matches = 0
+    scanned = 0
+    truncated = False
+    for seq, start, stop in ranges:
+        path = manifest.segment_path(seq)
+        if not path or not os.path.exists(path):
+            continue
+        segment = "current" if seq == manifest.current_seq else os.path.basename(path)
+
+        def run_of(offset: int, seq: int = seq) -> Optional[int]:
+            idx = bisect.bisect_right(run_keys, (seq, offset)) - 1
+            return run_numbers[idx] if idx >= 0 else None
+
+        scanner = _Scanner(pattern, max(0, context), segment, run_of)
+        try:
+            for base, chunk in _segment_chunks(path, start, stop):
+                scanned += len(chunk)
+                for record in scanner.feed(base, chunk):
+                    yield record
+                    matches += 1
+                    if matches >= limit:
+                        truncated = True
+                        break
+                if truncated:
+                    break
+            if not truncated:
+                for record in scanner.finish():
+                    if matches >= limit:
+                        truncated = True
+                        break
+                    yield record
+                    matches += 1
+        except (OSError, ValueError, EOFError) as e:
+            yield {"type": "error", "segment": segment, "message": str(e)}
+        if truncated:
+            break
+
+    yield {"type": "summary", "matches": matches, "truncated": truncated, "bytes_scanned": scanned}
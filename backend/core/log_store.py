@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import bisect
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+INDEX_SUFFIX = ".idx"
+INDEX_EVERY = 1000
+BLOCK_SIZE = 64 * 1024
+
+
+@dataclass
+class LogPage:
+    """A run of whole lines from a log file, addressed by byte offsets."""
+
+    lines: List[str] = field(default_factory=list)
+    start: int = 0  # byte offset of the first line
+    end: int = 0  # byte offset just past the last line (cursor for `after=`)
+    size: int = 0  # file size when read
+    first_line: Optional[int] = None  # 0-based line number of `start`
+    total_lines: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["logs"] = data.pop("lines")
+        return data
+
+
+def decode_lines(raw: bytes) -> List[str]:
+    text = raw.decode("utf-8", errors="replace").replace("\r\n", "\n")
+    return text.splitlines(keepends=True)
+
+
+class LineIndex:
+    """
+    Sparse line-offset index kept next to a log file as `<log>.idx`.
+
+    `offsets[k]` is the byte offset of line `k * every`. The index is extended
+    incrementally from `size` (only new bytes are scanned) and rebuilt when the
+    file shrinks, i.e. after rotation.
+    """
+
+    def __init__(self, log_path: str, every: int = INDEX_EVERY):
+        self.log_path = log_path
+        self.path = log_path + INDEX_SUFFIX
+        self.every = every
+        self.inode: Optional[int] = None
+        self.size = 0
+        self.lines = 0
+        self.offsets: List[int] = [0]
+
+    def load(self) -> "LineIndex":
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("every") == self.every:
+                self.inode = data.get("inode")
+                self.size = int(data["size"])
+                self.lines = int(data["lines"])
+                self.offsets = [int(o) for o in data["offsets"]] or [0]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return self
+
+    def save(self) -> None:
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"every": self.every, "inode": self.inode, "size": self.size, "lines": self.lines, "offsets": self.offsets}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save log index {self.path}: {e}")
+
+    def reset(self) -> None:
+        self.inode = None
+        self.size = 0
+        self.lines = 0
+        self.offsets = [0]
+
+    def refresh(self, file_size: int, inode: Optional[int] = None) -> bool:
+        """Index bytes up to `file_size`; returns True when the index changed."""
+        if file_size < self.size or inode != self.inode:
+            # Rotated or truncated: start over
+            self.reset()
+            self.inode = inode
+        if file_size == self.size:
+            return False
+
+        with open(self.log_path, "rb") as f:
+            f.seek(self.size)
+            pos = self.size
+            remaining = file_size - pos
+            while remaining > 0:
+                block = f.read(min(BLOCK_SIZE, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                start = 0
+                while True:
+                    nl = block.find(b"\n", start)
+                    if nl < 0:
+                        break
+                    self.lines += 1
+                    if self.lines % self.every == 0:
+                        self.offsets.append(pos + nl + 1)
+                    start = nl + 1
+                pos += len(block)
+                self.size = pos
+        return True
+
+    def line_number(self, f, offset: int) -> int:
+        """0-based number of the line starting at `offset` (which must be indexed)."""
+        k = bisect.bisect_right(self.offsets, offset) - 1
+        base = self.offsets[k]
+        f.seek(base)
+        return k * self.every + f.read(offset - base).count(b"\n")
+
+
+_index_lock = threading.Lock()
+_indexes: Dict[str, LineIndex] = {}
+
+
+def get_line_index(log_path: str, file_size: int, inode: Optional[int] = None) -> LineIndex:
+    with _index_lock:
+        index = _indexes.get(log_path)
+        if index is None:
+            index = _indexes[log_path] = LineIndex(log_path).load()
+        if index.refresh(file_size, inode):
+            index.save()
+        return index
+
+
+def _read_back(f, end: int, lines: int) -> int:
+    """Byte offset where the last `lines` lines before `end` begin."""
+    pos = end
+    # A line ending exactly at `end` does not count as a boundary
+    newlines = -1
+    if end > 0:
+        f.seek(end - 1)
+        if f.read(1) != b"\n":
+            newlines = 0
+    while pos > 0:
+        read_size = min(BLOCK_SIZE, pos)
+        pos -= read_size
+        f.seek(pos)
+        block = f.read(read_size)
+        idx = len(block)
+        while True:
+            idx = block.rfind(b"\n", 0, idx)
+            if idx < 0:
+                break
+            newlines += 1
+            if newlines == lines:
+                return pos + idx + 1
+    return 0
+
+
+def _read_forward(f, start: int, lines: int, limit: int) -> int:
+    """Byte offset just past `lines` lines starting at `start` (or `limit`)."""
+    pos = start
+    count = 0
+    f.seek(start)
+    while pos < limit:
+        block = f.read(min(BLOCK_SIZE, limit - pos))
+        if not block:
+            break
+        idx = 0
+        while True:
+            nl = block.find(b"\n", idx)
+            if nl < 0:
+                break
+            count += 1
+            if count == lines:
+                return pos + nl + 1
+            idx = nl + 1
+        pos += len(block)
+    return limit
+
+
+def read_log_page(
+    log_path: str,
+    lines: int = 500,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+) -> LogPage:
+    """
+    Read up to `lines` lines without loading the file.
+
+    - default: the last `lines` lines (tail)
+    - `before`: the `lines` lines ending at byte offset `before` (paging back)
+    - `after`: up to `lines` lines starting at byte offset `after` (paging forward,
+      or polling with the previous page's `end` as the cursor)
+    """
+    try:
+        stat = os.stat(log_path)
+    except OSError:
+        return LogPage()
+
+    size = stat.st_size
+    lines = max(0, lines)
+    index = get_line_index(log_path, size, stat.st_ino or None)
+
+    with open(log_path, "rb") as f:
+        if after is not None:
+            start = min(max(after, 0), size)
+            end = _read_forward(f, start, lines, size) if lines else start
+            # Only whole lines when paging forward, so `end` stays a line start
+            if end == size and end > start:
+                f.seek(start)
+                last_nl = f.read(end - start).rfind(b"\n")
+                end = start + last_nl + 1
+        else:
+            end = size if before is None else min(max(before, 0), size)
+            start = _read_back(f, end, lines) if lines else end
+
+        f.seek(start)
+        page = LogPage(lines=decode_lines(f.read(end - start)), start=start, end=end, size=size)
+        if start <= index.size:
+            page.first_line = index.line_number(f, start)
+        page.total_lines = index.lines
+        if size:
+            # A last line without a trailing newline still counts
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                page.total_lines += 1
+    return page
+
+
+def tail_lines(log_path: str, lines: int) -> List[str]:
+    return read_log_page(log_path, lines).lines
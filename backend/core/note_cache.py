@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlmodel import Session, func, select
+
+from backend.core.note_walker import NoteGraphContext
+from backend.core.settings import get_settings
+from backend.models import NoteEdge, NoteNode
+
+
+@dataclass(slots=True)
+class NoteMeta:
+    """A note row without `content` and `history`: enough to filter, sort and list it."""
+
+    id: str
+    user_id: int
+    title: Optional[str]
+    weight: int
+    node_type: Optional[str]
+    node_status: Optional[str]
+    private_level: int
+    custom_fields: Any
+    created_at: float
+    updated_at: float
+    start_at: float
+
+    @classmethod
+    def from_note(cls, note: NoteNode) -> "NoteMeta":
+        return cls(*(getattr(note, name) for name in NOTE_META_FIELDS))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in NOTE_META_FIELDS}
+
+
+@dataclass(slots=True)
+class EdgeMeta:
+    id: str
+    user_id: int
+    source_id: str
+    target_id: str
+    label: Optional[str]
+    created_at: float
+
+    @classmethod
+    def from_edge(cls, edge: NoteEdge) -> "EdgeMeta":
+        return cls(*(getattr(edge, name) for name in EDGE_META_FIELDS))
+
+
+NOTE_META_FIELDS = tuple(f.name for f in fields(NoteMeta))
+EDGE_META_FIELDS = tuple(f.name for f in fields(EdgeMeta))
+
+
+def select_note_metas(*criteria: Any):
+    """SELECT of the NoteMeta columns only; chain .where() / .order_by() as usual."""
+    return select(*[getattr(NoteNode, name) for name in NOTE_META_FIELDS]).where(*criteria)
+
+
+def fetch_note_metas(session: Session, statement) -> List[NoteMeta]:
+    return [NoteMeta(*row) for row in session.exec(statement).all()]
+
+
+def load_note_metas(session: Session, *criteria: Any) -> List[NoteMeta]:
+    return fetch_note_metas(session, select_note_metas(*criteria))
+
+
+def load_edge_metas(session: Session, *criteria: Any) -> List[EdgeMeta]:
+    columns = [getattr(NoteEdge, name) for name in EDGE_META_FIELDS]
+    return [EdgeMeta(*row) for row in session.exec(select(*columns).where(*criteria)).all()]
+
+
+def note_list_rows(session: Session, notes: List[NoteMeta]) -> List[Dict[str, Any]]:
+    """List rows (NoteListRead) for a page of notes; history is read for that page only."""
+    if not notes:
+        return []
+    history_by_id = dict(session.exec(
+        select(NoteNode.id, NoteNode.history).where(NoteNode.id.in_([note.id for note in notes]))
+    ).all())
+    return [{**note.to_dict(), "history": history_by_id.get(note.id) or []} for note in notes]
+
+
+def graph_fingerprint(session: Session, user_id: int) -> Tuple[Any, ...]:
+    """Row counts and newest timestamps of a user's notes and edges (index-only lookups)."""
+    note_count, note_updated = session.exec(
+        select(func.count(), func.max(NoteNode.updated_at)).select_from(NoteNode).where(NoteNode.user_id == user_id)
+    ).one()
+    edge_count, edge_created = session.exec(
+        select(func.count(), func.max(NoteEdge.created_at)).select_from(NoteEdge).where(NoteEdge.user_id == user_id)
+    ).one()
+    return (note_count, note_updated, edge_count, edge_created)
+
+
+class _UserGraph:
+    __slots__ = ("bind", "version", "context", "lock", "_fingerprint")
+
+    def __init__(self, bind: Any, version: int, context: NoteGraphContext):
+        self.bind = bind
+        self.version = version
+        self.context = context
+        self.lock = threading.RLock()
+        self._fingerprint: Optional[Tuple[Any, ...]] = None
+
+    def fingerprint(self) -> Tuple[Any, ...]:
+        """`graph_fingerprint` as derived from what is held in memory."""
+        if self._fingerprint is None:
+            notes = self.context.notes_by_id.values()
+            edges = self.context.edges
+            self._fingerprint = (
+                len(notes),
+                max((note.updated_at for note in notes), default=None),
+                len(edges),
+                max((edge.created_at for edge in edges), default=None),
+            )
+        return self._fingerprint
+
+    def changed(self, version: int) -> None:
+        self.version = version
+        self._fingerprint = None
+
+
+class NoteGraphCache:
+    """
+    Per-user note graphs (NoteMeta nodes, EdgeMeta edges and their adjacency),
+    kept in memory across requests.
+
+    Note and edge routes apply their committed writes in place. Every write
+    bumps the user's version counter, so a graph that missed one is rebuilt.
+    Before use, a graph is also checked against `graph_fingerprint`, so writes
+    from elsewhere (admin tools, another process) are noticed. At most
+    `maxsize` users are kept, least recently used first out; 0 disables the
+    cache.
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._graphs: "OrderedDict[int, _UserGraph]" = OrderedDict()
+        self._versions: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def graph(self, session: Session, user_id: int) -> Iterator[NoteGraphContext]:
+        """The user's graph, locked against in-place writes while in use. Do not modify it."""
+        entry = self._current(session, user_id)
+        with entry.lock:
+            yield entry.context
+
+    def _current(self, session: Session, user_id: int) -> _UserGraph:
+        bind = session.get_bind()
+        with self._lock:
+            entry = self._graphs.get(user_id)
+            version = self._versions.get(user_id, 0)
+
+        if entry is not None and entry.bind is bind and entry.version == version:
+            fingerprint = graph_fingerprint(session, user_id)
+            with entry.lock:
+                fresh = entry.version == version and entry.fingerprint() == fingerprint
+            if fresh:
+                with self._lock:
+                    self.hits += 1
+                    if user_id in self._graphs:
+                        self._graphs.move_to_end(user_id)
+                return entry
+
+        context = NoteGraphContext.from_items(
+            load_note_metas(session, NoteNode.user_id == user_id),
+            load_edge_metas(session, NoteEdge.user_id == user_id),
+        )
+        entry = _UserGraph(bind, version, context)
+        with self._lock:
+            self.misses += 1
+            # Keep it only if no write landed while it was loading
+            if self.maxsize > 0 and self._versions.get(user_id, 0) == version:
+                self._graphs[user_id] = entry
+                self._graphs.move_to_end(user_id)
+                while len(self._graphs) > self.maxsize:
+                    self._graphs.popitem(last=False)
+        return entry
+
+    def apply(self, session: Session, user_id: int, change: Callable[[NoteGraphContext], None]) -> None:
+        """Apply a committed write to the user's cached graph, if there is one."""
+        with self._lock:
+            version = self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            entry = self._graphs.get(user_id)
+        if entry is None or entry.bind is not session.get_bind():
+            return
+
+        with entry.lock:
+            try:
+                change(entry.context)
+            except Exception as e:
+                print(f"Dropping cached note graph of user {user_id}: {e}")
+                self.invalidate(user_id)
+                return
+            entry.changed(version)
+
+    def put_note(self, session: Session, user_id: int, note: NoteNode) -> None:
+        meta = NoteMeta.from_note(note)
+        self.apply(session, user_id, lambda context: context.put_note(meta))
+
+    def remove_note(self, session: Session, user_id: int, note_id: str) -> None:
+        self.apply(session, user_id, lambda context: context.remove_note(note_id))
+
+    def put_edge(self, session: Session, user_id: int, edge: NoteEdge) -> None:
+        meta = EdgeMeta.from_edge(edge)
+        self.apply(session, user_id, lambda context: context.put_edge(meta))
+
+    def remove_edges(self, session: Session, user_id: int, edge_ids: Iterable[str]) -> None:
+        edge_ids = list(edge_ids)
+
+        def _remove(context: NoteGraphContext) -> None:
+            for edge_id in edge_ids:
+                context.remove_edge(edge_id)
+
+        self.apply(session, user_id, _remove)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        with self._lock:
+            if user_id is None:
+                self._graphs.clear()
+            else:
+                self._graphs.pop(user_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "users": len(self._graphs),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+note_graphs = NoteGraphCache(maxsize=get_settings().note_graph_cache_users)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from backend.core.note_planner import Comparison, scan_comparison
+from backend.core.note_walker import NoteGraphContext
+from backend.core.settings import get_settings
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional columnar scan engine
+    np = None
+
+NUMERIC_COLUMNS = ("created_at", "updated_at", "start_at", "weight", "private_level")
+CATEGORY_COLUMNS = ("node_status", "node_type")
+
+MaskBuilder = Callable[["NoteColumns"], Any]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class NoteColumns:
+    """
+    The notes of a graph context as column arrays; row i is the i-th note.
+
+    Timestamps, weight and private_level are float64 with None as NaN.
+    node_status and node_type are dictionary-encoded int32 codes. Titles get
+    a sort rank array the first time a scan orders by title.
+    """
+
+    def __init__(self, notes: Iterable[Any]):
+        self.notes = list(notes)
+        self.size = len(self.notes)
+        self.index = {str(note.id): row for row, note in enumerate(self.notes)}
+        self.numeric: Dict[str, Any] = {
+            name: np.array(
+                [getattr(note, name, None) for note in self.notes],
+                dtype=np.float64,
+            )
+            for name in NUMERIC_COLUMNS
+        }
+        self.categories: Dict[str, Tuple[Any, Dict[Any, int]]] = {}
+        for name in CATEGORY_COLUMNS:
+            vocab: Dict[Any, int] = {}
+            codes = np.fromiter(
+                (vocab.setdefault(getattr(note, name, None), len(vocab)) for note in self.notes),
+                dtype=np.int32,
+                count=self.size,
+            )
+            self.categories[name] = (codes, vocab)
+        self._title_rank = None
+
+    @classmethod
+    def of(cls, context: NoteGraphContext) -> "NoteColumns":
+        """The context's columns, built once and kept until one of its notes changes."""
+        columns = context.derived.get("columns")
+        if columns is None:
+            columns = context.derived["columns"] = cls(context.notes_by_id.values())
+        return columns
+
+    def constant(self, value: bool):
+        return np.full(self.size, value, dtype=bool)
+
+    def id_mask(self, note_ids: Sequence[str]):
+        mask = self.constant(False)
+        rows = [self.index[note_id] for note_id in note_ids if note_id in self.index]
+        mask[rows] = True
+        return mask
+
+    def category_mask(self, name: str, op: str, value: Any, values: Sequence[Any]):
+        codes, vocab = self.categories[name]
+        if op in {"eq", "neq"}:
+            code = vocab.get(value)
+            mask = self.constant(False) if code is None else codes == code
+        else:
+            mask = np.isin(codes, [vocab[item] for item in values if item in vocab])
+        return ~mask if op in {"neq", "not_in"} else mask
+
+    def numeric_mask(self, name: str, op: str, value: Any, values: Sequence[Any]):
+        column = self.numeric[name]
+        if op in {"eq", "neq"}:
+            mask = np.isnan(column) if value is None else column == value
+        elif op in {"in", "not_in"}:
+            present = [item for item in values if item is not None]
+            mask = np.isin(column, present)
+            if len(present) < len(values):
+                mask |= np.isnan(column)
+        elif op == "gte":
+            return column >= value
+        elif op == "lte":
+            return column <= value
+        else:
+            if len(values) < 2:
+                return self.constant(False)
+            return (column >= values[0]) & (column <= values[1])
+        return ~mask if op in {"neq", "not_in"} else mask
+
+    def sort_key(self, name: str):
+        if name != "title":
+            return self.numeric[name]
+        if self._title_rank is None:
+            titles = sorted({note.title for note in self.notes if note.title is not None})
+            rank = {title: float(position) for position, title in enumerate(titles)}
+            self._title_rank = np.array(
+                [rank.get(note.title, np.nan) for note in self.notes],
+                dtype=np.float64,
+            )
+        return self._title_rank
+
+    def order(self, rows, name: str, descending: bool):
+        """Stable order of `rows` by a column, missing values last (first when descending), like `_sort_notes`."""
+        keys = self.sort_key(name)[rows]
+        missing = np.isnan(keys)
+        if descending:
+            return np.lexsort((-keys, ~missing))
+        return np.lexsort((keys, missing))
+
+
+def _numeric_supported(comparison: Comparison) -> bool:
+    op, value, values = comparison.op, comparison.value, comparison.values
+    if op in {"eq", "neq"}:
+        return value is None or _is_number(value)
+    if op in {"in", "not_in"}:
+        return all(item is None or _is_number(item) for item in values)
+    if op in {"gte", "lte"}:
+        return _is_number(value)
+    if op == "between":
+        return len(values) < 2 or all(_is_number(item) for item in values[:2])
+    return False
+
+
+def _category_supported(comparison: Comparison) -> bool:
+    if comparison.op in {"eq", "neq"}:
+        return _hashable(comparison.value)
+    if comparison.op in {"in", "not_in"}:
+        return all(_hashable(item) for item in comparison.values)
+    return False
+
+
+def _compile_mask(matcher: Any, *, base_time: Optional[datetime] = None) -> Optional[MaskBuilder]:
+    comparison = scan_comparison(matcher, base_time=base_time)
+    if isinstance(comparison, bool):
+        return lambda columns: columns.constant(comparison)
+    if comparison is not None:
+        name, op, value, values = comparison.field, comparison.op, comparison.value, list(comparison.values)
+        if name in NUMERIC_COLUMNS and _numeric_supported(comparison):
+            return lambda columns: columns.numeric_mask(name, op, value, values)
+        if name in CATEGORY_COLUMNS and _category_supported(comparison):
+            return lambda columns: columns.category_mask(name, op, value, values)
+        return None
+    if matcher.kind == "id":
+        note_ids = [str(note_id) for note_id in matcher.ids]
+        return lambda columns: columns.id_mask(note_ids)
+    return None
+
+
+@dataclass(slots=True)
+class ColumnarScan:
+    """A scan program's select channel as boolean masks, folded in rule order."""
+
+    default: bool
+    steps: List[Tuple[MaskBuilder, bool]]
+
+    def select(self, columns: NoteColumns):
+        # NoteWalker._check: include is `decision or match`, exclude `decision and not match`
+        decision = columns.constant(self.default)
+        for mask_of, target in self.steps:
+            if target:
+                decision |= mask_of(columns)
+            else:
+                decision &= ~mask_of(columns)
+        return decision
+
+    def run(
+        self,
+        columns: NoteColumns,
+        *,
+        order_by: str,
+        order_desc: bool,
+        skip: int,
+        limit: int,
+    ) -> Tuple[List[Any], int]:
+        """The visible page of selected notes, and how many were selected."""
+        rows = np.flatnonzero(self.select(columns))
+        page = rows[columns.order(rows, order_by, order_desc)][skip: skip + limit]
+        return [columns.notes[row] for row in page.tolist()], len(rows)
+
+
+def compile_columnar_scan(request: Any, *, base_time: Optional[datetime] = None) -> Optional[ColumnarScan]:
+    """
+    A columnar plan for a scan program, or None to use the row walker:
+    NumPy is not installed, the engine is turned off, or a select matcher is
+    not a field / time / in / between comparison on a column kept here.
+    """
+    if np is None or not get_settings().note_columnar_scan or request.executor.kind != "scan":
+        return None
+
+    steps: List[Tuple[MaskBuilder, bool]] = []
+    for rule in request.program.select.rules:
+        mask_of = _compile_mask(rule.matcher, base_time=base_time)
+        if mask_of is None:
+            return None
+        steps.append((mask_of, rule.action == "include"))
+    return ColumnarScan(default=bool(request.program.select.default), steps=steps)
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import and_, func, not_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+from backend.core.note_walker import _relative_month_window_bounds, _resolve_time_point_expr
+from backend.models import NoteNode
+
+# A translated predicate: a SQL clause, or a constant when the answer does not depend on the row
+Clause = Union[ColumnElement, bool]
+
+TEXT_COLUMNS = {"id", "title", "node_type", "node_status"}
+NUMERIC_COLUMNS = {"user_id", "weight", "private_level", "created_at", "updated_at", "start_at"}
+TIME_FIELDS = {"start_at", "updated_at"}
+
+
+@dataclass(slots=True)
+class PlannedRule:
+    channel: str
+    index: int
+    action: str
+    kind: str
+    pushed: bool = False
+    reason: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "channel": self.channel,
+            "index": self.index,
+            "action": self.action,
+            "kind": self.kind,
+            "pushed": self.pushed,
+            "reason": self.reason,
+        }
+
+
+@dataclass(slots=True)
+class NoteProgramPlan:
+    executor: str
+    # None: every note is a candidate. Otherwise a WHERE clause on NoteNode
+    where: Optional[ColumnElement] = None
+    # The select channel can never pass, no query needed
+    empty: bool = False
+    rules: List[PlannedRule] = field(default_factory=list)
+    # "row" (NoteWalker over SQL candidates) or "columnar" (note_columns)
+    engine: str = "row"
+
+    @property
+    def pushdown(self) -> bool:
+        return self.where is not None or self.empty
+
+    def use_columnar_engine(self) -> None:
+        """The columnar engine evaluates every select rule itself; no SQL prefilter runs."""
+        self.engine = "columnar"
+        self.where = None
+        self.empty = False
+        for rule in self.rules:
+            if rule.channel == "select":
+                rule.pushed = False
+                rule.reason = "evaluated on column arrays"
+
+    def prefilter_sql(self) -> Optional[str]:
+        if self.where is None:
+            return None
+        try:
+            return str(self.where.compile(compile_kwargs={"literal_binds": True}))
+        except Exception:
+            return str(self.where)
+
+    def to_dict(self, candidates: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "executor": self.executor,
+            "engine": self.engine,
+            "pushdown": self.pushdown,
+            "empty": self.empty,
+            "prefilter": self.prefilter_sql(),
+            "candidates": candidates,
+            "rules": [rule.to_dict() for rule in self.rules],
+        }
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _fits_column(name: str, value: Any) -> bool:
+    """Whether SQLite compares `value` with the column the way Python would."""
+    if value is None:
+        return True
+    if name in TEXT_COLUMNS:
+        return isinstance(value, str)
+    return _is_number(value)
+
+
+def _equals(column, value: Any) -> ColumnElement:
+    # Two-valued, like Python's ==: NULL only equals None
+    if value is None:
+        return column.is_(None)
+    return and_(column.is_not(None), column == value)
+
+
+def _member_of(column, values: List[Any]) -> Clause:
+    present = [value for value in values if value is not None]
+    clauses = []
+    if present:
+        clauses.append(and_(column.is_not(None), column.in_(present)))
+    if len(present) < len(values):
+        clauses.append(column.is_(None))
+    if not clauses:
+        return False
+    return clauses[0] if len(clauses) == 1 else or_(*clauses)
+
+
+def _contains(column, needle: str, *, ignore_case: bool) -> Tuple[Optional[Clause], Optional[str]]:
+    if ignore_case:
+        if not needle.isascii():
+            return None, "SQLite LIKE only folds ASCII case"
+        if not needle:
+            return column.is_not(None), None
+        return and_(column.is_not(None), column.contains(needle, autoescape=True)), None
+    if not needle:
+        return column.is_not(None), None
+    return and_(column.is_not(None), func.instr(column, needle) > 0), None
+
+
+def _compare_clause(
+    name: str,
+    op: str,
+    value: Any = None,
+    values: Optional[List[Any]] = None,
+) -> Tuple[Optional[Clause], Optional[str]]:
+    """SQL for `note_walker._matches_value(note.<name>, op, ...)`, or (None, why not)."""
+    if name.startswith("custom_fields."):
+        return None, "custom fields are stored as JSON"
+    if name not in TEXT_COLUMNS and name not in NUMERIC_COLUMNS:
+        return None, f"unknown column {name}"
+
+    column = getattr(NoteNode, name)
+    values = list(values or [])
+
+    if op in {"eq", "neq"}:
+        if not _fits_column(name, value):
+            return None, "value type differs from the column"
+        clause = _equals(column, value)
+        return (clause, None) if op == "eq" else (not_(clause), None)
+    if op in {"in", "not_in"}:
+        if not all(_fits_column(name, item) for item in values):
+            return None, "value type differs from the column"
+        clause = _member_of(column, values)
+        if op == "in":
+            return clause, None
+        return (not clause if isinstance(clause, bool) else not_(clause)), None
+    if op in {"contains", "not_contains"}:
+        if name not in TEXT_COLUMNS:
+            return None, "text match on a numeric column"
+        clause, reason = _contains(column, "" if value is None else str(value), ignore_case=True)
+        if clause is None or op == "contains":
+            return clause, reason
+        return not_(clause), None
+    if op in {"gte", "lte"}:
+        if name not in NUMERIC_COLUMNS or not _is_number(value):
+            return None, "range compare needs a numeric column and value"
+        bound = column >= value if op == "gte" else column <= value
+        return and_(column.is_not(None), bound), None
+    if op == "between":
+        if len(values) < 2:
+            return False, None
+        if name not in NUMERIC_COLUMNS or not all(_is_number(item) for item in values[:2]):
+            return None, "range compare needs a numeric column and values"
+        return and_(column.is_not(None), column >= values[0], column <= values[1]), None
+    if op == "regex_search":
+        return None, "regex is evaluated in Python"
+
+    return None, f"unsupported op {op}"
+
+
+@dataclass(frozen=True, slots=True)
+class Comparison:
+    field: str
+    op: str
+    value: Any = None
+    values: Tuple[Any, ...] = ()
+
+
+def scan_comparison(matcher: Any, *, base_time: Optional[datetime] = None) -> Union[Comparison, bool, None]:
+    """
+    A matcher as seen by a scan, where every visit is a seed at depth 0:
+    a constant, a single column comparison (time expressions resolved), or
+    None for the other kinds.
+    """
+    kind = matcher.kind
+
+    if kind in {"all", "seed"}:
+        return True
+    if kind == "none":
+        return False
+    if kind == "depth":
+        max_depth = matcher.max_depth
+        return matcher.min_depth <= 0 and (max_depth is None or max_depth >= 0)
+    if kind == "relative_month_window":
+        start_at, end_at = _relative_month_window_bounds(
+            matcher.start_month_offset,
+            matcher.end_month_offset,
+            base_time=base_time,
+        )
+        return Comparison(matcher.field or "start_at", "between", values=(start_at, end_at))
+    if kind == "field" and matcher.field:
+        op = matcher.op or "eq"
+        if matcher.field in TIME_FIELDS and (matcher.time_value is not None or matcher.time_values):
+            if op == "between":
+                resolved = [
+                    point for point in (
+                        _resolve_time_point_expr(expr, base_time=base_time) for expr in matcher.time_values
+                    )
+                    if point is not None
+                ]
+                if len(resolved) < 2:
+                    return False
+                return Comparison(matcher.field, op, values=tuple(resolved[:2]))
+            resolved_value = _resolve_time_point_expr(matcher.time_value, base_time=base_time)
+            if resolved_value is None:
+                return False
+            return Comparison(matcher.field, op, value=resolved_value)
+        return Comparison(matcher.field, op, value=matcher.value, values=tuple(matcher.values))
+
+    return None
+
+
+def matcher_clause(matcher: Any, *, base_time: Optional[datetime] = None) -> Tuple[Optional[Clause], Optional[str]]:
+    """
+    SQL for a program matcher as seen by a scan.
+    Returns (None, reason) when the matcher has to run in Python.
+    """
+    comparison = scan_comparison(matcher, base_time=base_time)
+    if isinstance(comparison, bool):
+        return comparison, None
+    if comparison is not None:
+        return _compare_clause(comparison.field, comparison.op, value=comparison.value, values=list(comparison.values))
+
+    kind = matcher.kind
+    if kind == "id":
+        ids = [str(note_id) for note_id in matcher.ids]
+        return (NoteNode.id.in_(ids) if ids else False), None
+    if kind == "title_contains":
+        needle = str(matcher.value or "")
+        if not needle:
+            # The walker reads a missing title as "", which contains ""
+            return True, None
+        return _contains(NoteNode.title, needle, ignore_case=matcher.ignore_case)
+    if kind == "field":
+        return None, "field matcher without a field"
+
+    return None, f"unsupported matcher kind {kind}"
+
+
+def _include(state: Clause, predicate: Clause) -> Clause:
+    # NoteWalker._check: an include rule makes it `state or predicate`
+    if state is True or predicate is True:
+        return True
+    if state is False:
+        return predicate
+    if predicate is False:
+        return state
+    return or_(state, predicate)
+
+
+def _exclude(state: Clause, predicate: Clause) -> Clause:
+    # ... and an exclude rule `state and not predicate`
+    if state is False or predicate is True:
+        return False
+    if predicate is False:
+        return state
+    negated = not_(predicate)
+    return negated if state is True else and_(state, negated)
+
+
+def plan_note_program(request: Any, *, base_time: Optional[datetime] = None) -> NoteProgramPlan:
+    """
+    Derive a SQL prefilter from the select channel of a scan program.
+
+    The walker decides a channel by folding its rules over the default: an
+    include rule turns the decision into `decision or match`, an exclude rule
+    into `decision and not match`. Matchers with a faithful SQL translation
+    are folded the same way. A matcher that has to stay in Python is assumed
+    to match when that can only add candidates (include) and to miss
+    otherwise (exclude), so the prefilter never drops a note the walker would
+    select. The walker still checks every candidate.
+    """
+    executor = request.executor.kind
+    plan = NoteProgramPlan(executor=executor)
+    select_channel = request.program.select
+    expand_channel = request.program.expand
+
+    if executor != "scan":
+        for channel, rules in (("select", select_channel.rules), ("expand", expand_channel.rules)):
+            for index, rule in enumerate(rules):
+                plan.rules.append(PlannedRule(
+                    channel, index, rule.action, rule.matcher.kind,
+                    reason="graph walks are evaluated in Python",
+                ))
+        return plan
+
+    state: Clause = bool(select_channel.default)
+    # Rules whose SQL is part of `state`
+    contributing: List[PlannedRule] = []
+
+    for index, rule in enumerate(select_channel.rules):
+        planned = PlannedRule("select", index, rule.action, rule.matcher.kind)
+        plan.rules.append(planned)
+
+        predicate, reason = matcher_clause(rule.matcher, base_time=base_time)
+        planned.reason = reason
+        if predicate is None:
+            predicate = rule.action == "include"
+
+        previous = state
+        state = _include(state, predicate) if rule.action == "include" else _exclude(state, predicate)
+
+        if state is True:
+            contributing = []
+        elif state is False:
+            contributing = [planned] if previous is not False else contributing
+        elif state is not previous and reason is None:
+            contributing.append(planned)
+
+    for planned in contributing:
+        planned.pushed = True
+    for planned in plan.rules:
+        if not planned.pushed and planned.reason is None:
+            planned.reason = "does not narrow the prefilter"
+
+    for index, rule in enumerate(expand_channel.rules):
+        plan.rules.append(PlannedRule(
+            "expand", index, rule.action, rule.matcher.kind,
+            reason="scans do not expand",
+        ))
+
+    if state is False:
+        plan.empty = True
+    elif state is not True:
+        plan.where = state
+    return plan
@@ -3,6 +3,7 @@ from __future__ import annotations
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from functools import lru_cache
 import inspect
 import re
 from typing import Any, Callable, Dict, Iterable, Iterator, List, Literal, Optional, Sequence, Tuple
@@ -27,59 +28,105 @@ def _normalize_text(value: Any, ignore_case: bool) -> str:
     return text.lower() if ignore_case else text
 
 
+def _get_custom_field(note: NoteNode, key: str) -> Any:
+    custom_fields = note.custom_fields or []
+    if isinstance(custom_fields, list):
+        for item in custom_fields:
+            if isinstance(item, list) and len(item) >= 3 and item[0] == key:
+                return item[2]
+    elif isinstance(custom_fields, dict):
+        return custom_fields.get(key)
+    return None
+
+
 def _get_note_value(note: NoteNode, field_name: str) -> Any:
+    if field_name.startswith("custom_fields."):
+        return _get_custom_field(note, field_name.split(".", 1)[1])
+    return getattr(note, field_name, None)
+
+
+def _field_getter(field_name: str) -> Callable[[NoteNode], Any]:
     if field_name.startswith("custom_fields."):
         key = field_name.split(".", 1)[1]
-        custom_fields = note.custom_fields or []
-        if isinstance(custom_fields, list):
-            for item in custom_fields:
-                if isinstance(item, list) and len(item) >= 3 and item[0] == key:
-                    return item[2]
-        elif isinstance(custom_fields, dict):
-            return custom_fields.get(key)
-        return None
+        return lambda note: _get_custom_field(note, key)
+    return lambda note: getattr(note, field_name, None)
 
-    return getattr(note, field_name, None)
 
+def _never(field_value: Any) -> bool:
+    return False
 
-def _matches_value(field_value: Any, op: CompareOp, value: Any = None, values: Optional[Sequence[Any]] = None) -> bool:
+
+def _compile_compare(op: CompareOp, value: Any = None, values: Optional[Sequence[Any]] = None) -> Callable[[Any], bool]:
+    """
+    `field_value -> bool` for one comparison, with its operands prepared once:
+    frozenset membership, lowered needles and compiled regexes.
+    """
     values = list(values or [])
 
     if op == "eq":
-        return field_value == value
+        return lambda field_value: field_value == value
     if op == "neq":
-        return field_value != value
-    if op == "in":
-        return field_value in values
-    if op == "not_in":
-        return field_value not in values
+        return lambda field_value: field_value != value
+    if op in {"in", "not_in"}:
+        try:
+            members = frozenset(values)
+        except TypeError:
+            members = None
+
+        def _contained(field_value: Any) -> bool:
+            if members is not None:
+                try:
+                    return field_value in members
+                except TypeError:
+                    pass
+            return field_value in values
+
+        if op == "in":
+            return _contained
+        return lambda field_value: not _contained(field_value)
     if op == "contains":
-        if field_value is None:
-            return False
-        return _normalize_text(value, True) in _normalize_text(field_value, True)
+        needle = _normalize_text(value, True)
+        return lambda field_value: field_value is not None and needle in str(field_value).lower()
     if op == "not_contains":
-        if field_value is None:
-            return True
-        return _normalize_text(value, True) not in _normalize_text(field_value, True)
+        needle = _normalize_text(value, True)
+        return lambda field_value: field_value is None or needle not in str(field_value).lower()
     if op == "regex_search":
-        if field_value is None:
-            return False
         try:
-            return re.search(str(value or ""), str(field_value)) is not None
+            pattern = re.compile(str(value or ""))
         except re.error:
-            return False
+            return _never
+        return lambda field_value: field_value is not None and pattern.search(str(field_value)) is not None
     if op == "gte":
-        return field_value is not None and field_value >= value
+        return lambda field_value: field_value is not None and field_value >= value
     if op == "lte":
-        return field_value is not None and field_value <= value
+        return lambda field_value: field_value is not None and field_value <= value
     if op == "between":
-        if len(values) < 2 or field_value is None:
-            return False
-        return values[0] <= field_value <= values[1]
+        if len(values) < 2:
+            return _never
+        low, high = values[0], values[1]
+        return lambda field_value: field_value is not None and low <= field_value <= high
 
     raise ValueError(f"Unsupported compare op: {op}")
 
 
+def _matches_value(field_value: Any, op: CompareOp, value: Any = None, values: Optional[Sequence[Any]] = None) -> bool:
+    return _compile_compare(op, value, values)(field_value)
+
+
+# Rough per-visit cost of a predicate, used to order rules that commute
+DEFAULT_PREDICATE_COST = 5
+COMPARE_OP_COSTS = {"contains": 2, "not_contains": 2, "regex_search": 4}
+
+
+def _with_cost(predicate: Predicate, cost: int) -> Predicate:
+    predicate.cost = cost
+    return predicate
+
+
+def _cost_of(predicate: Predicate) -> int:
+    return getattr(predicate, "cost", DEFAULT_PREDICATE_COST)
+
+
 def _shift_month(year: int, month: int, offset: int) -> Tuple[int, int]:
     month_index = (year * 12 + (month - 1)) + offset
     shifted_year, shifted_month_index = divmod(month_index, 12)
@@ -199,6 +246,8 @@ class NoteGraphContext:
     edges: List[NoteEdge]
     outgoing_edges: Dict[str, List[NoteEdge]] = field(init=False, repr=False)
     incoming_edges: Dict[str, List[NoteEdge]] = field(init=False, repr=False)
+    # Values computed from the notes (e.g. column arrays); dropped whenever a note changes
+    derived: Dict[str, Any] = field(init=False, repr=False, default_factory=dict)
 
     def __post_init__(self) -> None:
         outgoing: Dict[str, List[NoteEdge]] = defaultdict(list)
@@ -271,6 +320,61 @@ class NoteGraphContext:
             if neighbor is not None:
                 yield edge, neighbor
 
+    # Incremental updates, for contexts kept alive across requests
+
+    def put_note(self, note: NoteNode) -> None:
+        self.notes_by_id[str(note.id)] = note
+        self.derived.clear()
+
+    def remove_note(self, note_id: str) -> None:
+        note_id = str(note_id)
+        self.notes_by_id.pop(note_id, None)
+        self.derived.clear()
+        # The edge rows outlive the note, so they stay in `edges`; only unlink them
+        for edge in self.outgoing_edges.pop(note_id, []):
+            self._unlink(self.incoming_edges, str(edge.target_id), edge)
+        for edge in self.incoming_edges.pop(note_id, []):
+            self._unlink(self.outgoing_edges, str(edge.source_id), edge)
+
+    def put_edge(self, edge: NoteEdge) -> None:
+        for index, existing in enumerate(self.edges):
+            if existing.id == edge.id:
+                self.edges[index] = edge
+                self._replace(self.outgoing_edges, str(edge.source_id), existing, edge)
+                self._replace(self.incoming_edges, str(edge.target_id), existing, edge)
+                return
+
+        self.edges.append(edge)
+        source_id = str(edge.source_id)
+        target_id = str(edge.target_id)
+        if source_id in self.notes_by_id and target_id in self.notes_by_id:
+            self.outgoing_edges.setdefault(source_id, []).append(edge)
+            self.incoming_edges.setdefault(target_id, []).append(edge)
+
+    def remove_edge(self, edge_id: str) -> None:
+        for index, edge in enumerate(self.edges):
+            if edge.id == edge_id:
+                del self.edges[index]
+                self._unlink(self.outgoing_edges, str(edge.source_id), edge)
+                self._unlink(self.incoming_edges, str(edge.target_id), edge)
+                return
+
+    @staticmethod
+    def _unlink(adjacency: Dict[str, List[NoteEdge]], note_id: str, edge: NoteEdge) -> None:
+        edges = adjacency.get(note_id)
+        if edges is None:
+            return
+        edges[:] = [item for item in edges if item is not edge]
+        if not edges:
+            del adjacency[note_id]
+
+    @staticmethod
+    def _replace(adjacency: Dict[str, List[NoteEdge]], note_id: str, old: NoteEdge, new: NoteEdge) -> None:
+        edges = adjacency.get(note_id, [])
+        for index, item in enumerate(edges):
+            if item is old:
+                edges[index] = new
+
     def induced_edges(self, node_ids: Iterable[str]) -> List[NoteEdge]:
         selected_ids = {str(note_id) for note_id in node_ids}
         return [
@@ -288,20 +392,20 @@ class NoteFilterFactory:
 
     @classmethod
     def all(cls) -> Predicate:
-        return lambda visit: True
+        return _with_cost(lambda visit: True, 0)
 
     @classmethod
     def none(cls) -> Predicate:
-        return lambda visit: False
+        return _with_cost(lambda visit: False, 0)
 
     @classmethod
     def is_seed(cls) -> Predicate:
-        return lambda visit: visit.is_seed
+        return _with_cost(lambda visit: visit.depth == 0, 0)
 
     @classmethod
     def match_id(cls, note_ids: str | Sequence[str]) -> Predicate:
-        note_ids = {str(note_id) for note_id in _to_list(note_ids)}
-        return lambda visit: visit.node_id in note_ids
+        note_ids = frozenset(str(note_id) for note_id in _to_list(note_ids))
+        return _with_cost(lambda visit: str(visit.node.id) in note_ids, 1)
 
     @classmethod
     def match_field(
@@ -312,7 +416,10 @@ class NoteFilterFactory:
         value: Any = None,
         values: Optional[Sequence[Any]] = None,
     ) -> Predicate:
-        return lambda visit: _matches_value(_get_note_value(visit.node, field_name), op, value=value, values=values)
+        get_value = _field_getter(field_name)
+        test = _compile_compare(op, value, values)
+        cost = COMPARE_OP_COSTS.get(op, 1) + (2 if field_name.startswith("custom_fields.") else 0)
+        return _with_cost(lambda visit: test(get_value(visit.node)), cost)
 
     @classmethod
     def match_custom_field(
@@ -333,7 +440,7 @@ class NoteFilterFactory:
             title = _normalize_text(visit.node.title, ignore_case)
             return expected in title
 
-        return _check
+        return _with_cost(_check, 2)
 
     @classmethod
     def match_depth(cls, *, min_depth: int = 0, max_depth: Optional[int] = None) -> Predicate:
@@ -344,7 +451,7 @@ class NoteFilterFactory:
                 return False
             return True
 
-        return _check
+        return _with_cost(_check, 0)
 
     @classmethod
     def relative_month_window(
@@ -399,7 +506,19 @@ class NoteFilterFactory:
                     return True
             return False
 
-        return _check
+        return _with_cost(_check, 3)
+
+
+@lru_cache(maxsize=None)
+def _factory_takes_context(method: str) -> bool:
+    return "context" in inspect.signature(getattr(NoteFilterFactory, method)).parameters
+
+
+def _guarded(base_condition: Predicate, predicate: Predicate) -> Predicate:
+    return _with_cost(
+        lambda visit: base_condition(visit) and predicate(visit),
+        _cost_of(base_condition) + _cost_of(predicate),
+    )
 
 
 class RuleBuilder:
@@ -421,29 +540,77 @@ class RuleBuilder:
         rule_factory = getattr(NoteFilterFactory, method)
 
         def wrapper(*args, **kwargs):
-            sig = inspect.signature(rule_factory)
-            if "context" in sig.parameters and "context" not in kwargs:
+            if "context" not in kwargs and _factory_takes_context(method):
                 kwargs["context"] = self.parent.context
 
             predicate = rule_factory(*args, **kwargs)
-
             if self.base_condition:
-                base_condition = self.base_condition
-                original_predicate = predicate
-
-                def composite_predicate(visit: NoteVisit) -> bool:
-                    return base_condition(visit) and original_predicate(visit)
+                predicate = _guarded(self.base_condition, predicate)
 
-                final_predicate = composite_predicate
-            else:
-                final_predicate = predicate
-
-            self.rules.append((final_predicate, self.target))
+            self.rules.append((predicate, self.target))
             return self.parent
 
         return wrapper
 
 
+@dataclass(slots=True)
+class CompiledChannel:
+    """
+    A decision channel flattened for evaluation.
+
+    Leading rules that agree with the default can never fire and are dropped.
+    Runs of consecutive rules with the same target commute (they or / and-not
+    the same decision), so each run is ordered cheapest first.
+    """
+
+    default: bool
+    steps: Tuple[Tuple[Predicate, bool], ...]
+
+    @classmethod
+    def compile(cls, rules: Sequence[Tuple[Predicate, bool]], default: bool) -> "CompiledChannel":
+        steps: List[Tuple[Predicate, bool]] = []
+        run: List[Tuple[Predicate, bool]] = []
+        for predicate, target in rules:
+            if not steps and not run and target == default:
+                continue
+            if run and run[0][1] != target:
+                steps.extend(sorted(run, key=lambda step: _cost_of(step[0])))
+                run = []
+            run.append((predicate, target))
+        steps.extend(sorted(run, key=lambda step: _cost_of(step[0])))
+        return cls(default=default, steps=tuple(steps))
+
+    def check(self, visit: NoteVisit) -> bool:
+        decision = self.default
+        for predicate, target in self.steps:
+            if decision != target and predicate(visit):
+                decision = target
+        return decision
+
+    def filter(self, visits: List[NoteVisit]) -> List[NoteVisit]:
+        """`[v for v in visits if self.check(v)]`, evaluated one rule at a time over all visits."""
+        decisions = bytearray([self.default]) * len(visits)
+        # Indexes of visits currently deciding False / True
+        sides: List[List[int]] = [[], []]
+        sides[self.default] = list(range(len(visits)))
+
+        for predicate, target in self.steps:
+            source = sides[not target]
+            if not source:
+                continue
+            stay: List[int] = []
+            moved: List[int] = []
+            for index in source:
+                (moved if predicate(visits[index]) else stay).append(index)
+            if moved:
+                sides[not target] = stay
+                sides[target].extend(moved)
+                for index in moved:
+                    decisions[index] = target
+
+        return [visit for visit, selected in zip(visits, decisions) if selected]
+
+
 class NoteWalker:
     """
     walker.py inspired note filtering engine.
@@ -464,6 +631,8 @@ class NoteWalker:
         self.default_select = select
         self.expand_rules: List[Tuple[Predicate, bool]] = []
         self.select_rules: List[Tuple[Predicate, bool]] = []
+        # id(rules) -> (rule count when compiled, compiled channel)
+        self._compiled: Dict[int, Tuple[int, CompiledChannel]] = {}
 
     @property
     def expand(self) -> RuleBuilder:
@@ -497,24 +666,26 @@ class NoteWalker:
     def exclude_seed(self) -> RuleBuilder:
         return RuleBuilder(self, self.select_rules, False, base_condition=NoteFilterFactory.is_seed())
 
+    def _channel(self, rules: List[Tuple[Predicate, bool]], default: bool) -> CompiledChannel:
+        # Builders only append, so the rule count tells whether the plan is stale
+        cached = self._compiled.get(id(rules))
+        if cached is None or cached[0] != len(rules) or cached[1].default != default:
+            cached = (len(rules), CompiledChannel.compile(rules, default))
+            self._compiled[id(rules)] = cached
+        return cached[1]
+
     def should_expand(self, visit: NoteVisit) -> bool:
-        return self._check(visit, self.expand_rules, default=self.default_expand)
+        return self._channel(self.expand_rules, self.default_expand).check(visit)
 
     def should_select(self, visit: NoteVisit) -> bool:
-        return self._check(visit, self.select_rules, default=self.default_select)
+        return self._channel(self.select_rules, self.default_select).check(visit)
 
     def _check(self, visit: NoteVisit, rules: List[Tuple[Predicate, bool]], *, default: bool) -> bool:
-        decision = default
-        for predicate, target_action in rules:
-            if decision == target_action:
-                continue
-            if predicate(visit):
-                decision = target_action
-        return decision
+        return self._channel(rules, default).check(visit)
 
-    def iter_all(self, note_ids: Optional[Iterable[str]] = None) -> Iterator[NoteVisit]:
+    def _iter_seed_visits(self, note_ids: Optional[Iterable[str]] = None) -> Iterator[NoteVisit]:
         for note in self.context.iter_notes(note_ids):
-            visit = NoteVisit(
+            yield NoteVisit(
                 node=note,
                 context=self.context,
                 depth=0,
@@ -522,11 +693,16 @@ class NoteWalker:
                 seed_id=str(note.id),
                 via_edge=None,
             )
-            if self.should_select(visit):
+
+    def iter_all(self, note_ids: Optional[Iterable[str]] = None) -> Iterator[NoteVisit]:
+        channel = self._channel(self.select_rules, self.default_select)
+        for visit in self._iter_seed_visits(note_ids):
+            if channel.check(visit):
                 yield visit
 
     def collect_all(self, note_ids: Optional[Iterable[str]] = None, *, include_edges: bool = False) -> NoteWalkResult:
-        visits = list(self.iter_all(note_ids))
+        channel = self._channel(self.select_rules, self.default_select)
+        visits = channel.filter(list(self._iter_seed_visits(note_ids)))
         return self._build_result(visits, include_edges=include_edges)
 
     def iter_graph(
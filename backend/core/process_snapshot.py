@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import psutil
+
+SNAPSHOT_ATTRS = ["pid", "name", "cmdline", "create_time", "exe", "memory_info", "cpu_percent"]
+DEFAULT_SNAPSHOT_TTL = 1.0
+
+
+def _basename(value: str) -> str:
+    return os.path.basename(value.replace("\\", "/")).lower()
+
+
+class ProcessSnapshot:
+    """
+    One `psutil.process_iter` pass over the system, indexed for cmdline matching.
+
+    - `by_pid`: pid -> psutil.Process (with `.info` populated from SNAPSHOT_ATTRS)
+    - token index: argv element -> pids whose cmdline contains it
+    - name index: lowercased process name / argv[0] basename -> pids
+    """
+
+    def __init__(self, processes: Iterable[psutil.Process], taken_at: Optional[float] = None):
+        self.taken_at = time.monotonic() if taken_at is None else taken_at
+        self.processes: List[psutil.Process] = []
+        self.by_pid: Dict[int, psutil.Process] = {}
+        self._by_token: Dict[str, List[int]] = {}
+        self._by_name: Dict[str, List[int]] = {}
+
+        for proc in processes:
+            info = getattr(proc, "info", None) or {}
+            pid = info.get("pid", proc.pid)
+            self.processes.append(proc)
+            self.by_pid[pid] = proc
+
+            cmdline = info.get("cmdline") or []
+            for token in set(cmdline):
+                self._by_token.setdefault(token, []).append(pid)
+
+            names = set()
+            if info.get("name"):
+                names.add(info["name"].lower())
+            if cmdline and cmdline[0]:
+                names.add(_basename(cmdline[0]))
+            for name in names:
+                self._by_name.setdefault(name, []).append(pid)
+
+    @classmethod
+    def take(cls) -> "ProcessSnapshot":
+        processes = []
+        try:
+            for proc in psutil.process_iter(SNAPSHOT_ATTRS):
+                processes.append(proc)
+        except Exception:
+            pass
+        return cls(processes)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.taken_at
+
+    def token_count(self, token: str) -> int:
+        return len(self._by_token.get(token, ()))
+
+    def with_all_tokens(self, tokens: Iterable[str]) -> List[psutil.Process]:
+        """Processes whose cmdline contains every token (candidate set, not a match)."""
+        tokens = list(dict.fromkeys(tokens))
+        if not tokens:
+            return []
+
+        postings = []
+        for token in tokens:
+            pids = self._by_token.get(token)
+            if not pids:
+                return []
+            postings.append(pids)
+
+        postings.sort(key=len)
+        candidate_pids = postings[0]
+        if len(postings) > 1:
+            others = [set(pids) for pids in postings[1:]]
+            candidate_pids = [pid for pid in candidate_pids if all(pid in other for other in others)]
+        return [self.by_pid[pid] for pid in candidate_pids]
+
+    def with_name_containing(self, fragment: str) -> List[psutil.Process]:
+        fragment = fragment.lower()
+        if not fragment:
+            return []
+        seen = set()
+        results = []
+        for name, pids in self._by_name.items():
+            if fragment not in name:
+                continue
+            for pid in pids:
+                if pid not in seen:
+                    seen.add(pid)
+                    results.append(self.by_pid[pid])
+        return results
+
+
+class ProcessSnapshotCache:
+    """Share one ProcessSnapshot between callers for a short TTL."""
+
+    def __init__(self, ttl: float = DEFAULT_SNAPSHOT_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ProcessSnapshot] = None
+
+    def get(self, max_age: Optional[float] = None) -> ProcessSnapshot:
+        limit = self.ttl if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age <= limit:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age <= limit:
+                return snapshot
+            snapshot = ProcessSnapshot.take()
+            self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+
+process_snapshots = ProcessSnapshotCache()
@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import os
+import selectors
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+
+@dataclass(frozen=True)
+class ProcessExit:
+    key: str
+    pid: int
+    started_at: Optional[float]
+    finished_at: float
+    returncode: Optional[int] = None
+
+
+ExitCallback = Callable[[ProcessExit], None]
+
+
+def _pidfd_supported() -> bool:
+    return sys.platform.startswith("linux") and hasattr(os, "pidfd_open")
+
+
+class _Watch:
+    __slots__ = ("key", "pid", "started_at", "popen", "proc", "fd", "cancelled")
+
+    def __init__(
+        self,
+        key: str,
+        proc: psutil.Process,
+        popen: Optional[subprocess.Popen],
+        started_at: Optional[float],
+    ) -> None:
+        self.key = key
+        self.pid = proc.pid
+        self.proc = proc
+        self.popen = popen
+        self.started_at = started_at
+        self.fd: Optional[int] = None
+        self.cancelled = False
+
+
+class ProcessSupervisor:
+    """
+    Learn about process exits as they happen instead of polling psutil.
+
+    - Linux: every watched pid gets a pidfd, and a single selector thread waits
+      on all of them. Children spawned by us are reaped through their Popen handle.
+    - Other platforms: one waiter thread per process (Popen.wait for children,
+      psutil.Process.wait for adopted pids).
+
+    `on_exit` is called from the supervisor thread with a ProcessExit event.
+    """
+
+    def __init__(self, on_exit: ExitCallback, *, use_pidfd: Optional[bool] = None):
+        self.on_exit = on_exit
+        self.use_pidfd = _pidfd_supported() if use_pidfd is None else use_pidfd
+        self._lock = threading.Lock()
+        self._watches: Dict[str, _Watch] = {}
+        self._pending: List[Tuple[str, _Watch]] = []
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._wake_r: Optional[int] = None
+        self._wake_w: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, key: str, proc: psutil.Process, popen: Optional[subprocess.Popen] = None) -> bool:
+        """
+        Start watching `proc` under `key`, replacing any previous watch for that key.
+        Returns False when the process is already gone.
+        """
+        with self._lock:
+            current = self._watches.get(key)
+            if current is not None and current.pid == proc.pid and not current.cancelled:
+                return True
+
+        try:
+            started_at = proc.create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            started_at = None
+
+        watch = _Watch(key, proc, popen, started_at)
+
+        if self.use_pidfd:
+            try:
+                watch.fd = os.pidfd_open(proc.pid)
+            except ProcessLookupError:
+                return False
+            except OSError:
+                watch.fd = None
+
+        with self._lock:
+            previous = self._watches.get(key)
+            if previous is not None:
+                self._cancel_locked(previous)
+            self._watches[key] = watch
+
+        if watch.fd is not None:
+            self._submit("register", watch)
+        else:
+            waiter = threading.Thread(target=self._wait_blocking, args=(watch,), daemon=True)
+            waiter.start()
+        return True
+
+    def unwatch(self, key: str) -> None:
+        with self._lock:
+            watch = self._watches.get(key)
+            if watch is not None:
+                self._cancel_locked(watch)
+
+    def is_watching(self, key: str, pid: Optional[int] = None) -> bool:
+        with self._lock:
+            watch = self._watches.get(key)
+            if watch is None or watch.cancelled:
+                return False
+            return pid is None or watch.pid == pid
+
+    def _cancel_locked(self, watch: _Watch) -> None:
+        watch.cancelled = True
+        if self._watches.get(watch.key) is watch:
+            del self._watches[watch.key]
+        if watch.fd is not None:
+            self._pending.append(("unregister", watch))
+            self._wake()
+
+    # --- Linux pidfd selector loop ---
+
+    def _ensure_selector_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._thread = threading.Thread(target=self._selector_loop, name="process-supervisor", daemon=True)
+        self._thread.start()
+
+    def _submit(self, op: str, watch: _Watch) -> None:
+        with self._lock:
+            self._ensure_selector_thread()
+            self._pending.append((op, watch))
+            self._wake()
+
+    def _wake(self) -> None:
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"\0")
+            except OSError:
+                pass
+
+    def _apply_pending(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        for op, watch in pending:
+            if watch.fd is None:
+                continue
+            if op == "register":
+                if watch.cancelled:
+                    self._close_fd(watch)
+                    continue
+                try:
+                    self._selector.register(watch.fd, selectors.EVENT_READ, watch)
+                except (KeyError, ValueError, OSError):
+                    pass
+            else:
+                self._close_fd(watch)
+
+    def _close_fd(self, watch: _Watch) -> None:
+        fd, watch.fd = watch.fd, None
+        if fd is None:
+            return
+        try:
+            self._selector.unregister(fd)
+        except (KeyError, ValueError):
+            pass
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+    def _selector_loop(self) -> None:
+        while True:
+            try:
+                events = self._selector.select()
+            except OSError:
+                time.sleep(0.1)
+                continue
+
+            for selector_key, _ in events:
+                watch = selector_key.data
+                if watch is None:
+                    try:
+                        while os.read(self._wake_r, 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    continue
+
+                self._close_fd(watch)
+                self._finish(watch, self._reap(watch))
+
+            self._apply_pending()
+
+    # --- Fallback ---
+
+    def _wait_blocking(self, watch: _Watch) -> None:
+        returncode = None
+        try:
+            if watch.popen is not None:
+                returncode = watch.popen.wait()
+            else:
+                returncode = watch.proc.wait()
+        except (psutil.NoSuchProcess, ChildProcessError):
+            pass
+        except Exception as e:
+            print(f"Process supervisor wait failed for pid {watch.pid}: {e}")
+        self._finish(watch, returncode)
+
+    # --- Shared ---
+
+    @staticmethod
+    def _reap(watch: _Watch) -> Optional[int]:
+        if watch.popen is None:
+            return None
+        try:
+            return watch.popen.poll()
+        except Exception:
+            return None
+
+    def _finish(self, watch: _Watch, returncode: Optional[int]) -> None:
+        with self._lock:
+            if watch.cancelled:
+                return
+            watch.cancelled = True
+            if self._watches.get(watch.key) is watch:
+                del self._watches[watch.key]
+
+        event = ProcessExit(
+            key=watch.key,
+            pid=watch.pid,
+            started_at=watch.started_at,
+            finished_at=time.time(),
+            returncode=returncode,
+        )
+        try:
+            self.on_exit(event)
+        except Exception as e:
+            print(f"Process exit callback error for {watch.key}: {e}")
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from backend.core.settings import get_settings
+
+
+class RemoteClientPool:
+    """
+    One pooled `httpx.AsyncClient` per remote device entry.
+
+    Connections to a node are kept alive between proxied calls, and
+    `max_connections` caps how many requests run against one node at once;
+    extra requests wait up to `pool_timeout` for a free connection.
+
+    A client is rebuilt when the entry's server_url or token changes, or when it
+    was created on another event loop (test clients run their own loop).
+    """
+
+    def __init__(
+        self,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 10.0,
+        pool_timeout: float = 10.0,
+        max_connections: int = 8,
+        max_keepalive: int = 4,
+        keepalive_expiry: float = 30.0,
+        max_body_bytes: int = 0,
+        gzip_responses: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=read_timeout,
+            pool=pool_timeout,
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # Cap on proxied response bodies, 0 for no limit
+        self.max_body_bytes = max_body_bytes
+        # Compress uncompressed text bodies for browsers that accept gzip
+        self.gzip_responses = gzip_responses
+        self.transport = transport
+        self._clients: Dict[str, Tuple[Tuple[str, str], asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+    def client_for(self, entry_id: str, base_url: str, token: str) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        key = (base_url, token)
+        cached = self._clients.get(entry_id)
+        if cached is not None:
+            cached_key, cached_loop, client = cached
+            if cached_key == key and cached_loop is loop and not client.is_closed:
+                return client
+            if cached_loop is loop and cached_loop.is_running():
+                loop.create_task(client.aclose())
+
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "X-Device-Token": token,
+            },
+            timeout=self.timeout,
+            limits=self.limits,
+            transport=self.transport,
+        )
+        self._clients[entry_id] = (key, loop, client)
+        return client
+
+    async def request(
+        self,
+        entry_id: str,
+        base_url: str,
+        token: str,
+        method: str,
+        path: str,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        client = self.client_for(entry_id, base_url, token)
+        return await client.request(method, path, **kwargs)
+
+    async def send(
+        self,
+        entry_id: str,
+        base_url: str,
+        token: str,
+        method: str,
+        path: str,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """Send a request and return as soon as headers arrive; the caller must `aclose()` the response."""
+        client = self.client_for(entry_id, base_url, token)
+        request = client.build_request(method, path, **kwargs)
+        return await client.send(request, stream=True)
+
+    async def discard(self, entry_id: str) -> None:
+        cached = self._clients.pop(entry_id, None)
+        if cached is not None and cached[1] is asyncio.get_running_loop():
+            await cached[2].aclose()
+
+    async def close(self) -> None:
+        loop = asyncio.get_running_loop()
+        clients, self._clients = self._clients, {}
+        for _, client_loop, client in clients.values():
+            if client_loop is loop:
+                await client.aclose()
+
+
+def _build_pool() -> RemoteClientPool:
+    settings = get_settings()
+    return RemoteClientPool(
+        connect_timeout=settings.remote_connect_timeout,
+        read_timeout=settings.remote_read_timeout,
+        pool_timeout=settings.remote_read_timeout,
+        max_connections=settings.remote_max_connections,
+        max_keepalive=settings.remote_keepalive_connections,
+        max_body_bytes=settings.remote_max_body_bytes,
+        gzip_responses=settings.remote_proxy_gzip,
+    )
+
+
+remote_clients = _build_pool()
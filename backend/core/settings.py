@@ -30,6 +30,20 @@ def _env_flag(name: str, default: bool) -> bool:
     return value.strip().lower() not in {"0", "false", "no", "off"}
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
 def _normalize_environment(value: str | None) -> str:
     normalized = (value or "development").strip().lower()
     aliases = {
@@ -47,6 +61,20 @@ def _split_csv(value: str | None) -> tuple[str, ...]:
     return tuple(item.strip() for item in value.split(",") if item.strip())
 
 
+def _parse_limits(value: str | None) -> tuple[tuple[str, int], ...]:
+    """Parse "group=limit,group=limit"; malformed items are ignored."""
+    limits = []
+    for item in _split_csv(value):
+        name, _, limit = item.partition("=")
+        try:
+            count = int(limit)
+        except ValueError:
+            continue
+        if name.strip() and count > 0:
+            limits.append((name.strip(), count))
+    return tuple(limits)
+
+
 def _resolve_path(value: str | None, default: Path) -> Path:
     raw = (value or "").strip()
     if not raw:
@@ -86,6 +114,29 @@ class Settings:
     bootstrap_admin_username: str
     bootstrap_admin_password: str
     bootstrap_admin_force_reset_password: bool
+    ws_log_queue_size: int = 1000
+    ws_send_timeout: float = 10.0
+    log_flush_interval: float = 0.05
+    log_batch_bytes: int = 64 * 1024
+    log_rotate_bytes: int = 10 * 1024 * 1024
+    log_generations: int = 5
+    log_compression: str = "gzip"
+    remote_connect_timeout: float = 5.0
+    remote_read_timeout: float = 10.0
+    remote_max_connections: int = 8
+    remote_keepalive_connections: int = 4
+    remote_max_body_bytes: int = 64 * 1024 * 1024
+    remote_proxy_gzip: bool = True
+    remote_fanout_deadline: float = 3.0
+    schedule_misfire_grace: int = 300
+    task_run_history: int = 200
+    task_max_running: int = 0
+    task_group_limits: tuple[tuple[str, int], ...] = ()
+    task_start_stagger: float = 0.0
+    task_queue_size: int = 1000
+    schedule_jitter: float = 0.0
+    note_graph_cache_users: int = 32
+    note_columnar_scan: bool = True
 
     @property
     def is_development(self) -> bool:
@@ -169,6 +220,29 @@ def load_settings() -> Settings:
             "CODEYUN_BOOTSTRAP_ADMIN_FORCE_RESET_PASSWORD",
             False,
         ),
+        ws_log_queue_size=max(1, _env_int("CODEYUN_WS_LOG_QUEUE_SIZE", 1000)),
+        ws_send_timeout=_env_float("CODEYUN_WS_SEND_TIMEOUT", 10.0),
+        log_flush_interval=max(0.001, _env_int("CODEYUN_LOG_FLUSH_INTERVAL_MS", 50) / 1000),
+        log_batch_bytes=max(1, _env_int("CODEYUN_LOG_BATCH_KB", 64)) * 1024,
+        log_rotate_bytes=max(1, _env_int("CODEYUN_LOG_ROTATE_MB", 10)) * 1024 * 1024,
+        log_generations=max(0, _env_int("CODEYUN_LOG_GENERATIONS", 5)),
+        log_compression=(os.getenv("CODEYUN_LOG_COMPRESSION") or "gzip").strip().lower() or "gzip",
+        remote_connect_timeout=_env_float("CODEYUN_REMOTE_CONNECT_TIMEOUT", 5.0),
+        remote_read_timeout=_env_float("CODEYUN_REMOTE_READ_TIMEOUT", 10.0),
+        remote_max_connections=max(1, _env_int("CODEYUN_REMOTE_MAX_CONNECTIONS", 8)),
+        remote_keepalive_connections=max(0, _env_int("CODEYUN_REMOTE_KEEPALIVE_CONNECTIONS", 4)),
+        remote_max_body_bytes=max(0, _env_int("CODEYUN_REMOTE_MAX_BODY_MB", 64)) * 1024 * 1024,
+        remote_proxy_gzip=_env_flag("CODEYUN_REMOTE_PROXY_GZIP", True),
+        remote_fanout_deadline=max(0.1, _env_float("CODEYUN_REMOTE_FANOUT_DEADLINE", 3.0)),
+        schedule_misfire_grace=max(0, _env_int("CODEYUN_SCHEDULE_MISFIRE_GRACE", 300)),
+        task_run_history=max(1, _env_int("CODEYUN_TASK_RUN_HISTORY", 200)),
+        task_max_running=max(0, _env_int("CODEYUN_TASK_MAX_RUNNING", 0)),
+        task_group_limits=_parse_limits(os.getenv("CODEYUN_TASK_GROUP_LIMITS")),
+        task_start_stagger=max(0, _env_int("CODEYUN_TASK_START_STAGGER_MS", 0)) / 1000,
+        task_queue_size=max(0, _env_int("CODEYUN_TASK_QUEUE_SIZE", 1000)),
+        schedule_jitter=max(0.0, _env_float("CODEYUN_SCHEDULE_JITTER", 0.0)),
+        note_graph_cache_users=max(0, _env_int("CODEYUN_NOTE_GRAPH_CACHE_USERS", 32)),
+        note_columnar_scan=_env_flag("CODEYUN_NOTE_COLUMNAR_SCAN", True),
     )
 
 
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import bisect
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from backend.core.settings import get_settings
+
+
+class AdmissionQueueFull(Exception):
+    """The admission queue is at capacity; the start is refused."""
+
+
+@dataclass(order=True)
+class _Ticket:
+    sort_key: Tuple[int, int]
+    task_id: str = field(compare=False)
+    group: Optional[str] = field(compare=False)
+    priority: int = field(compare=False)
+    start: Callable[[], Dict[str, Any]] = field(compare=False, repr=False)
+    queued_at: float = field(compare=False)
+    not_before: float = field(compare=False)
+
+
+class AdmissionController:
+    """
+    Admission in front of the local device's `start_task`.
+
+    At most `max_running` task processes run at once (0 for no limit), and at
+    most `group_limits[group]` of one task group. Starts over a limit wait in a
+    queue ordered by priority (higher first), then arrival. `stagger` spaces
+    consecutive starts, so schedules firing at the same minute do not all
+    spawn at once; callers may also delay a start (jitter).
+
+    A start that fits runs on the caller's thread and returns the device's
+    result. Otherwise `submit` returns {"status": "queued", ...} and a worker
+    thread runs it once a slot frees up. Slots are freed by `release` when a
+    process exits; `is_running` is polled as a fallback so a missed exit
+    callback cannot leak a slot.
+    """
+
+    def __init__(
+        self,
+        max_running: int = 0,
+        group_limits: Optional[Mapping[str, int]] = None,
+        stagger: float = 0.0,
+        max_queue: int = 0,
+        is_running: Optional[Callable[[str], bool]] = None,
+        poll_interval: float = 5.0,
+    ):
+        self.max_running = max_running
+        self.group_limits = dict(group_limits or {})
+        self.stagger = stagger
+        self.max_queue = max_queue
+        self.is_running = is_running
+        self.poll_interval = poll_interval
+
+        self.cond = threading.Condition()
+        # Admitted task id -> group; a slot is held until `release`
+        self.running: Dict[str, Optional[str]] = {}
+        # Slots reserved whose start() has not returned yet; the process may not exist yet
+        self.launching: Set[str] = set()
+        self.queue: List[_Ticket] = []
+        self.queued: Dict[str, _Ticket] = {}
+        self._seq = itertools.count()
+        self._last_start = 0.0
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self.waits: Deque[float] = deque(maxlen=200)
+        self.admitted = 0
+        self.rejected = 0
+
+    # --- Limits ---
+
+    def _group_count(self, group: Optional[str]) -> int:
+        return sum(1 for g in self.running.values() if g == group)
+
+    def _fits(self, group: Optional[str]) -> bool:
+        if self.max_running > 0 and len(self.running) >= self.max_running:
+            return False
+        limit = self.group_limits.get(group) if group else None
+        return not limit or self._group_count(group) < limit
+
+    def _stagger_wait(self, now: float) -> float:
+        if self.stagger <= 0:
+            return 0.0
+        return max(0.0, self._last_start + self.stagger - now)
+
+    def _prune(self) -> None:
+        """Free slots of processes that exited without a `release`."""
+        if self.is_running is None:
+            return
+        with self.cond:
+            task_ids = [task_id for task_id in self.running if task_id not in self.launching]
+        gone = []
+        for task_id in task_ids:
+            try:
+                if not self.is_running(task_id):
+                    gone.append(task_id)
+            except Exception:
+                continue
+        if gone:
+            with self.cond:
+                for task_id in gone:
+                    if task_id not in self.launching:
+                        self.running.pop(task_id, None)
+                self.cond.notify_all()
+
+    # --- Submitting ---
+
+    def submit(
+        self,
+        task_id: str,
+        start: Callable[[], Dict[str, Any]],
+        group: Optional[str] = None,
+        priority: int = 0,
+        delay: float = 0.0,
+    ) -> Dict[str, Any]:
+        if self.max_running > 0 or self.group_limits:
+            self._prune()
+
+        with self.cond:
+            ticket = self.queued.get(task_id)
+            if ticket is not None:
+                return {**self._queued_info(ticket), "status": "already_queued"}
+
+            now = time.time()
+            holds_slot = task_id in self.running
+            immediate = holds_slot or (
+                delay <= 0
+                and self._fits(group)
+                and self._stagger_wait(now) <= 0
+                and not self._ahead_of(priority, now)
+            )
+            if not immediate:
+                if self.max_queue > 0 and len(self.queue) >= self.max_queue:
+                    self.rejected += 1
+                    raise AdmissionQueueFull(f"Admission queue is full ({self.max_queue} waiting)")
+                ticket = _Ticket(
+                    sort_key=(-priority, next(self._seq)),
+                    task_id=task_id,
+                    group=group,
+                    priority=priority,
+                    start=start,
+                    queued_at=now,
+                    not_before=now + max(0.0, delay),
+                )
+                bisect.insort(self.queue, ticket)
+                self.queued[task_id] = ticket
+                self._ensure_worker()
+                self.cond.notify_all()
+                return {**self._queued_info(ticket), "status": "queued"}
+
+            if not holds_slot:
+                # Already running tasks keep their slot; the device reports already_running
+                self.running[task_id] = group
+                self.launching.add(task_id)
+                self._last_start = now
+
+        return self._launch(task_id, group, start, now, reserved=not holds_slot)
+
+    def _ahead_of(self, priority: int, now: float) -> bool:
+        """Whether a queued start that could run now should go before this one."""
+        return any(
+            t.priority >= priority and t.not_before <= now and self._fits(t.group)
+            for t in self.queue
+        )
+
+    def _launch(
+        self,
+        task_id: str,
+        group: Optional[str],
+        start: Callable[[], Dict[str, Any]],
+        queued_at: float,
+        reserved: bool = True,
+    ) -> Dict[str, Any]:
+        try:
+            result = start()
+        except Exception:
+            if reserved:
+                with self.cond:
+                    self.launching.discard(task_id)
+                self.release(task_id)
+            raise
+
+        with self.cond:
+            if reserved:
+                self.launching.discard(task_id)
+            self.admitted += 1
+            self.waits.append(max(0.0, time.time() - queued_at))
+            if reserved and result.get("status") != "started":
+                # Nothing was spawned (already running elsewhere): give the slot back
+                self.running.pop(task_id, None)
+                self.cond.notify_all()
+        return result
+
+    def release(self, task_id: str) -> None:
+        with self.cond:
+            self.running.pop(task_id, None)
+            self.cond.notify_all()
+
+    def cancel(self, task_id: str) -> bool:
+        """Drop a queued start. Returns False if the task was not queued."""
+        with self.cond:
+            ticket = self.queued.pop(task_id, None)
+            if ticket is None:
+                return False
+            self.queue.remove(ticket)
+            self.cond.notify_all()
+            return True
+
+    # --- Worker ---
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or not self._worker.is_alive():
+            self._closed = False
+            self._worker = threading.Thread(target=self._run, name="task-admission", daemon=True)
+            self._worker.start()
+
+    def _next_ready(self, now: float) -> Tuple[Optional[_Ticket], Optional[float]]:
+        """The next ticket to start, or how long to wait before looking again."""
+        if not self.queue:
+            return None, None
+        wait = self._stagger_wait(now)
+        if wait > 0:
+            return None, wait
+
+        wake: Optional[float] = None
+        for ticket in self.queue:
+            if ticket.not_before > now:
+                delay = ticket.not_before - now
+                wake = delay if wake is None else min(wake, delay)
+                continue
+            if self._fits(ticket.group):
+                return ticket, None
+
+        # Blocked on running slots: their exit normally wakes us, polling is a fallback
+        if self.is_running is not None:
+            wake = self.poll_interval if wake is None else min(wake, self.poll_interval)
+        return None, wake
+
+    def _run(self) -> None:
+        while True:
+            self._prune()
+            with self.cond:
+                if self._closed:
+                    return
+                if not self.queue:
+                    # Idle; the next queued start brings up a new worker
+                    self._worker = None
+                    return
+                now = time.time()
+                ticket, wait = self._next_ready(now)
+                if ticket is None:
+                    self.cond.wait(wait)
+                    continue
+                self.queue.remove(ticket)
+                del self.queued[ticket.task_id]
+                self.running[ticket.task_id] = ticket.group
+                self.launching.add(ticket.task_id)
+                self._last_start = now
+
+            try:
+                self._launch(ticket.task_id, ticket.group, ticket.start, ticket.queued_at)
+            except Exception as e:
+                print(f"Queued start of task {ticket.task_id} failed: {e}")
+
+    def close(self) -> None:
+        with self.cond:
+            self._closed = True
+            self.cond.notify_all()
+        worker = self._worker
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout=5)
+
+    # --- Reporting ---
+
+    def _queued_info(self, ticket: _Ticket) -> Dict[str, Any]:
+        return {
+            "queue_position": self.queue.index(ticket) + 1,
+            "queued_at": ticket.queued_at,
+            "not_before": ticket.not_before,
+        }
+
+    def queued_info(self, task_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        with self.cond:
+            return {
+                task_id: self._queued_info(self.queued[task_id])
+                for task_id in task_ids
+                if task_id in self.queued
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self.cond:
+            groups: Dict[str, Dict[str, Any]] = {}
+            for group, limit in self.group_limits.items():
+                groups[group] = {"limit": limit, "running": 0, "queued": 0}
+            for group in self.running.values():
+                if group:
+                    groups.setdefault(group, {"limit": None, "running": 0, "queued": 0})["running"] += 1
+            for ticket in self.queue:
+                if ticket.group:
+                    groups.setdefault(ticket.group, {"limit": None, "running": 0, "queued": 0})["queued"] += 1
+            waits = list(self.waits)
+            return {
+                "max_running": self.max_running or None,
+                "running": len(self.running),
+                "queue_depth": len(self.queue),
+                "oldest_wait": max((now - t.queued_at for t in self.queue), default=0.0),
+                "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                "max_wait": max(waits, default=0.0),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "stagger": self.stagger,
+                "groups": groups,
+                "queue": [
+                    {"task_id": t.task_id, "group": t.group, "priority": t.priority, **self._queued_info(t)}
+                    for t in self.queue
+                ],
+            }
+
+
+def build_admission(is_running: Optional[Callable[[str], bool]] = None) -> AdmissionController:
+    settings = get_settings()
+    return AdmissionController(
+        max_running=settings.task_max_running,
+        group_limits=dict(settings.task_group_limits),
+        stagger=settings.task_start_stagger,
+        max_queue=settings.task_queue_size,
+        is_running=is_running,
+    )
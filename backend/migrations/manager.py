@@ -283,6 +283,54 @@ def v8_backfill_userdevice_entries(session: Session):
     print("Running System Upgrade V8: Backfill user device assets...")
     v7_migrate_userdevice_entries(session)
 
+
+def v9_add_task_schedule_policy(session: Session):
+    """
+    Migration V9: Add per-task 'misfire_grace_time' and 'coalesce' columns.
+    The taskrun table is new and is created by create_all.
+    """
+    print("Running System Upgrade V9: Add task schedule policy...")
+    res = session.exec(text("PRAGMA table_info(task)")).all()
+    columns = [row[1] for row in res]
+
+    if "misfire_grace_time" not in columns:
+        session.exec(text("ALTER TABLE task ADD COLUMN misfire_grace_time INTEGER"))
+    if "coalesce" not in columns:
+        session.exec(text("ALTER TABLE task ADD COLUMN coalesce BOOLEAN DEFAULT 1"))
+    session.commit()
+
+
+def v10_add_task_admission(session: Session):
+    """
+    Migration V10: Add per-task 'concurrency_group' and 'priority' columns and
+    taskrun 'queued_at'.
+    """
+    print("Running System Upgrade V10: Add task admission columns...")
+    res = session.exec(text("PRAGMA table_info(task)")).all()
+    columns = [row[1] for row in res]
+
+    if "concurrency_group" not in columns:
+        session.exec(text("ALTER TABLE task ADD COLUMN concurrency_group VARCHAR"))
+    if "priority" not in columns:
+        session.exec(text("ALTER TABLE task ADD COLUMN priority INTEGER DEFAULT 0"))
+
+    res = session.exec(text("PRAGMA table_info(taskrun)")).all()
+    columns = [row[1] for row in res]
+    if columns and "queued_at" not in columns:
+        session.exec(text("ALTER TABLE taskrun ADD COLUMN queued_at FLOAT"))
+    session.commit()
+
+
+def v11_add_note_graph_indexes(session: Session):
+    """
+    Migration V11: Index notes by (user_id, updated_at) and edges by
+    (user_id, created_at), so the note graph cache can check a user's graph cheaply.
+    """
+    print("Running System Upgrade V11: Add note graph indexes...")
+    session.exec(text("CREATE INDEX IF NOT EXISTS ix_notenode_user_updated ON notenode (user_id, updated_at)"))
+    session.exec(text("CREATE INDEX IF NOT EXISTS ix_noteedge_user_created ON noteedge (user_id, created_at)"))
+    session.commit()
+
 # --- Migration Registry ---
 # List of (version, description, function)
 MIGRATIONS = [
@@ -294,6 +342,9 @@ MIGRATIONS = [
     (6, "Add private_level column", v6_add_private_level),
     (7, "Migrate user device assets to userdeviceentry", v7_migrate_userdevice_entries),
     (8, "Backfill user device assets into userdeviceentry", v8_backfill_userdevice_entries),
+    (9, "Add task schedule policy columns", v9_add_task_schedule_policy),
+    (10, "Add task admission columns", v10_add_task_admission),
+    (11, "Add note graph indexes", v11_add_note_graph_indexes),
 ]
 
 def get_current_version(session: Session) -> int:
@@ -1,6 +1,6 @@
 from typing import Optional, List
 from sqlmodel import Field, SQLModel, Relationship
-from sqlalchemy import Column, JSON, String
+from sqlalchemy import Column, Index, JSON, String
 import time
 import socket
 import uuid
@@ -60,10 +60,36 @@ class Task(SQLModel, table=True):
     device_id: str = Field(index=True) # Removed foreign key to device table
     schedule: Optional[str] = None 
     timeout: Optional[int] = None 
+    # Seconds a missed scheduled run may still start late; None uses the default, 0 means no limit
+    misfire_grace_time: Optional[int] = None
+    # Run missed scheduled runs once instead of once per missed fire time
+    coalesce: bool = Field(default=True)
+    # Tasks of one group share that group's concurrency limit
+    concurrency_group: Optional[str] = None
+    # Queued starts with a higher priority are admitted first
+    priority: int = Field(default=0)
     order: Optional[int] = Field(default=0)
     created_at: float = Field(default_factory=time.time)
 
 
+class TaskRun(SQLModel, table=True):
+    """One start of a task, scheduled or manual, and how it ended."""
+    __table_args__ = {'extend_existing': True}
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    task_id: str = Field(index=True)
+    trigger: str = Field(default="manual")  # 'schedule' or 'manual'
+    scheduled_at: Optional[float] = None
+    # When the start was requested; earlier than started_at if it waited in the admission queue
+    queued_at: Optional[float] = None
+    started_at: Optional[float] = Field(default=None, index=True)
+    finished_at: Optional[float] = None
+    # queued, running, succeeded, failed, finished (exit code unknown), stopped, skipped, missed, cancelled, error
+    status: str = Field(default="running")
+    pid: Optional[int] = None
+    exit_code: Optional[int] = None
+    message: Optional[str] = None
+
+
 class TaskRuntime(SQLModel, table=True):
     __table_args__ = {'extend_existing': True}
     task_id: str = Field(primary_key=True)
@@ -83,7 +109,11 @@ class AppSetting(SQLModel, table=True):
 # --- Note Models ---
 
 class NoteNode(SQLModel, table=True):
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Per-user count / newest-update lookups for the note graph cache
+        Index("ix_notenode_user_updated", "user_id", "updated_at"),
+        {'extend_existing': True},
+    )
     id: Optional[str] = Field(default=None, primary_key=True) # Using UUID string usually, or int? Frontend used string timestamp. Let's use string for flexibility.
     user_id: int = Field(foreign_key="user.id", index=True)
     title: Optional[str] = Field(default="Untitled")
@@ -118,7 +148,10 @@ class NoteEdge(SQLModel, table=True):
     """
     Directed edge between two NoteNodes.
     """
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index("ix_noteedge_user_created", "user_id", "created_at"),
+        {'extend_existing': True},
+    )
     id: Optional[str] = Field(default=None, primary_key=True) # UUID
     user_id: int = Field(foreign_key="user.id", index=True)
     
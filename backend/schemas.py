@@ -248,6 +248,27 @@ class NoteProgramRequest(BaseModel):
     executor: NoteProgramExecutor = Field(default_factory=NoteProgramExecutor)
     program: NoteProgramChannels = Field(default_factory=NoteProgramChannels)
     result: NoteProgramResultOptions = Field(default_factory=NoteProgramResultOptions)
+    # Return the query plan (which rules were pushed down to SQL) with the result
+    explain: bool = False
+
+
+class NoteProgramPlanRuleRead(BaseModel):
+    channel: Literal["select", "expand"]
+    index: int
+    action: Literal["include", "exclude"]
+    kind: str
+    pushed: bool
+    reason: Optional[str] = None
+
+
+class NoteProgramPlanRead(BaseModel):
+    executor: str
+    engine: str = "row"
+    pushdown: bool
+    empty: bool
+    prefilter: Optional[str] = None
+    candidates: Optional[int] = None
+    rules: List[NoteProgramPlanRuleRead] = Field(default_factory=list)
 
 
 class NoteProgramResponse(BaseModel):
@@ -255,6 +276,7 @@ class NoteProgramResponse(BaseModel):
     edges: List[EdgeRead]
     total_nodes: int
     total_edges: int
+    plan: Optional[NoteProgramPlanRead] = None
 
 
 class NoteBatchPatch(BaseModel):
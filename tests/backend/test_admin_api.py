@@ -23,3 +23,31 @@ def test_device_control_identity_hides_device_token(client):
     assert "data_dir" in payload
     assert "device_token" not in payload
 
+
+
+def test_fix_links_rewrites_only_affected_notes(client, session, tmp_path, monkeypatch):
+    from backend.api import admin
+    from backend.models import NoteNode
+
+    (tmp_path / "abc.webp").write_bytes(b"x")
+    monkeypatch.setattr(admin, "ATTACHMENTS_ABS_PATH", str(tmp_path))
+    session.add(NoteNode(id="broken", user_id=1, title="t", content='<img src="/static/uploads/abc.png">',
+                         updated_at=123.0, history=[], custom_fields=[]))
+    session.add(NoteNode(id="plain", user_id=1, title="p", content="no links", updated_at=456.0,
+                         history=[], custom_fields=[]))
+    session.commit()
+
+    app.dependency_overrides[get_current_active_superuser] = lambda: User(
+        id=1, username="admin", hashed_password="pw", is_active=True, is_superuser=True,
+    )
+    try:
+        resp = client.post("/api/admin/storage/fix-links")
+    finally:
+        app.dependency_overrides.pop(get_current_active_superuser, None)
+
+    assert resp.status_code == 200
+    assert resp.json()["fixed_notes_count"] == 1
+    broken = session.get(NoteNode, "broken")
+    session.refresh(broken)
+    assert "abc.webp" in broken.content
+    assert broken.updated_at == 123.0
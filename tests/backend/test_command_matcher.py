@@ -0,0 +1,60 @@
+import random
+
+from backend.core.command_matcher import CommandMatcher
+
+
+def _naive_match(target_args, cmdline):
+    n = len(target_args)
+    if not target_args or len(cmdline) < n:
+        return False
+    for i in range(len(cmdline) - n + 1):
+        if cmdline[i:i + n] == target_args:
+            return True
+    if target_args[0].startswith("python") or target_args[0].endswith("python"):
+        rest = target_args[1:]
+        if not rest:
+            return False
+        for i in range(len(cmdline) - len(rest) + 1):
+            if cmdline[i:i + len(rest)] == rest:
+                return True
+    return False
+
+
+def test_compile_is_cached_and_picks_anchor():
+    matcher = CommandMatcher.compile("python -u worker.py --queue default")
+
+    assert CommandMatcher.compile("python -u worker.py --queue default") is matcher
+    assert matcher.required == ("-u", "worker.py", "--queue", "default")
+    assert matcher.anchor == "worker.py"
+
+
+def test_python_interpreter_relaxation():
+    matcher = CommandMatcher.compile("python worker.py --port 8000")
+
+    assert matcher.matches(["/usr/bin/python3", "worker.py", "--port", "8000"])
+    assert not matcher.matches(["/usr/bin/python3", "worker.py", "--port", "8001"])
+    assert not matcher.matches(["worker.py", "--port", "8000"])
+    assert not CommandMatcher.compile("python").matches(["/usr/bin/python3", "x.py"])
+
+
+def test_matches_agree_with_sliding_window():
+    rng = random.Random(7)
+    alphabet = ["python", "a", "b", "a.py", "-x"]
+
+    for _ in range(2000):
+        target = [rng.choice(alphabet) for _ in range(rng.randint(1, 4))]
+        cmdline = [rng.choice(alphabet) for _ in range(rng.randint(0, 8))]
+        matcher = CommandMatcher.compile(" ".join(target))
+        assert matcher.matches(cmdline) == _naive_match(target, cmdline), (target, cmdline)
+
+
+def test_match_many_uses_process_info():
+    class Proc:
+        def __init__(self, pid, cmdline):
+            self.pid = pid
+            self.info = {"pid": pid, "cmdline": cmdline}
+
+    procs = [Proc(1, ["node", "app.js"]), Proc(2, None), Proc(3, ["node", "app.js", "--dev"])]
+    matched = CommandMatcher.compile("node app.js").match_many(procs)
+
+    assert [p.pid for p in matched] == [1, 3]
@@ -1,6 +1,45 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.core.remote_clients import RemoteClientPool, remote_clients
 from backend.models import UserDevice
 
 
+class _Body(httpx.AsyncByteStream):
+    """Response body that is only available as a stream, like one read off a socket."""
+
+    def __init__(self, *chunks):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _remote_response(*chunks, content_type="application/json", length=True):
+    headers = {"content-type": content_type}
+    if length:
+        headers["content-length"] = str(sum(len(chunk) for chunk in chunks))
+    return httpx.Response(200, headers=headers, stream=_Body(*chunks))
+
+
+def _add_remote_entry(session, auth_user, device_id):
+    entry = UserDevice(
+        user_id=auth_user.id,
+        device_id=device_id,
+        mode="remote",
+        name="Remote Device",
+        server_url="http://remote-device:8000",
+        token="remote-token",
+    )
+    session.add(entry)
+    session.commit()
+    session.refresh(entry)
+    return entry
+
+
 def test_local_entry_proxy_create_and_list_tasks(client, auth_user, test_device):
     entry_resp = client.post(
         "/api/devices/add",
@@ -48,27 +87,15 @@ def test_remote_entry_proxy_forwards_request(client, session, auth_user, monkeyp
 
     captured = {}
 
-    class FakeResponse:
-        status_code = 200
-        headers = {"content-type": "application/json"}
-
-        def json(self):
-            return [{"id": "task-1", "name": "Remote Task", "status": {"running": False}}]
+    def handler(request):
+        captured["method"] = request.method
+        captured["url"] = str(request.url)
+        captured["headers"] = request.headers
+        captured["timeout"] = request.extensions["timeout"]
+        return _remote_response(b'[{"id": "task-1", "name": "Remote Task", "status": {"running": false}}]')
 
-        @property
-        def content(self):
-            return b'[]'
-
-    def fake_request(method, url, headers=None, params=None, json=None, timeout=None):
-        captured["method"] = method
-        captured["url"] = url
-        captured["headers"] = headers
-        captured["params"] = params
-        captured["json"] = json
-        captured["timeout"] = timeout
-        return FakeResponse()
-
-    monkeypatch.setattr("backend.api.device_entries.requests.request", fake_request)
+    monkeypatch.setattr(remote_clients, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(remote_clients, "_clients", {})
 
     resp = client.get(f"/api/device-entries/{entry.entry_id}/task/")
     assert resp.status_code == 200
@@ -78,4 +105,136 @@ def test_remote_entry_proxy_forwards_request(client, session, auth_user, monkeyp
     assert captured["url"] == "http://remote-device:8000/api/task/"
     assert captured["headers"]["Authorization"] == "Bearer remote-token"
     assert captured["headers"]["X-Device-Token"] == "remote-token"
-    assert captured["timeout"] == 10
+    assert captured["timeout"]["read"] == 10
+
+
+def test_remote_entry_proxy_maps_errors_and_plain_responses(client, session, auth_user, monkeypatch):
+    entry = _add_remote_entry(session, auth_user, "remote-device-2")
+
+    seen = []
+
+    def handler(request):
+        seen.append(str(request.url))
+        if request.url.path.endswith("/logs"):
+            return _remote_response(b"plain", content_type="text/plain")
+        raise httpx.ConnectError("refused", request=request)
+
+    monkeypatch.setattr(remote_clients, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(remote_clients, "_clients", {})
+
+    first = client.get(f"/api/device-entries/{entry.entry_id}/task/t1/logs", params={"n": 5})
+    assert first.status_code == 200
+    assert first.text == "plain"
+    assert seen[0] == "http://remote-device:8000/api/task/t1/logs?n=5"
+
+    failed = client.get(f"/api/device-entries/{entry.entry_id}/task/")
+    assert failed.status_code == 502
+
+
+def test_remote_client_pool_reuses_client_per_entry():
+    pool = RemoteClientPool(transport=httpx.MockTransport(lambda request: httpx.Response(204)))
+
+    async def scenario():
+        first = pool.client_for("e1", "http://a:8000", "t")
+        assert pool.client_for("e1", "http://a:8000", "t") is first
+        assert pool.client_for("e2", "http://a:8000", "t") is not first
+        rotated = pool.client_for("e1", "http://a:8000", "new-token")
+        assert rotated is not first
+        assert rotated.headers["X-Device-Token"] == "new-token"
+        resp = await pool.request("e1", "http://a:8000", "new-token", "GET", "/api/task/")
+        assert resp.status_code == 204
+        await pool.close()
+        assert rotated.is_closed
+
+    asyncio.run(scenario())
+
+
+def test_remote_entry_proxy_streams_gzip_and_caps_body(client, session, auth_user, monkeypatch):
+    entry = _add_remote_entry(session, auth_user, "remote-device-3")
+    line = b'{"type": "match", "line": "error"}\n'
+    accepted = []
+
+    def handler(request):
+        accepted.append(request.headers["accept-encoding"])
+        if request.url.path.endswith("/search"):
+            return _remote_response(*[line] * 20, content_type="application/x-ndjson", length=False)
+        return _remote_response(b"x" * 1000, content_type="text/plain")
+
+    monkeypatch.setattr(remote_clients, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(remote_clients, "_clients", {})
+    monkeypatch.setattr(remote_clients, "max_body_bytes", len(line) * 25)
+
+    resp = client.get(
+        f"/api/device-entries/{entry.entry_id}/task/t1/logs/search",
+        params={"q": "error"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    assert resp.text.count("match") == 20
+    assert accepted[-1] == "gzip"
+
+    too_big = client.get(f"/api/device-entries/{entry.entry_id}/task/t1/logs", headers={"Accept-Encoding": "identity"})
+    assert too_big.status_code == 502
+    assert accepted[-1] == "identity"
+
+
+def test_remote_entry_proxy_aborts_chunked_body_over_limit(client, session, auth_user, monkeypatch):
+    entry = _add_remote_entry(session, auth_user, "remote-device-4")
+    line = b'{"type": "match", "line": "error"}\n'
+
+    def handler(request):
+        return _remote_response(*[line] * 50, content_type="application/x-ndjson", length=False)
+
+    monkeypatch.setattr(remote_clients, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(remote_clients, "_clients", {})
+    monkeypatch.setattr(remote_clients, "max_body_bytes", len(line) * 10)
+
+    # No Content-Length to refuse up front: the stream is aborted, not cut short and completed
+    for encoding in ("gzip", "identity"):
+        with pytest.raises(RuntimeError, match="exceeds"):
+            client.get(
+                f"/api/device-entries/{entry.entry_id}/task/t1/logs/search",
+                params={"q": "error"},
+                headers={"Accept-Encoding": encoding},
+            )
+
+
+def test_all_entry_tasks_fan_out_and_fall_back_to_last_good(client, session, auth_user, test_device, monkeypatch):
+    local_resp = client.post("/api/devices/add", json={"mode": "local", "token": "local-entry-token", "alias": "当前机器"})
+    local_id = local_resp.json()["id"]
+    flaky = _add_remote_entry(session, auth_user, "remote-flaky")
+    slow = _add_remote_entry(session, auth_user, "remote-slow")
+    slow.server_url = "http://slow-device:8000"
+    session.add(slow)
+    session.commit()
+
+    failing = {"flaky": False}
+
+    async def handler(request):
+        if request.url.host == "slow-device":
+            await asyncio.sleep(1)
+            return _remote_response(b"[]")
+        if failing["flaky"]:
+            return httpx.Response(500, json={"detail": "boom"})
+        return _remote_response(b'[{"id": "r1", "name": "Remote Task"}]')
+
+    monkeypatch.setattr(remote_clients, "transport", httpx.MockTransport(handler))
+    monkeypatch.setattr(remote_clients, "_clients", {})
+
+    first = client.get("/api/device-entries/tasks", params={"timeout": 0.2}).json()
+    nodes = {node["entry_id"]: node for node in first["nodes"]}
+    assert first["partial"] is True
+    assert nodes[local_id]["state"] == "ok"
+    assert nodes[flaky.entry_id]["state"] == "ok"
+    assert nodes[flaky.entry_id]["tasks"][0]["name"] == "Remote Task"
+    assert nodes[slow.entry_id]["state"] == "error"
+    assert nodes[slow.entry_id]["tasks"] == []
+
+    failing["flaky"] = True
+    second = client.get("/api/device-entries/tasks", params={"timeout": 0.2}).json()
+    node = next(node for node in second["nodes"] if node["entry_id"] == flaky.entry_id)
+    assert node["state"] == "stale"
+    assert node["error"] == "Remote device returned 500"
+    assert node["tasks"][0]["name"] == "Remote Task"
+    assert node["fetched_at"] == nodes[flaky.entry_id]["fetched_at"]
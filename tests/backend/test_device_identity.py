@@ -1,3 +1,4 @@
+import os
 import json
 from pathlib import Path
 
@@ -117,3 +118,55 @@ def test_device_id_migrates_local_records_and_clears_legacy_dir(monkeypatch, tmp
     assert legacy_tasks == []
     assert not (data_dir / old_id).exists()
     assert list((data_dir / "backups").glob("device-id-migration-*"))
+
+
+def test_device_id_is_cached_and_not_rewritten(monkeypatch, tmp_path):
+    _patch_identity_paths(monkeypatch, tmp_path)
+    monkeypatch.setattr(
+        device_module,
+        "_machine_identity_seed",
+        lambda: ("linux_machine_id", "machine-id-cached"),
+    )
+
+    first_id = device_module.get_device_id()
+
+    saves = []
+    monkeypatch.setattr(device_module, "_save_machine_identity", lambda **kwargs: saves.append(kwargs))
+    loads = []
+    original_load = device_module._load_machine_identity
+    monkeypatch.setattr(
+        device_module,
+        "_load_machine_identity",
+        lambda: loads.append(1) or original_load(),
+    )
+
+    for _ in range(5):
+        assert device_module.get_device_id() == first_id
+
+    assert loads == []
+    assert saves == []
+
+    # An explicit refresh re-reads the identity but does not rewrite an unchanged file.
+    assert device_module.device_identity.refresh() == first_id
+    assert loads
+    assert saves == []
+
+
+def test_device_id_picks_up_external_identity_edit(monkeypatch, tmp_path):
+    _patch_identity_paths(monkeypatch, tmp_path)
+    monkeypatch.setattr(
+        device_module,
+        "_machine_identity_seed",
+        lambda: ("linux_machine_id", "machine-id-edit"),
+    )
+
+    first_id = device_module.get_device_id()
+    identity_file = Path(device_module.MACHINE_IDENTITY_FILE)
+    payload = json.loads(identity_file.read_text(encoding="utf-8"))
+    payload["device_id"] = "edited-device-id"
+    identity_file.write_text(json.dumps(payload), encoding="utf-8")
+    stat = identity_file.stat()
+    os.utime(identity_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert first_id != "edited-device-id"
+    assert device_module.get_device_id() == "edited-device-id"
@@ -0,0 +1,49 @@
+import backend.core.auth as auth_module
+from backend.core.auth import DeviceTokenVerifier
+
+
+def test_verifier_caches_decisions_until_expected_token_changes(monkeypatch):
+    verifier = DeviceTokenVerifier(maxsize=4, ttl=60)
+    compares = []
+    original_compare = auth_module.hmac.compare_digest
+
+    def counting_compare(a, b):
+        compares.append(1)
+        return original_compare(a, b)
+
+    monkeypatch.setattr(auth_module.hmac, "compare_digest", counting_compare)
+
+    assert verifier.verify("secret", "secret") is True
+    assert verifier.verify("secret", "secret") is True
+    assert verifier.verify("wrong", "secret") is False
+    assert verifier.verify("wrong", "secret") is False
+    assert len(compares) == 2
+
+    # Rotating the configured token drops every cached decision.
+    assert verifier.verify("secret", "rotated") is False
+    assert verifier.verify("rotated", "rotated") is True
+    assert len(compares) == 4
+
+
+def test_verifier_is_bounded():
+    verifier = DeviceTokenVerifier(maxsize=2, ttl=60)
+    for index in range(5):
+        verifier.verify(f"token-{index}", "secret")
+    assert len(verifier._decisions) == 2
+
+
+def test_verifier_expires_entries():
+    verifier = DeviceTokenVerifier(maxsize=4, ttl=0)
+    assert verifier.verify("secret", "secret") is True
+    assert verifier.verify("secret", "secret") is True
+    assert verifier.verify("other", "secret") is False
+
+
+def test_task_list_accepts_valid_device_token_repeatedly(client, test_device):
+    headers = {"X-Device-Token": test_device["token"]}
+    for _ in range(3):
+        response = client.get("/api/task/", headers=headers)
+        assert response.status_code == 200
+
+    response = client.get("/api/task/", headers={"X-Device-Token": "bad-token"})
+    assert response.status_code == 401
@@ -0,0 +1,74 @@
+import io
+import threading
+import time
+
+from backend.core.log_batcher import LogBatcher
+
+
+def test_batches_lines_into_single_write_and_frame():
+    out = io.StringIO()
+    frames = []
+    batcher = LogBatcher("t1", out, lambda task_id, lines, dropped: frames.append((task_id, lines, dropped)),
+                         flush_interval=0.2).start()
+
+    for i in range(1000):
+        batcher.add(f"line {i}\n")
+    batcher.close(timeout=5)
+
+    assert out.getvalue() == "".join(f"line {i}\n" for i in range(1000))
+    assert sum(len(lines) for _, lines, _ in frames) == 1000
+    assert len(frames) <= 2
+    assert batcher.dropped == 0
+
+
+def test_flushes_on_batch_size_before_interval():
+    out = io.StringIO()
+    flushed = threading.Event()
+    batcher = LogBatcher("t1", out, lambda *args: flushed.set(), flush_interval=10, batch_bytes=100).start()
+
+    batcher.add("x" * 150 + "\n")
+    assert flushed.wait(2)
+    batcher.close(timeout=5)
+
+
+def test_busy_watchers_are_counted_and_reported():
+    out = io.StringIO()
+    calls = []
+
+    def callback(task_id, lines, dropped):
+        calls.append((list(lines), dropped))
+        return len(calls) > 1
+
+    batcher = LogBatcher("t1", out, callback, flush_interval=0.01).start()
+    batcher.add("a\n")
+    batcher.add("b\n")
+    time.sleep(0.2)
+    batcher.add("c\n")
+    batcher.close(timeout=5)
+
+    assert calls == [(["a\n", "b\n"], 0), (["c\n"], 2)]
+    assert batcher.dropped == 2
+    assert out.getvalue() == "a\nb\nc\n"
+
+
+def test_full_buffer_blocks_reader():
+    out = io.StringIO()
+    release = threading.Event()
+    batcher = LogBatcher("t1", out, lambda *args: release.wait(5), flush_interval=0.01,
+                         batch_bytes=10, max_buffer_bytes=20).start()
+
+    batcher.add("0123456789\n")  # taken by the flusher, which then blocks in the callback
+    time.sleep(0.1)
+    batcher.add("0123456789\n")
+    batcher.add("0123456789\n")
+
+    blocked = threading.Thread(target=batcher.add, args=("last\n",))
+    blocked.start()
+    time.sleep(0.1)
+    assert blocked.is_alive()
+
+    release.set()
+    blocked.join(5)
+    assert not blocked.is_alive()
+    batcher.close(timeout=5)
+    assert out.getvalue().endswith("last\n")
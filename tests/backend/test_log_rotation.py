@@ -0,0 +1,87 @@
+import gzip
+import os
+
+from backend.core.log_batcher import LogBatcher
+from backend.core.log_rotation import RunManifest, begin_run, finish_run, list_runs, read_run_logs, rotate_log
+
+
+def _start_run(path, started_at, body):
+    begin_run(path, started_at)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(f"\n--- Starting task at 2024-01-01 00:00:0{started_at} ---\n")
+        f.write(body)
+
+
+def test_runs_are_read_across_rotated_segments(tmp_path):
+    path = str(tmp_path / "t.log")
+    _start_run(path, 1, "run1 a\nrun1 b\n")
+    finish_run(path, 1.5)
+    _start_run(path, 2, "run2 a\n")
+
+    segment = rotate_log(path, generations=3)
+    assert segment.endswith("t.log.0.gz")
+    assert not os.path.exists(path)
+    with gzip.open(segment, "rt", encoding="utf-8") as f:
+        assert "run1 a" in f.read()
+
+    # run 2 keeps writing after the rotation
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("run2 b\n")
+    _start_run(path, 3, "run3 a\n")
+
+    run1 = read_run_logs(path, 1)
+    assert run1["finished_at"] == 1.5
+    assert run1["logs"] == ["--- Starting task at 2024-01-01 00:00:01 ---\n", "run1 a\n", "run1 b\n", "\n"]
+
+    run2 = read_run_logs(path, 2, lines=10)
+    assert run2["logs"][1:] == ["run2 a\n", "run2 b\n", "\n"]
+    assert read_run_logs(path, 3, lines=1)["logs"] == ["run3 a\n"]
+    assert read_run_logs(path, 99) is None
+
+    segments = [run["segment"] for run in list_runs(path)]
+    assert segments == ["t.log.0.gz", "t.log.0.gz", "current"]
+
+
+def test_rotation_keeps_configured_generations(tmp_path):
+    path = str(tmp_path / "t.log")
+    for i in range(4):
+        _start_run(path, i, f"run{i}\n")
+        rotate_log(path, generations=2)
+
+    manifest = RunManifest.load(path)
+    assert [s["file"] for s in manifest.segments] == ["t.log.2.gz", "t.log.3.gz"]
+    assert not os.path.exists(path + ".0.gz")
+    assert [run["run"] for run in manifest.runs] == [3, 4]
+
+
+def test_manifest_recovers_runs_from_headers(tmp_path):
+    path = str(tmp_path / "t.log")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n--- Starting task at 2024-01-01 10:00:00 ---\nold a\n")
+        f.write("\n--- Starting task at 2024-01-02 10:00:00.5 ---\nold b\n")
+
+    runs = list_runs(path)
+    assert [run["run"] for run in runs] == [1, 2]
+    assert runs[1]["started_at"] - runs[0]["started_at"] == 86400.5
+    assert read_run_logs(path, 2)["logs"][1:] == ["old b\n"]
+
+
+def test_batcher_rotates_long_running_output(tmp_path):
+    path = str(tmp_path / "t.log")
+    _start_run(path, 1, "")
+
+    def rotate(old):
+        old.close()
+        rotate_log(path, generations=5)
+        return open(path, "a", encoding="utf-8")
+
+    batcher = LogBatcher("t1", open(path, "a", encoding="utf-8"), None, flush_interval=0.01,
+                         batch_bytes=64, rotate=rotate, rotate_bytes=256).start()
+    for i in range(100):
+        batcher.add(f"line {i:03d}\n")
+    batcher.close(timeout=5)
+    batcher.log_file.close()
+
+    assert len(RunManifest.load(path).segments) >= 1
+    logs = read_run_logs(path, 1, lines=1000)["logs"]
+    assert logs[1:] == [f"line {i:03d}\n" for i in range(100)]
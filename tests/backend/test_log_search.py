@@ -0,0 +1,73 @@
+import json
+import re
+
+import pytest
+
+from backend.core import log_search
+from backend.core.log_rotation import begin_run, finish_run, rotate_log
+from backend.core.log_search import compile_query, search_logs, to_ndjson
+
+
+def _start_run(path, started_at, body):
+    begin_run(path, started_at)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("\n--- Starting task at 2024-01-01 00:00:00 ---\n")
+        f.write(body)
+
+
+def _matches(records):
+    return [r for r in records if r["type"] == "match"]
+
+
+def test_context_spans_chunk_boundaries(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_search, "CHUNK_SIZE", 32)
+    path = str(tmp_path / "t.log")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("".join(f"line {i:02d}\n" for i in range(20)))
+
+    records = list(search_logs(path, compile_query("line 1[05]", regex=True), context=2))
+    found = _matches(records)
+    assert [r["line"] for r in found] == ["line 10", "line 15"]
+    assert found[0]["before"] == ["line 08", "line 09"]
+    assert found[0]["after"] == ["line 11", "line 12"]
+    assert found[0]["offset"] == 80
+    assert records[-1] == {"type": "summary", "matches": 2, "truncated": False, "bytes_scanned": 160}
+
+    last = _matches(search_logs(path, compile_query("LINE 19", ignore_case=True), context=3))
+    assert last[0]["after"] == []
+
+
+def test_searches_rotated_segments_and_time_window(tmp_path):
+    path = str(tmp_path / "t.log")
+    _start_run(path, 100, "boot ok\nerror: disk\n")
+    finish_run(path, 150)
+    rotate_log(path, generations=3)
+    _start_run(path, 200, "error: network\n")
+    finish_run(path, 250)
+
+    found = _matches(search_logs(path, compile_query("error")))
+    assert [(r["segment"], r["run"], r["line"]) for r in found] == [
+        ("t.log.0.gz", 1, "error: disk"),
+        ("current", 2, "error: network"),
+    ]
+
+    recent = _matches(search_logs(path, compile_query("error"), since=180))
+    assert [r["line"] for r in recent] == ["error: network"]
+    early = _matches(search_logs(path, compile_query("error"), until=160))
+    assert [r["line"] for r in early] == ["error: disk"]
+
+
+def test_limit_truncates_and_bad_regex_raises(tmp_path):
+    path = str(tmp_path / "t.log")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("hit\n" * 10)
+
+    records = list(search_logs(path, compile_query("hit"), context=1, limit=3))
+    assert len(_matches(records)) == 3
+    assert records[-1]["truncated"] is True
+
+    lines = list(to_ndjson(iter(records)))
+    assert json.loads(lines[-1])["matches"] == 3
+
+    with pytest.raises(re.error):
+        compile_query("(", regex=True)
@@ -0,0 +1,67 @@
+import os
+
+from backend.core import log_store
+from backend.core.log_store import LineIndex, read_log_page
+
+
+def _write_log(path, count, trailing_newline=True):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("".join(f"line {i}\n" for i in range(count)))
+        if not trailing_newline:
+            f.write("partial")
+
+
+def test_tail_and_pages_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_store, "BLOCK_SIZE", 16)
+    path = str(tmp_path / "t.log")
+    _write_log(path, 2500)
+
+    tail = read_log_page(path, 3)
+    assert tail.lines == ["line 2497\n", "line 2498\n", "line 2499\n"]
+    assert tail.first_line == 2497
+    assert tail.total_lines == 2500
+    assert tail.end == tail.size == os.path.getsize(path)
+
+    page = read_log_page(path, 2, before=tail.start)
+    assert page.lines == ["line 2495\n", "line 2496\n"]
+    assert page.end == tail.start
+    assert page.first_line == 2495
+
+    head = read_log_page(path, 10, before=read_log_page(path, 2498, before=tail.start).start)
+    assert head.lines == []
+    assert head.start == 0
+
+
+def test_after_cursor_returns_whole_lines_only(tmp_path):
+    path = str(tmp_path / "t.log")
+    _write_log(path, 5, trailing_newline=False)
+
+    first = read_log_page(path, 2, after=0)
+    assert first.lines == ["line 0\n", "line 1\n"]
+
+    rest = read_log_page(path, 100, after=first.end)
+    assert rest.lines == ["line 2\n", "line 3\n", "line 4\n"]
+    assert rest.total_lines == 6
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(" done\nline 6\n")
+    polled = read_log_page(path, 100, after=rest.end)
+    assert polled.lines == ["partial done\n", "line 6\n"]
+    assert polled.first_line == 5
+
+
+def test_index_is_persisted_and_rebuilt_after_rotation(tmp_path):
+    path = str(tmp_path / "t.log")
+    _write_log(path, 2100)
+    read_log_page(path, 1)
+
+    index = LineIndex(path).load()
+    assert index.lines == 2100
+    assert len(index.offsets) == 3
+
+    os.rename(path, path + ".old")
+    _write_log(path, 10)
+    page = read_log_page(path, 1)
+    assert page.lines == ["line 9\n"]
+    assert page.total_lines == 10
+    assert page.first_line == 9
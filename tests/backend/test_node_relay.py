@@ -0,0 +1,165 @@
+import asyncio
+import json
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from backend.api.node_relay import LogStreamRelay, NodeStatusRelay, upstream_url
+
+
+class _Manager:
+    def __init__(self):
+        self.rooms = {}
+        self.sent = {}
+
+    async def connect(self, websocket, room):
+        self.rooms.setdefault(room, set()).add(websocket)
+        self.sent.setdefault(websocket, [])
+
+    def disconnect(self, websocket, room):
+        self.rooms.get(room, set()).discard(websocket)
+
+    def has_pending(self, websocket, room):
+        return False
+
+    async def send_text(self, websocket, room, text):
+        self.sent[websocket].append(json.loads(text))
+        return True
+
+
+class _Upstream:
+    """Plays one scripted connection, then stays open until cancelled."""
+
+    def __init__(self, messages, hold=False):
+        self.messages = messages
+        self.hold = hold
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for message in self.messages:
+            yield json.dumps(message)
+        if self.hold:
+            await asyncio.Event().wait()
+
+
+def _task(task_id, running=False):
+    return {"id": task_id, "status": {"running": running}}
+
+
+def test_upstream_url_uses_websocket_scheme():
+    assert upstream_url("https://node:8443/") == "wss://node:8443/api/task/ws/tasks"
+    assert upstream_url("http://node:8000") == "ws://node:8000/api/task/ws/tasks"
+
+
+def test_relay_shares_upstream_and_resyncs_after_gap():
+    opened = []
+    scripts = [
+        _Upstream([
+            {"type": "snapshot", "version": 1, "tasks": [_task("a")]},
+            {"type": "patch", "base_version": 1, "version": 2, "added": [_task("b")],
+             "changed": [], "removed": [], "order": ["a", "b"]},
+            # version 3..5 were missed
+            {"type": "patch", "base_version": 5, "version": 6, "added": [],
+             "changed": [_task("a", running=True)], "removed": [], "order": None},
+        ]),
+        _Upstream([{"type": "snapshot", "version": 7, "tasks": [_task("a"), _task("b", running=True)]}], hold=True),
+    ]
+
+    def connect(url, token):
+        opened.append((url, token))
+        return scripts[len(opened) - 1]
+
+    manager = _Manager()
+    relay = NodeStatusRelay(manager, connect=connect, min_backoff=0)
+
+    async def scenario():
+        await relay.subscribe("ws1", "e1", "http://node:8000", "tok")
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if len(opened) == 2 and relay.upstreams["e1"].version == 7:
+                break
+        await relay.subscribe("ws2", "e1", "http://node:8000", "tok")
+        stats = relay.stats()["e1"]
+        relay.unsubscribe("ws1", "e1")
+        relay.unsubscribe("ws2", "e1")
+        return stats
+
+    stats = asyncio.run(scenario())
+
+    assert opened == [("ws://node:8000/api/task/ws/tasks", "tok")] * 2
+    assert stats["connected"] is True
+    assert stats["subscribers"] == 2
+    assert stats["reconnects"] == 1
+    assert relay.upstreams == {}
+
+    first, second, third = manager.sent["ws1"]
+    assert first["type"] == "snapshot"
+    assert [t["id"] for t in first["tasks"]] == ["a"]
+    assert second["type"] == "patch"
+    assert [t["id"] for t in second["added"]] == ["b"]
+    # The resync snapshot reaches browsers as a patch against what they had
+    assert third["type"] == "patch"
+    assert third["base_version"] == second["version"]
+    assert third["changed"] == [_task("b", running=True)]
+
+    assert manager.sent["ws2"][0]["type"] == "snapshot"
+    assert manager.sent["ws2"][0]["version"] == third["version"]
+
+
+def test_entry_task_socket_requires_jwt(client):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect("/api/device-entries/missing/ws/tasks?token=not-a-jwt") as ws:
+            ws.receive_text()
+    assert exc.value.code == 1008
+
+
+class _LogManager(_Manager):
+    def broadcast_text(self, room, text):
+        for websocket in self.rooms.get(room, ()):
+            self.sent[websocket].append(json.loads(text))
+
+
+def test_log_relay_opens_one_upstream_per_task_and_closes_with_last_viewer():
+    opened = []
+    frames = [{"type": "logs", "data": ["a\n", "b\n"], "dropped": 0}]
+
+    def connect(url, token):
+        opened.append(url)
+        # The first connection drops after one frame, the second stays open
+        return _Upstream(frames, hold=len(opened) > 1)
+
+    manager = _LogManager()
+    relay = LogStreamRelay(manager, connect=connect, min_backoff=0)
+
+    async def scenario():
+        await relay.subscribe("ws1", "e1", "t1", "http://node:8000", "tok")
+        await relay.subscribe("ws2", "e1", "t1", "http://node:8000", "tok")
+        for _ in range(50):
+            await asyncio.sleep(0.01)
+            if relay.stats()["e1:t1"]["frames"] == 2:
+                break
+        task = relay.upstreams[("e1", "t1")].task
+        relay.unsubscribe("ws1", "e1", "t1")
+        still_open = ("e1", "t1") in relay.upstreams
+        relay.unsubscribe("ws2", "e1", "t1")
+        await asyncio.sleep(0)
+        return still_open, task
+
+    still_open, task = asyncio.run(scenario())
+
+    assert opened == ["ws://node:8000/api/task/ws/logs/t1"] * 2
+    assert still_open is True
+    assert relay.upstreams == {}
+    assert task.cancelled()
+    for viewer in ("ws1", "ws2"):
+        kinds = [frame["type"] for frame in manager.sent[viewer]]
+        assert kinds == ["logs", "gap", "logs"]
+        assert manager.sent[viewer][0]["data"] == ["a\n", "b\n"]
@@ -0,0 +1,79 @@
+import pytest
+
+from backend.core.note_cache import note_graphs
+from backend.models import NoteNode
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    note_graphs.invalidate()
+    yield
+    note_graphs.invalidate()
+
+
+def _scan(client, **select):
+    program = {
+        "executor": {"kind": "scan"},
+        "program": {"select": select or {"default": True, "rules": []}},
+        "result": {"order_by": "title", "order_desc": False},
+    }
+    response = client.post("/api/notes/query-program", json=program)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _component(client, seed_id):
+    response = client.post(
+        "/api/notes/query-program",
+        json={
+            "executor": {"kind": "component", "seed_ids": [seed_id]},
+            "program": {"select": {"default": True}, "expand": {"default": True}},
+            "result": {"order_by": "title", "order_desc": False},
+        },
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_writes_update_the_cached_graph_in_place(client, auth_user):
+    ids = {}
+    for title in ("alpha", "beta", "gamma"):
+        response = client.post("/api/notes/", json={"title": title, "content": "<p>" + "x" * 1000 + "</p>"})
+        ids[title] = response.json()["id"]
+
+    assert [n["title"] for n in _scan(client)["nodes"]] == ["alpha", "beta", "gamma"]
+    misses = note_graphs.stats()["misses"]
+
+    client.put(f"/api/notes/{ids['beta']}", json={"title": "beta 2", "node_status": "done"})
+    client.post("/api/notes/edges/", json={"source_id": ids["alpha"], "target_id": ids["beta"]})
+    client.delete(f"/api/notes/{ids['gamma']}")
+
+    result = _scan(client)
+    assert [n["title"] for n in result["nodes"]] == ["alpha", "beta 2"]
+    assert result["nodes"][1]["history"]  # read for the visible page
+    assert "content" not in result["nodes"][0]
+    assert len(result["edges"]) == 1
+
+    done = _scan(client, default=False, rules=[
+        {"action": "include", "matcher": {"kind": "field", "field": "node_status", "op": "eq", "value": "done"}},
+    ])
+    assert [n["id"] for n in done["nodes"]] == [ids["beta"]]
+
+    assert [n["title"] for n in _component(client, ids["alpha"])["nodes"]] == ["alpha", "beta 2"]
+    client.delete(f"/api/notes/edges/?source={ids['alpha']}&target={ids['beta']}")
+    assert [n["title"] for n in _component(client, ids["alpha"])["nodes"]] == ["alpha"]
+
+    # Every query after the first was served from memory
+    assert note_graphs.stats()["misses"] == misses
+
+
+def test_writes_from_elsewhere_are_detected(client, session, auth_user):
+    client.post("/api/notes/", json={"title": "alpha"})
+    assert len(_scan(client)["nodes"]) == 1
+
+    session.add(NoteNode(id="outside", user_id=auth_user.id, title="outside", history=[], custom_fields=[]))
+    session.commit()
+
+    misses = note_graphs.stats()["misses"]
+    assert [n["title"] for n in _scan(client)["nodes"]] == ["alpha", "outside"]
+    assert note_graphs.stats()["misses"] == misses + 1
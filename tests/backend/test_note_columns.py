@@ -0,0 +1,103 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from backend.api.notes import _build_program_walker, _sort_notes
+from backend.core.note_cache import NoteMeta, note_graphs
+from backend.core.note_columns import NoteColumns, compile_columnar_scan
+from backend.core.note_walker import NoteGraphContext
+from backend.schemas import NoteProgramRequest
+
+
+def meta(note_id, title, status, weight, start_at, private_level=0):
+    return NoteMeta(note_id, 1, title, weight, "note", status, private_level, [], start_at, start_at, start_at)
+
+
+NOTES = [
+    meta("a", "Alpha", "done", 200, 100.0),
+    meta("b", "beta", "idea", 40, 300.0, private_level=1),
+    meta("c", None, None, 150, 120.0),
+    meta("d", "Delta", "done", 90, 50.0),
+    meta("e", "beta", "todo", 150, 300.0, private_level=2),
+]
+
+
+def program(default, *rules, order_by="updated_at", order_desc=True, skip=0, limit=1000):
+    return NoteProgramRequest.model_validate({
+        "executor": {"kind": "scan"},
+        "program": {"select": {
+            "default": default,
+            "rules": [{"action": action, "matcher": matcher} for action, matcher in rules],
+        }},
+        "result": {"order_by": order_by, "order_desc": order_desc, "skip": skip, "limit": limit},
+    })
+
+
+def field(name, op, value=None, values=None):
+    return {"kind": "field", "field": name, "op": op, "value": value, "values": values or []}
+
+
+PROGRAMS = [
+    program(True),
+    program(False, ("include", field("node_status", "in", values=["done", None])), order_by="title"),
+    program(True, ("exclude", field("node_status", "neq", "done")), ("include", field("weight", "gte", 150)),
+            order_by="weight", order_desc=False),
+    program(False, ("include", field("start_at", "between", values=[100, 300])),
+            ("exclude", field("private_level", "in", values=[2])), ("include", {"kind": "id", "ids": ["d", "x"]}),
+            order_by="title", order_desc=False, skip=1, limit=2),
+    program(True, ("exclude", field("node_status", "eq", None)), ("exclude", field("weight", "not_in", values=[150])),
+            order_by="start_at"),
+]
+
+
+def test_columnar_scan_matches_the_row_walker():
+    context = NoteGraphContext.from_items(NOTES, [])
+    columns = NoteColumns.of(context)
+
+    for request in PROGRAMS:
+        scan = compile_columnar_scan(request)
+        assert scan is not None
+        result = request.result
+        visible, total = scan.run(
+            columns, order_by=result.order_by, order_desc=result.order_desc, skip=result.skip, limit=result.limit,
+        )
+
+        selected = _build_program_walker(context, request).collect_all().nodes
+        expected = _sort_notes(selected, result.order_by, result.order_desc)
+        assert total == len(expected)
+        assert [note.id for note in visible] == [note.id for note in expected[result.skip: result.skip + result.limit]]
+
+
+def test_unsupported_matchers_use_the_row_walker():
+    assert compile_columnar_scan(program(False, ("include", {"kind": "title_contains", "value": "a"}))) is None
+    assert compile_columnar_scan(program(False, ("include", field("weight", "gte", "100")))) is None
+    assert compile_columnar_scan(program(False, ("include", field("custom_fields.topic", "eq", "ops")))) is None
+
+
+def test_query_program_reports_columnar_engine_and_tracks_writes(client, auth_user):
+    note_graphs.invalidate()
+    first = client.post("/api/notes/", json={"title": "alpha", "node_status": "done"}).json()
+    client.post("/api/notes/", json={"title": "beta"})
+
+    def run():
+        response = client.post("/api/notes/query-program", json={
+            "executor": {"kind": "scan"},
+            "program": {"select": {"default": False, "rules": [
+                {"action": "include", "matcher": field("node_status", "eq", "done")},
+            ]}},
+            "result": {"order_by": "title", "order_desc": False},
+            "explain": True,
+        })
+        assert response.status_code == 200
+        return response.json()
+
+    payload = run()
+    assert payload["plan"]["engine"] == "columnar"
+    assert payload["plan"]["pushdown"] is False
+    assert payload["plan"]["prefilter"] is None
+    assert [rule["pushed"] for rule in payload["plan"]["rules"]] == [False]
+    assert [node["title"] for node in payload["nodes"]] == ["alpha"]
+
+    client.put(f"/api/notes/{first['id']}", json={"node_status": "idea"})
+    assert run()["nodes"] == []
+    note_graphs.invalidate()
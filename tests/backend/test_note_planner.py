@@ -0,0 +1,133 @@
+from sqlmodel import select
+
+from backend.core.note_cache import load_edge_metas, load_note_metas
+from backend.core.note_planner import plan_note_program
+from backend.core.note_walker import NoteGraphContext
+from backend.api.notes import _build_program_walker
+from backend.models import NoteNode
+from backend.schemas import NoteProgramRequest
+
+
+def make_note(note_id, title, *, node_status="idea", weight=100, start_at=100.0, custom_fields=None):
+    return NoteNode(
+        id=note_id,
+        user_id=1,
+        title=title,
+        content="",
+        weight=weight,
+        node_type="note",
+        node_status=node_status,
+        custom_fields=custom_fields or [],
+        created_at=start_at,
+        updated_at=start_at,
+        start_at=start_at,
+        history=[],
+    )
+
+
+def scan(default, *rules):
+    return NoteProgramRequest.model_validate({
+        "executor": {"kind": "scan"},
+        "program": {"select": {
+            "default": default,
+            "rules": [{"action": action, "matcher": matcher} for action, matcher in rules],
+        }},
+        "explain": True,
+    })
+
+
+def field(name, op, value=None, values=None):
+    return {"kind": "field", "field": name, "op": op, "value": value, "values": values or []}
+
+
+PROGRAMS = [
+    scan(False, ("include", field("node_status", "eq", "done"))),
+    scan(True, ("exclude", field("node_status", "in", values=["done", "delete"]))),
+    scan(False, ("include", field("weight", "gte", 150)), ("exclude", {"kind": "title_contains", "value": "ALP"})),
+    scan(True, ("exclude", field("title", "eq", None)), ("include", field("start_at", "between", values=[50, 150]))),
+    scan(False, ("include", field("title", "not_contains", "a")), ("exclude", field("node_status", "neq", "idea"))),
+    scan(False, ("include", field("custom_fields.topic", "eq", "ops")), ("exclude", field("weight", "lte", 50))),
+    scan(False, ("include", field("node_status", "eq", "done")), ("include", field("title", "regex_search", "^g"))),
+    scan(True, ("exclude", field("title", "regex_search", "^b")), ("exclude", {"kind": "id", "ids": ["gamma"]})),
+    scan(False, ("include", {"kind": "title_contains", "value": "Be", "ignore_case": False})),
+    scan(False, ("include", field("title", "contains", "%_")), ("include", field("title", "contains", "Ω"))),
+]
+
+
+def seed(session):
+    session.add(make_note("alpha", "Alpha", node_status="done", weight=200, start_at=100.0))
+    session.add(make_note("beta", "beta", node_status="idea", weight=40, start_at=300.0))
+    session.add(make_note("gamma", "gamma", node_status="delete", weight=160, start_at=120.0,
+                          custom_fields=[["topic", "string", "ops"]]))
+    session.add(make_note("untitled", None, node_status=None, weight=100, start_at=200.0))
+    session.add(make_note("omega", "Ω 50%_off", node_status="todo", weight=30, start_at=90.0,
+                          custom_fields=[["topic", "string", "ops"]]))
+    session.commit()
+
+
+def test_prefilter_never_drops_a_selected_note(session):
+    seed(session)
+    context = NoteGraphContext.from_items(
+        load_note_metas(session, NoteNode.user_id == 1),
+        load_edge_metas(session),
+    )
+
+    for request in PROGRAMS:
+        expected = set(_build_program_walker(context, request).collect_all().node_ids)
+        plan = plan_note_program(request)
+        statement = select(NoteNode.id).where(NoteNode.user_id == 1)
+        if plan.where is not None:
+            statement = statement.where(plan.where)
+        candidates = set(session.exec(statement).all())
+        assert expected <= candidates, plan.prefilter_sql()
+        if all(rule.pushed for rule in plan.rules):
+            assert candidates == expected, plan.prefilter_sql()
+
+
+def test_python_only_matchers_are_reported():
+    plan = plan_note_program(scan(
+        False,
+        ("include", field("node_status", "eq", "done")),
+        ("exclude", field("custom_fields.topic", "eq", "ops")),
+        ("exclude", field("weight", "lte", 10)),
+    ))
+    assert [(rule.pushed, rule.reason) for rule in plan.rules] == [
+        (True, None),
+        (False, "custom fields are stored as JSON"),
+        (True, None),
+    ]
+
+    # A Python-only include could select anything, so nothing before it narrows the scan
+    plan = plan_note_program(scan(
+        False,
+        ("include", field("node_status", "eq", "done")),
+        ("include", field("title", "regex_search", "x")),
+    ))
+    assert plan.where is None and not plan.pushdown
+    assert [rule.pushed for rule in plan.rules] == [False, False]
+
+    assert plan_note_program(scan(True, ("exclude", {"kind": "all"}))).empty
+
+
+def test_query_program_explain(client, session, auth_user):
+    client.post("/api/notes/", json={"title": "alpha"})
+    client.post("/api/notes/", json={"title": "beta"})
+
+    response = client.post("/api/notes/query-program", json={
+        "executor": {"kind": "scan"},
+        "program": {"select": {"default": False, "rules": [
+            {"action": "include", "matcher": {"kind": "title_contains", "value": "ALP"}},
+        ]}},
+        "explain": True,
+    })
+    assert response.status_code == 200
+    payload = response.json()
+    assert [node["title"] for node in payload["nodes"]] == ["alpha"]
+    assert payload["plan"]["engine"] == "row"
+    assert payload["plan"]["pushdown"] is True
+    assert payload["plan"]["candidates"] == 1
+    assert "LIKE" in payload["plan"]["prefilter"]
+    assert payload["plan"]["rules"][0]["pushed"] is True
+
+    plain = client.post("/api/notes/query-program", json={"executor": {"kind": "scan"}})
+    assert plain.json()["plan"] is None
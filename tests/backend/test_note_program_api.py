@@ -1,6 +1,7 @@
 import uuid
 from datetime import datetime
 
+from backend.core.note_cache import note_graphs
 from backend.models import NoteEdge, NoteNode
 
 
@@ -419,3 +420,31 @@ def test_query_program_supports_title_regex_and_not_contains_matchers(client, se
     assert not_contains_response.status_code == 200
     not_contains_payload = not_contains_response.json()
     assert [node["id"] for node in not_contains_payload["nodes"]] == ["note-clean"]
+
+
+def test_query_program_pages_sort_ties_the_same_with_pushdown(client, session, auth_user):
+    note_graphs.invalidate()
+    # Inserted newest first, so an index on updated_at reads them in the opposite order
+    for index in range(6):
+        session.add(make_note(auth_user, f"note-{index}", f"Tie {index}", start_at=100.0, updated_at=600.0 - index))
+    session.commit()
+
+    def page(rules, skip):
+        response = client.post("/api/notes/query-program", json={
+            "executor": {"kind": "scan"},
+            "program": {"select": {"default": not rules, "rules": rules}},
+            "result": {"order_by": "weight", "order_desc": False, "skip": skip, "limit": 2},
+            "explain": True,
+        })
+        assert response.status_code == 200
+        return response.json()
+
+    pushed = [
+        {"action": "include", "matcher": {"kind": "field", "field": "updated_at", "op": "gte", "value": 0}},
+        {"action": "exclude", "matcher": {"kind": "title_contains", "value": "zzz"}},
+    ]
+    assert page(pushed, 0)["plan"]["pushdown"] is True
+    for skip in (0, 2, 4):
+        assert [node["id"] for node in page(pushed, skip)["nodes"]] == \
+            [node["id"] for node in page([], skip)["nodes"]]
+    note_graphs.invalidate()
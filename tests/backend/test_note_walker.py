@@ -1,6 +1,6 @@
 import uuid
 
-from backend.core.note_walker import NoteGraphContext, NoteWalker
+from backend.core.note_walker import NoteGraphContext, NoteVisit, NoteWalker
 from backend.models import NoteEdge, NoteNode
 
 
@@ -128,3 +128,48 @@ def test_include_seed_applies_base_condition_before_predicate():
     result = walker.collect_graph(["root"], include_edges=False)
 
     assert result.node_ids == ["root"]
+
+
+def _reference_select(walker, visit):
+    decision = walker.default_select
+    for predicate, target in walker.select_rules:
+        if decision != target and predicate(visit):
+            decision = target
+    return decision
+
+
+def test_compiled_rules_match_ordered_rule_semantics():
+    notes = [
+        make_note("a", "Alpha", node_status="done", weight=200, custom_fields={"topic": "ops"}),
+        make_note("b", "beta", node_status="idea", weight=40, start_at=300.0),
+        make_note("c", None, node_status="todo", weight=150, custom_fields={"topic": ["x"]}),
+        make_note("d", "Delta (draft)", node_status="done", weight=90, start_at=50.0),
+    ]
+    context = build_context(notes)
+
+    def chains():
+        walker = NoteWalker(context, select=False)
+        walker.include.match_field("weight", "gte", value=100)
+        walker.include.match_title("ALPHA")
+        walker.exclude.match_field("title", "regex_search", value="^(al")  # invalid regex never matches
+        walker.exclude.match_custom_field("topic", "in", values=[["x"], "ops"])
+        walker.include.match_field("node_status", "not_in", values=["idea", "todo"])
+        yield walker
+
+        walker = NoteWalker(context, select=True)
+        walker.include.all()  # agrees with the default, never fires
+        walker.exclude.match_field("title", "contains", value="DRAFT")
+        walker.exclude.match_field("start_at", "between", values=[200, 400])
+        walker.include.match_field("title", "regex_search", value=r"\(draft\)$")
+        walker.exclude.match_field("title", "eq", value=None)
+        yield walker
+
+    results = []
+    for walker in chains():
+        visits = [NoteVisit(node=note, context=context) for note in notes]
+        expected = [visit.node_id for visit in visits if _reference_select(walker, visit)]
+        assert walker.collect_all().node_ids == expected
+        assert [visit.node_id for visit in walker.iter_all()] == expected
+        results.append(expected)
+
+    assert results == [["a", "d"], ["a", "d"]]
@@ -302,3 +302,38 @@ def test_batch_update_notes_sets_private_level(client, session, auth_user):
     assert first.private_level == 1
     assert second.private_level == 1
     assert untouched.private_level == 0
+
+
+def test_query_and_component_return_list_rows_without_content(client, session, auth_user):
+    root = make_note(auth_user, "note-root", "Root", start_at=100.0, updated_at=100.0)
+    child = make_note(auth_user, "note-child", "Child", start_at=100.0, updated_at=200.0)
+    root.content = "<p>" + "x" * 1000 + "</p>"
+    root.history = [{"ts": 100.0, "title": "Root"}]
+
+    session.add(root)
+    session.add(child)
+    session.add(make_edge(auth_user, "note-root", "note-child"))
+    session.commit()
+
+    query = client.post(
+        "/api/notes/query",
+        json={
+            "scope": {"mode": "all"},
+            "rules": [],
+            "order_by": "updated_at",
+            "order_desc": False,
+            "limit": 10,
+            "include_edges": True,
+        },
+    )
+    assert query.status_code == 200
+    nodes = query.json()["nodes"]
+    assert [node["id"] for node in nodes] == ["note-root", "note-child"]
+    assert nodes[0]["history"] == [{"ts": 100.0, "title": "Root"}]
+    assert all("content" not in node for node in nodes)
+
+    component = client.get("/api/notes/note-child/connected-component")
+    assert component.status_code == 200
+    payload = component.json()
+    assert {node["id"] for node in payload["nodes"]} == {"note-root", "note-child"}
+    assert len(payload["edges"]) == 1
@@ -0,0 +1,81 @@
+import subprocess
+import sys
+import uuid
+
+from backend.core.device import find_matching_processes, match_cmdline
+from backend.core.process_snapshot import ProcessSnapshot, ProcessSnapshotCache
+
+
+class _FakeProc:
+    def __init__(self, pid, name, cmdline):
+        self.pid = pid
+        self.info = {
+            "pid": pid,
+            "name": name,
+            "cmdline": cmdline,
+            "create_time": 1000.0 + pid,
+            "exe": None,
+            "memory_info": None,
+            "cpu_percent": 0.0,
+        }
+
+
+def _snapshot():
+    return ProcessSnapshot(
+        [
+            _FakeProc(1, "systemd", ["/sbin/init"]),
+            _FakeProc(10, "python3", ["/usr/bin/python3", "worker.py", "--port", "8000"]),
+            _FakeProc(11, "python3", ["/usr/bin/python3", "worker.py", "--port", "8001"]),
+            _FakeProc(12, "node", ["node", "server.js", "--port", "8000"]),
+            _FakeProc(13, "kworker", []),
+        ]
+    )
+
+
+def test_snapshot_candidates_agree_with_full_scan():
+    snapshot = _snapshot()
+    commands = [
+        "python worker.py --port 8000",
+        "/usr/bin/python3 worker.py",
+        "node server.js",
+        "python",
+        "worker.py --port 9000",
+    ]
+
+    for command in commands:
+        expected = [p.pid for p in snapshot.processes if match_cmdline(command, p.info["cmdline"] or [])]
+        assert [p.pid for p in find_matching_processes(command, snapshot)] == expected
+
+
+def test_snapshot_indexes():
+    snapshot = _snapshot()
+
+    assert snapshot.token_count("--port") == 3
+    assert [p.pid for p in snapshot.with_all_tokens(["worker.py", "8001"])] == [11]
+    assert snapshot.with_all_tokens(["missing"]) == []
+    assert sorted(p.pid for p in snapshot.with_name_containing("PYTHON")) == [10, 11]
+
+
+def test_snapshot_cache_reuses_until_invalidated():
+    cache = ProcessSnapshotCache(ttl=60)
+    first = cache.get()
+
+    assert cache.get() is first
+    assert cache.get(max_age=0) is not first
+
+    current = cache.get()
+    cache.invalidate()
+    assert cache.get() is not current
+
+
+def test_snapshot_finds_real_process():
+    marker = str(uuid.uuid4())
+    code = f"import time; time.sleep(10); # {marker}"
+    proc = subprocess.Popen([sys.executable, "-c", code])
+    try:
+        snapshot = ProcessSnapshot.take()
+        matches = find_matching_processes(f'{sys.executable} -c "{code}"', snapshot)
+        assert [p.pid for p in matches] == [proc.pid]
+    finally:
+        proc.terminate()
+        proc.wait(timeout=5)
@@ -0,0 +1,84 @@
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+import pytest
+
+from backend.core.device import LocalDevice, LogManager
+from backend.core.log_rotation import list_runs
+from backend.core.process_snapshot import process_snapshots
+from backend.core.process_supervisor import ProcessSupervisor
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.mark.parametrize("use_pidfd", [None, False])
+def test_supervisor_reports_child_exit(use_pidfd):
+    events = []
+    done = threading.Event()
+
+    def on_exit(event):
+        events.append(event)
+        done.set()
+
+    supervisor = ProcessSupervisor(on_exit, use_pidfd=use_pidfd)
+    popen = subprocess.Popen([sys.executable, "-c", "import sys; sys.exit(3)"])
+    assert supervisor.watch("task-1", psutil.Process(popen.pid), popen)
+
+    assert done.wait(5)
+    assert events[0].key == "task-1"
+    assert events[0].pid == popen.pid
+    assert events[0].returncode == 3
+    assert not supervisor.is_watching("task-1")
+
+
+def test_supervisor_unwatch_suppresses_event():
+    events = []
+    supervisor = ProcessSupervisor(events.append)
+    popen = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(0.3)"])
+    supervisor.watch("task-1", psutil.Process(popen.pid), popen)
+    supervisor.unwatch("task-1")
+    popen.wait(timeout=5)
+    time.sleep(0.2)
+    assert events == []
+
+
+def test_local_device_records_exit_without_polling(test_device):
+    device = LocalDevice(device_id=test_device["id"], name="test", api_token=test_device["token"])
+    changed = []
+    device.set_status_callback(changed.append)
+
+    result = device.start_task(
+        "supervised-task",
+        f'"{sys.executable}" -c "import sys; sys.exit(5)"',
+    )
+    assert result["status"] == "started"
+
+    assert _wait_for(lambda: changed == ["supervised-task"])
+    assert "supervised-task" not in device.processes
+
+    status = device.get_task_status("supervised-task")
+    assert status.running is False
+    assert status.exit_code == 5
+    assert status.finished_at is not None
+
+
+def test_failed_start_closes_its_run(test_device):
+    device = LocalDevice(device_id=test_device["id"], name="test", api_token=test_device["token"])
+
+    with pytest.raises(Exception):
+        device.start_task("unstartable-task", "codeyun-no-such-command --flag")
+    # The running check cached a process snapshot that nothing invalidated
+    process_snapshots.invalidate()
+
+    runs = list_runs(LogManager.log_path("unstartable-task"))
+    assert runs and runs[-1]["finished_at"] is not None
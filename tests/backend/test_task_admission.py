@@ -0,0 +1,192 @@
+import threading
+import time
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import Session, select
+
+from backend.api.device_entries import _delete_local_task, _start_local_task, _stop_local_task
+from backend.api.task_manager import task_manager
+from backend.core.task_admission import AdmissionController, AdmissionQueueFull
+from backend.db import engine
+from backend.models import Task, TaskRun, UserDevice
+
+
+class _Starts:
+    def __init__(self):
+        self.order = []
+        self.started = threading.Event()
+
+    def __call__(self, task_id):
+        def start():
+            self.order.append(task_id)
+            self.started.set()
+            return {"status": "started", "pid": len(self.order)}
+        return start
+
+    def wait_for(self, count, timeout=2.0):
+        deadline = time.time() + timeout
+        while len(self.order) < count and time.time() < deadline:
+            time.sleep(0.01)
+        return self.order
+
+
+@pytest.fixture
+def admission():
+    controllers = []
+
+    def build(**options):
+        controller = AdmissionController(**options)
+        controllers.append(controller)
+        return controller
+
+    yield build
+    for controller in controllers:
+        controller.close()
+
+
+def test_global_cap_queues_by_priority(admission):
+    pool = admission(max_running=1)
+    starts = _Starts()
+
+    assert pool.submit("a", starts("a"))["status"] == "started"
+    low = pool.submit("low", starts("low"))
+    high = pool.submit("high", starts("high"), priority=5)
+    assert (low["status"], high["status"]) == ("queued", "queued")
+    assert pool.queued_info(["low", "high"]) == {
+        "high": {"queue_position": 1, "queued_at": high["queued_at"], "not_before": high["not_before"]},
+        "low": {"queue_position": 2, "queued_at": low["queued_at"], "not_before": low["not_before"]},
+    }
+    assert pool.submit("low", starts("low"))["status"] == "already_queued"
+
+    pool.release("a")
+    assert starts.wait_for(2) == ["a", "high"]
+    time.sleep(0.05)
+    assert starts.order == ["a", "high"]
+
+    pool.release("high")
+    assert starts.wait_for(3) == ["a", "high", "low"]
+    stats = pool.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["admitted"] == 3
+    assert stats["max_wait"] > 0
+
+
+def test_group_limit_only_holds_back_its_group(admission):
+    pool = admission(group_limits={"backup": 1})
+    starts = _Starts()
+
+    assert pool.submit("b1", starts("b1"), group="backup")["status"] == "started"
+    assert pool.submit("b2", starts("b2"), group="backup")["status"] == "queued"
+    assert pool.submit("other", starts("other"))["status"] == "started"
+
+    stats = pool.stats()
+    assert stats["groups"]["backup"] == {"limit": 1, "running": 1, "queued": 1}
+    assert [item["task_id"] for item in stats["queue"]] == ["b2"]
+
+    assert pool.cancel("b2") is True
+    assert pool.cancel("b2") is False
+    assert pool.stats()["queue_depth"] == 0
+
+
+def test_delay_and_stagger_spread_simultaneous_starts(admission):
+    pool = admission(stagger=0.1)
+    starts = _Starts()
+
+    assert pool.submit("a", starts("a"))["status"] == "started"
+    assert pool.submit("b", starts("b"))["status"] == "queued"
+    jittered = pool.submit("c", starts("c"), delay=0.3)
+    assert jittered["not_before"] >= jittered["queued_at"] + 0.3
+
+    assert starts.wait_for(2) == ["a", "b"]
+    assert "c" not in starts.order
+    assert starts.wait_for(3) == ["a", "b", "c"]
+
+
+def test_exited_processes_free_their_slot_and_full_queue_rejects(admission):
+    alive = {"a"}
+    pool = admission(max_running=1, max_queue=1, is_running=lambda task_id: task_id in alive)
+    starts = _Starts()
+
+    pool.submit("a", starts("a"))
+    assert pool.submit("b", starts("b"))["status"] == "queued"
+    with pytest.raises(AdmissionQueueFull):
+        pool.submit("c", starts("c"))
+
+    # "a" exits without a release; the next submit notices
+    alive.clear()
+    pool.cancel("b")
+    assert pool.submit("c", starts("c"))["status"] == "started"
+    assert pool.stats()["rejected"] == 1
+
+
+def test_slot_reserved_during_a_slow_start_is_not_pruned(admission):
+    spawned = set()
+    pool = admission(max_running=1, is_running=lambda task_id: task_id in spawned)
+
+    def slow_start():
+        time.sleep(0.2)
+        spawned.add("slow")
+        return {"status": "started"}
+
+    results = {}
+    first = threading.Thread(target=lambda: results.setdefault("slow", pool.submit("slow", slow_start)))
+    first.start()
+    time.sleep(0.05)
+
+    # The slow process is not running yet, but its slot is taken
+    starts = _Starts()
+    results["other"] = pool.submit("other", starts("other"))
+    first.join()
+
+    assert results["slow"]["status"] == "started"
+    assert results["other"]["status"] == "queued"
+    assert starts.order == []
+    assert pool.stats()["running"] == 1
+    pool.cancel("other")
+
+
+def test_entry_routes_share_run_history_and_errors(admission, monkeypatch, test_device):
+    pool = admission(max_running=1, max_queue=1)
+    monkeypatch.setattr(task_manager, "admission", pool)
+    assert pool.submit("busy", lambda: {"status": "started", "pid": 1})["status"] == "started"
+
+    entry = UserDevice(user_id=1, device_id=test_device["id"], name="local", mode="local")
+    tasks = [Task(id=str(uuid.uuid4()), name=name, command="echo hi", device_id=test_device["id"])
+             for name in ("queued", "rejected", "deleted")]
+    queued, rejected, deleted = (task.id for task in tasks)
+    with Session(engine) as session:
+        session.add_all(tasks)
+        session.commit()
+
+    def runs(task_id):
+        with Session(engine) as session:
+            return [run.status for run in session.exec(select(TaskRun).where(TaskRun.task_id == task_id))]
+
+    try:
+        with Session(engine) as session:
+            result = _start_local_task(session, entry, queued)
+            assert result["status"] == "queued" and result["run_id"]
+            assert runs(queued) == ["queued"]
+
+            with pytest.raises(HTTPException) as full:
+                _start_local_task(session, entry, rejected)
+            assert full.value.status_code == 503
+            assert runs(rejected) == ["skipped"]
+
+            assert _stop_local_task(session, entry, queued) == {"status": "dequeued"}
+            assert runs(queued) == ["cancelled"]
+
+            _start_local_task(session, entry, deleted)
+            assert _delete_local_task(session, entry, deleted) == {"status": "deleted"}
+            assert runs(deleted) == ["cancelled"]
+    finally:
+        with Session(engine) as session:
+            for task_id in (queued, rejected, deleted):
+                for run in session.exec(select(TaskRun).where(TaskRun.task_id == task_id)).all():
+                    session.delete(run)
+                task = session.get(Task, task_id)
+                if task is not None:
+                    session.delete(task)
+            session.commit()
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+from backend.api.task_feed import TaskFeed
+
+
+class _Manager:
+    def __init__(self, sockets):
+        self.rooms = {"task_list": set(sockets)}
+        self.sent = {ws: [] for ws in sockets}
+
+    def has_pending(self, websocket, room):
+        return False
+
+    async def send_text(self, websocket, room, text):
+        self.sent[websocket].append(text)
+        return True
+
+
+def _task(task_id, running=False):
+    return {"id": task_id, "name": task_id, "status": {"running": running}}
+
+
+def _publish(feed, manager):
+    asyncio.run(feed.publish(manager, "task_list"))
+
+
+def test_feed_sends_snapshot_then_patches_then_heartbeat():
+    feed = TaskFeed()
+    manager = _Manager(["ws1"])
+    feed.subscribe("ws1")
+
+    feed.update([_task("a"), _task("b")])
+    _publish(feed, manager)
+    assert feed.update([_task("a"), _task("b")]) is False
+    _publish(feed, manager)
+    feed.update([_task("b", running=True), _task("c")])
+    _publish(feed, manager)
+
+    snapshot, heartbeat, patch = [json.loads(text) for text in manager.sent["ws1"]]
+    assert snapshot["type"] == "snapshot"
+    assert [t["id"] for t in snapshot["tasks"]] == ["a", "b"]
+    assert heartbeat == {"type": "heartbeat", "version": 1}
+    assert patch["type"] == "patch"
+    assert (patch["base_version"], patch["version"]) == (1, 2)
+    assert [t["id"] for t in patch["added"]] == ["c"]
+    assert [t["id"] for t in patch["changed"]] == ["b"]
+    assert patch["removed"] == ["a"]
+    assert patch["order"] == ["b", "c"]
+
+
+def test_feed_serializes_once_and_resyncs_late_subscribers():
+    feed = TaskFeed()
+    manager = _Manager(["ws1", "ws2"])
+    feed.subscribe("ws1")
+    feed.update([_task("a")])
+    _publish(feed, manager)
+
+    feed.subscribe("ws2")
+    feed.update([_task("a", running=True)])
+    _publish(feed, manager)
+
+    assert json.loads(manager.sent["ws1"][-1])["type"] == "patch"
+    late = json.loads(manager.sent["ws2"][-1])
+    assert late["type"] == "snapshot"
+    assert late["version"] == 2
+    assert feed.snapshot_text() is feed.snapshot_text()
+
+    feed.forget("ws2")
+    assert "ws2" not in feed.cursors
@@ -0,0 +1,102 @@
+import datetime
+import time
+import uuid
+
+import pytest
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_MISSED, JobExecutionEvent
+from sqlmodel import Session, select
+
+from backend.api.task_manager import SCHEDULED_JOB_FUNC, task_manager
+from backend.core.settings import get_settings
+from backend.db import engine
+from backend.models import Task, TaskRun
+
+
+@pytest.fixture
+def scheduled_task():
+    task = Task(id=str(uuid.uuid4()), name="nightly", command="echo hi", device_id="nowhere", schedule="0 3 * * *")
+    with Session(engine) as session:
+        session.add(task)
+        session.commit()
+        session.refresh(task)
+    yield task
+    task_manager.update_schedule(task.id, None)
+    with Session(engine) as session:
+        for run in session.exec(select(TaskRun).where(TaskRun.task_id == task.id)).all():
+            session.delete(run)
+        session.delete(session.get(Task, task.id))
+        session.commit()
+
+
+def _runs(task_id):
+    with Session(engine) as session:
+        return session.exec(select(TaskRun).where(TaskRun.task_id == task_id)).all()
+
+
+def test_unchanged_schedule_keeps_stored_job(scheduled_task):
+    task_manager.update_schedule(scheduled_task.id, "0 3 * * *", misfire_grace_time=60)
+    job = task_manager.scheduler.get_job(scheduled_task.id)
+    assert job.func_ref == SCHEDULED_JOB_FUNC
+    assert job.misfire_grace_time == 60
+    assert job.coalesce is True
+
+    # Pretend the stored next fire time was in the past, as after a restart
+    # (paused, as it would be while schedules are reconciled at startup)
+    past = job.next_run_time - datetime.timedelta(days=1)
+    task_manager.scheduler.pause()
+    try:
+        task_manager.scheduler.modify_job(scheduled_task.id, next_run_time=past)
+        task_manager.update_schedule(scheduled_task.id, "0 3 * * *", misfire_grace_time=60)
+        assert task_manager.scheduler.get_job(scheduled_task.id).next_run_time == past
+    finally:
+        task_manager.scheduler.resume()
+
+    task_manager.update_schedule(scheduled_task.id, "0 3 * * *", misfire_grace_time=0, coalesce=False)
+    job = task_manager.scheduler.get_job(scheduled_task.id)
+    assert job.misfire_grace_time is None
+    assert job.coalesce is False
+    assert job.next_run_time > past
+
+
+def test_zero_default_misfire_grace_means_no_limit(scheduled_task, monkeypatch):
+    monkeypatch.setenv("CODEYUN_SCHEDULE_MISFIRE_GRACE", "0")
+    get_settings.cache_clear()
+    try:
+        task_manager.update_schedule(scheduled_task.id, "0 3 * * *")
+        assert task_manager.scheduler.get_job(scheduled_task.id).misfire_grace_time is None
+    finally:
+        monkeypatch.undo()
+        get_settings.cache_clear()
+
+
+def test_upcoming_runs_come_from_the_job_store(scheduled_task):
+    task_manager.update_schedule(scheduled_task.id, scheduled_task.schedule)
+    upcoming = [run for run in task_manager.upcoming_runs(50) if run["task_id"] == scheduled_task.id]
+    assert len(upcoming) == 1
+    assert upcoming[0]["name"] == "nightly"
+    assert upcoming[0]["next_run_time"] > time.time()
+
+
+def test_run_history_records_missed_failed_and_finished_runs(scheduled_task):
+    scheduled = datetime.datetime.now(datetime.timezone.utc)
+    task_manager._on_job_event(JobExecutionEvent(EVENT_JOB_MISSED, scheduled_task.id, "default", scheduled))
+
+    # The device does not exist, so the start is recorded as an error
+    run_id = task_manager.run_scheduled(scheduled_task.id)
+    task_manager._on_job_event(JobExecutionEvent(EVENT_JOB_EXECUTED, scheduled_task.id, "default", scheduled, retval=run_id))
+
+    runs = {run.status: run for run in _runs(scheduled_task.id)}
+    assert set(runs) == {"missed", "error"}
+    assert runs["missed"].scheduled_at == pytest.approx(scheduled.timestamp())
+    assert runs["missed"].started_at is None
+    assert runs["error"].trigger == "schedule"
+    assert runs["error"].scheduled_at == pytest.approx(scheduled.timestamp())
+    assert "unavailable" in runs["error"].message
+
+    with Session(engine) as session:
+        session.add(TaskRun(task_id=scheduled_task.id, started_at=time.time()))
+        session.commit()
+    task_manager.finish_runs(scheduled_task.id, exit_code=3)
+    history = task_manager.list_runs(scheduled_task.id)
+    assert [run.status for run in history][0] == "failed"
+    assert history[0].exit_code == 3
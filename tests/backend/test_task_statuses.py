@@ -0,0 +1,61 @@
+import subprocess
+import sys
+import time
+
+import psutil
+
+from backend.api import task_manager as task_manager_module
+from backend.api.task_manager import task_manager
+from backend.core.device import LocalDevice, TaskStatus, device_manager
+from backend.models import Task
+
+
+class _FakeDevice:
+    def __init__(self):
+        self.calls = []
+
+    def get_task_statuses(self, task_ids):
+        self.calls.append(list(task_ids))
+        return {task_id: TaskStatus(id=task_id, running=True, pid=1) for task_id in task_ids}
+
+
+def _task(task_id, device_id):
+    return Task(id=task_id, name=task_id, command="echo", created_at=time.time(), device_id=device_id)
+
+
+def test_task_manager_batches_by_device_without_db(monkeypatch):
+    fake = _FakeDevice()
+    monkeypatch.setitem(device_manager.devices, "fake-device", fake)
+
+    def no_session(*args, **kwargs):
+        raise AssertionError("status collection must not open DB sessions")
+
+    monkeypatch.setattr(task_manager_module, "Session", no_session)
+
+    tasks = [_task("a", "fake-device"), _task("b", "missing-device"), _task("c", "fake-device")]
+    results = task_manager.tasks_with_status(tasks)
+
+    assert fake.calls == [["a", "c"]]
+    assert [r["id"] for r in results] == ["a", "b", "c"]
+    assert results[0]["status"]["running"] is True
+    assert results[1]["status"]["message"] == "Device unavailable"
+
+
+def test_local_device_statuses_match_single_lookups(test_device):
+    device = LocalDevice(device_id=test_device["id"], name="test", api_token=test_device["token"])
+    popen = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(10)"])
+    try:
+        assert device._track_process("running-task", psutil.Process(popen.pid), popen)
+        device.last_run_info["done-task"] = {"started_at": 1.0, "finished_at": 2.0, "exit_code": 0}
+
+        statuses = device.get_task_statuses(["running-task", "done-task", "unknown-task"])
+
+        assert statuses["running-task"].running is True
+        assert statuses["running-task"].pid == popen.pid
+        assert statuses["running-task"].memory_rss
+        assert statuses["done-task"].model_dump() == device.get_task_status("done-task").model_dump()
+        assert statuses["unknown-task"].running is False
+    finally:
+        device.supervisor.unwatch("running-task")
+        popen.terminate()
+        popen.wait(timeout=5)
@@ -0,0 +1,53 @@
+from jose import jwt
+
+from backend.core.auth import ALGORITHM, SECRET_KEY, UserCache, create_access_token, user_cache
+from backend.models import User
+
+
+def test_user_cache_is_bounded_and_invalidated():
+    cache = UserCache(maxsize=2, ttl=60)
+    users = [User(id=index, username=f"user-{index}", hashed_password="pw") for index in range(3)]
+    for user in users:
+        cache.put(user.username, 4102444800, user)
+
+    assert cache.get("user-0", 4102444800) is None
+    assert cache.get("user-2", 4102444800).id == 2
+    assert cache.get("user-2", 1) is None
+
+    cache.invalidate("user-2")
+    assert cache.get("user-2", 4102444800) is None
+    assert cache.get("user-1", 4102444800) is not None
+
+
+def test_user_cache_respects_token_expiry():
+    cache = UserCache(maxsize=4, ttl=60)
+    cache.put("expired", 1, User(id=1, username="expired", hashed_password="pw"))
+    assert cache.get("expired", 1) is None
+
+
+def test_me_reuses_cached_user(client, session, monkeypatch):
+    user = User(username="cached-user", hashed_password="pw", is_active=True)
+    session.add(user)
+    session.commit()
+    session.refresh(user)
+
+    user_cache.invalidate()
+    token = create_access_token({"sub": user.username})
+    exp = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["exp"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    first = client.get("/api/auth/me", headers=headers)
+    assert first.status_code == 200
+    assert user_cache.get(user.username, exp) is not None
+
+    executed = []
+    original_exec = session.exec
+    monkeypatch.setattr(session, "exec", lambda *args, **kwargs: executed.append(args) or original_exec(*args, **kwargs))
+
+    second = client.get("/api/auth/me", headers=headers)
+    assert second.status_code == 200
+    assert second.json()["username"] == "cached-user"
+    assert executed == []
+
+    user_cache.invalidate(user.username)
+    assert user_cache.get(user.username, exp) is None
@@ -0,0 +1,210 @@
+import asyncio
+import io
+import json
+import threading
+import time
+
+from backend.api.task_feed import TaskFeed
+from backend.api.task_manager import _log_broadcast_callback
+from backend.api.websocket_manager import COALESCE, DROP_OLDEST, IDLE_ROOM_STATS, ConnectionManager, RoomPolicy
+from backend.core.log_batcher import LogBatcher
+
+
+class _Socket:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.closed = False
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("socket gone")
+        await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+    async def close(self):
+        self.closed = True
+
+
+def _manager():
+    return ConnectionManager(
+        policies={
+            "task_list": RoomPolicy(COALESCE, 1),
+            "task_logs": RoomPolicy(DROP_OLDEST, 3),
+        },
+        send_timeout=1,
+    )
+
+
+def test_slow_socket_does_not_delay_others():
+    async def scenario():
+        manager = _manager()
+        fast, slow = _Socket(), _Socket(delay=0.5)
+        manager.add(fast, "task_logs:t1")
+        manager.add(slow, "task_logs:t1")
+
+        for i in range(10):
+            await manager.broadcast("task_logs:t1", {"i": i})
+            await asyncio.sleep(0.01)
+
+        assert [json.loads(t)["i"] for t in fast.sent] == list(range(10))
+        assert slow.sent == []
+        # The slow socket keeps its first (in-flight) message plus the 3 newest
+        assert manager.room_stats["task_logs:t1"].dropped == 6
+        manager.disconnect(fast, "task_logs:t1")
+        manager.disconnect(slow, "task_logs:t1")
+
+    asyncio.run(scenario())
+
+
+def test_failed_socket_is_evicted():
+    async def scenario():
+        manager = _manager()
+        dead = _Socket(fail=True)
+        manager.add(dead, "task_logs:t1")
+
+        await manager.broadcast("task_logs:t1", {"i": 1})
+        await asyncio.sleep(0.05)
+
+        assert "task_logs:t1" not in manager.rooms
+        assert dead.closed
+        assert manager.stats()["rooms"]["task_logs:t1"]["evicted"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_stats_of_emptied_rooms_are_bounded():
+    async def scenario():
+        manager = _manager()
+        for i in range(IDLE_ROOM_STATS + 10):
+            ws = _Socket()
+            manager.add(ws, f"task_logs:t{i}")
+            await manager.broadcast(f"task_logs:t{i}", {"i": i})
+            await asyncio.sleep(0.01)
+            manager.disconnect(ws, f"task_logs:t{i}")
+
+        assert manager.room_stats == {}
+        rooms = manager.stats()["rooms"]
+        assert len(rooms) == IDLE_ROOM_STATS
+        assert "task_logs:t0" not in rooms
+        assert rooms[f"task_logs:t{IDLE_ROOM_STATS + 9}"]["sent"] == 1
+
+        # A room that is joined again picks its stats back up
+        ws = _Socket()
+        manager.add(ws, f"task_logs:t{IDLE_ROOM_STATS + 9}")
+        await manager.broadcast(f"task_logs:t{IDLE_ROOM_STATS + 9}", {"i": 0})
+        await asyncio.sleep(0.01)
+        assert manager.room_stats[f"task_logs:t{IDLE_ROOM_STATS + 9}"].sent == 2
+        manager.disconnect(ws, f"task_logs:t{IDLE_ROOM_STATS + 9}")
+
+    asyncio.run(scenario())
+
+
+def test_coalesced_task_feed_resyncs_with_snapshot():
+    async def scenario():
+        manager = _manager()
+        feed = TaskFeed()
+        ws = _Socket(delay=0.2)
+        manager.add(ws, "task_list")
+        feed.subscribe(ws)
+
+        feed.update([{"id": "a", "v": 1}])
+        await feed.publish(manager, "task_list")
+        await asyncio.sleep(0)  # writer takes the first snapshot
+
+        for v in range(2, 5):
+            feed.update([{"id": "a", "v": v}])
+            await feed.publish(manager, "task_list")
+        await asyncio.sleep(0.6)
+
+        messages = [json.loads(t) for t in ws.sent]
+        assert [m["type"] for m in messages] == ["snapshot", "snapshot"]
+        assert messages[-1]["version"] == 4
+        assert messages[-1]["tasks"] == [{"id": "a", "v": 4}]
+        manager.disconnect(ws, "task_list")
+
+    asyncio.run(scenario())
+
+
+def _received_and_missed(socket):
+    """Walk a watcher's log frames; every gap must be what the frame after it reports."""
+    expected = 0
+    for frame in (json.loads(text) for text in socket.sent):
+        first = int(frame["data"][0])
+        assert frame["dropped"] == first - expected
+        expected = int(frame["data"][-1]) + 1
+    return expected
+
+
+def test_slow_log_watcher_is_told_exactly_what_it_missed():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        manager = ConnectionManager(policies={"task_logs": RoomPolicy(DROP_OLDEST, 1)}, send_timeout=5)
+        fast, slow = _Socket(), _Socket(delay=0.3)
+
+        async def join():
+            manager.add(fast, "task_logs:t1")
+            manager.add(slow, "task_logs:t1")
+
+        async def leave():
+            manager.disconnect(fast, "task_logs:t1")
+            manager.disconnect(slow, "task_logs:t1")
+            await asyncio.sleep(0.01)
+
+        asyncio.run_coroutine_threadsafe(join(), loop).result(1)
+        batcher = LogBatcher("t1", io.StringIO(), _log_broadcast_callback(loop, manager), flush_interval=0.01).start()
+        for i in range(8):
+            batcher.add(f"{i}\n")
+            time.sleep(0.05)
+        batcher.close(timeout=5)
+        time.sleep(0.8)
+
+        assert _received_and_missed(fast) == 8
+        assert all(json.loads(text)["dropped"] == 0 for text in fast.sent)
+        assert _received_and_missed(slow) == 8
+        assert any(json.loads(text)["dropped"] > 0 for text in slow.sent)
+        assert manager.room_stats["task_logs:t1"].dropped > 0
+        asyncio.run_coroutine_threadsafe(leave(), loop).result(1)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(1)
+
+
+def test_busy_loop_does_not_hold_up_log_writes():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    release = threading.Event()
+    try:
+        manager = ConnectionManager(policies={"task_logs": RoomPolicy(DROP_OLDEST, 1)}, send_timeout=5)
+        watcher = _Socket()
+
+        async def join():
+            manager.add(watcher, "task_logs:t1")
+
+        async def leave():
+            manager.disconnect(watcher, "task_logs:t1")
+            await asyncio.sleep(0.01)
+
+        asyncio.run_coroutine_threadsafe(join(), loop).result(1)
+        loop.call_soon_threadsafe(release.wait, 5)
+        out = io.StringIO()
+        batcher = LogBatcher("t1", out, _log_broadcast_callback(loop, manager), flush_interval=0.01).start()
+        for i in range(3):
+            batcher.add(f"{i}\n")
+            time.sleep(0.05)
+        batcher.close(timeout=1)
+
+        assert out.getvalue() == "0\n1\n2\n"
+        assert not batcher._thread.is_alive()
+        release.set()
+        time.sleep(0.1)
+        assert _received_and_missed(watcher) == 3
+        asyncio.run_coroutine_threadsafe(leave(), loop).result(1)
+    finally:
+        release.set()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(1)